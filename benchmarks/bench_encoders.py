@@ -0,0 +1,76 @@
+"""Compara BinaryEncoder con SchemaBinaryEncoder en el ajuste y la transformación.
+
+Genera `--rows` registros remuestreando los datos procesados reales, con las columnas
+categóricas como texto (object) y como category (dataset.preprocess_data), y mide el mejor
+de `--repeat` tiempos de:
+- El codificador solo, sobre las columnas categóricas (fit y transform).
+- El preprocesador completo de features.create_pipeline (fit y transform).
+Antes se comprueba la equivalencia de ambos codificadores (features.test_schema_encoder).
+
+Uso:
+    python benchmarks/bench_encoders.py --rows 10000 1000000
+"""
+import argparse
+import time
+import warnings
+
+import numpy as np
+from category_encoders import BinaryEncoder
+
+from common import Config
+from dataset import load_processed_data, preprocess_data
+from encoders import SchemaBinaryEncoder
+from features import create_pipeline, test_schema_encoder
+
+ENCODERS = {
+    'binary': BinaryEncoder,
+    'schema': SchemaBinaryEncoder,
+}
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    # category_encoders emite advertencias de pandas en cada transformación
+    warnings.simplefilter('ignore')
+
+    reference = preprocess_data(load_processed_data()).drop('class', axis=1)
+    test_schema_encoder(reference[Config.CATEGORICAL_FEATURES])
+    test_schema_encoder(reference[Config.CATEGORICAL_FEATURES].astype(object))
+    rng = np.random.default_rng(Config.RANDOM_STATE)
+
+    print(f"{'filas':>10}{'entrada':>10}{'etapa':>16}{'codificador':>13}{'fit (s)':>10}{'transform (s)':>15}")
+    for n_rows in args.rows:
+        sample = reference.iloc[rng.integers(0, len(reference), size=n_rows)].reset_index(drop=True)
+        inputs = {
+            'category': sample,
+            'object': sample.astype({column: object for column in Config.CATEGORICAL_FEATURES}),
+        }
+        for input_name, X in inputs.items():
+            categorical = X[Config.CATEGORICAL_FEATURES]
+            for name, encoder_class in ENCODERS.items():
+                stages = (
+                    ('codificador', lambda: encoder_class(), categorical),
+                    ('preprocesador', lambda: create_pipeline(encoder=name), X),
+                )
+                for stage, make, data in stages:
+                    fit_seconds = timed(lambda: make().fit(data), args.repeat)
+                    fitted = make().fit(data)
+                    transform_seconds = timed(lambda: fitted.transform(data), args.repeat)
+                    print(f"{n_rows:>10}{input_name:>10}{stage:>16}{name:>13}"
+                          f"{fit_seconds:>10.4f}{transform_seconds:>15.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Compara el preprocesamiento incremental con la reconstrucción completa.
+
+Se genera un archivo crudo de `--rows` filas remuestreando los datos crudos reales y se
+preprocesa completo. Luego se agregan `--append` filas al final y se mide:
+- Reconstrucción completa (dataset.py sin --incremental) del archivo crecido.
+- Incremental (dataset.py --incremental): verifica los hashes de los bloques ya procesados y
+  sólo valida y escribe las filas nuevas.
+Al final se comprueba que ambas salidas sean idénticas byte a byte
+(incremental.test_incremental_outputs).
+
+Uso:
+    python benchmarks/bench_incremental.py --rows 2000000 --append 1000 100000
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from common import Config
+from dataset import load_data
+from incremental import preprocess_raw, test_incremental_outputs
+
+
+def append_rows(reference, path, n_rows, seed, header):
+    rng = np.random.default_rng(seed)
+    rows = reference.iloc[rng.integers(0, len(reference), size=n_rows)]
+    rows.to_csv(path, mode='a', index=False, header=header)
+
+
+def timed_preprocess(raw_path, output_dir, incremental, formats, chunk_rows):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = preprocess_raw(raw_path, formats, incremental, os.path.join(output_dir, 'manifest.json'),
+                                chunk_rows, output_dir)
+    assert result['report'].ok
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--append', type=int, nargs='+', default=[1_000, 100_000])
+    parser.add_argument('--chunk-rows', type=int, default=Config.PREPROCESS_CHUNK_ROWS)
+    parser.add_argument('--formats', nargs='+', default=['csv', 'parquet', 'packed'])
+    args = parser.parse_args()
+
+    reference = load_data()
+    print(f"{'filas':>12}{'nuevas':>10}{'modo':>26}{'segundos':>10}{'reutilizados':>14}")
+    for n_append in args.append:
+        with tempfile.TemporaryDirectory() as tmp:
+            raw_path = os.path.join(tmp, 'raw.csv')
+            incremental_dir = os.path.join(tmp, 'incremental')
+            full_dir = os.path.join(tmp, 'full')
+            append_rows(reference, raw_path, args.rows, Config.RANDOM_STATE, header=True)
+            timed_preprocess(raw_path, incremental_dir, False, args.formats, args.chunk_rows)
+            append_rows(reference, raw_path, n_append, Config.RANDOM_STATE + 1, header=False)
+
+            for mode, output_dir, incremental in (('reconstrucción completa', full_dir, False),
+                                                  ('incremental', incremental_dir, True)):
+                seconds, result = timed_preprocess(raw_path, output_dir, incremental, args.formats,
+                                                   args.chunk_rows)
+                print(f"{result['rows']:>12}{result['new_rows']:>10}{mode:>26}{seconds:>10.2f}"
+                      f"{result['reused_chunks']:>14}")
+            test_incremental_outputs(full_dir, incremental_dir, args.formats)
+
+
+if __name__ == '__main__':
+    main()
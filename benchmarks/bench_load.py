@@ -0,0 +1,280 @@
+"""Prueba de carga de la API de predicción con concurrencia creciente.
+
+Un generador de carga con asyncio envía peticiones a /predict y /predict/batch desde
+`concurrency` clientes simultáneos (cada cliente envía la siguiente petición al recibir la
+respuesta anterior) durante --duration segundos por nivel de concurrencia. Los registros
+se generan a partir de Config.SCHEMA (inference.schema_sample) y la mezcla de peticiones
+individuales y por lotes se controla con --batch-fraction y --batch-size.
+
+La API puede probarse en el mismo proceso (cliente ASGI de httpx sobre main.app, útil para
+detectar regresiones) o en un servidor local con --url (por ejemplo, uvicorn con varios
+workers, para dimensionar el despliegue):
+
+    uvicorn main:app --app-dir diabetes_mlops --workers 4 --port 8000
+
+Para cada nivel se reportan el throughput, los percentiles p50/p95/p99 de latencia y la
+tasa de errores (respuestas distintas de 200, tiempos de espera y errores de conexión).
+El punto de saturación es el primer nivel que alcanza el (1 - --tolerance) del throughput
+máximo: a partir de él más concurrencia sólo aumenta la latencia.
+
+Uso:
+    python benchmarks/bench_load.py --concurrency 1 2 4 8 16 32 --duration 10 --batch-fraction 0.1
+    python benchmarks/bench_load.py --url http://127.0.0.1:8000 --output reports/load.json --plot reports/figures/load.png
+"""
+import argparse
+import asyncio
+from contextlib import AsyncExitStack
+import json
+import os
+import random
+import time
+
+import httpx
+
+from common import Config, summarize_latencies
+from inference import schema_sample
+
+KINDS = ['single', 'batch']
+PATHS = {'single': '/predict', 'batch': '/predict/batch'}
+COLUMNS = Config.NUMERIC_FEATURES + Config.CATEGORICAL_FEATURES
+
+
+def make_payloads(n_records, seed):
+    """Registros de entrada de la API generados a partir de Config.SCHEMA.
+
+    Args:
+        n_records (int): Número de registros distintos.
+        seed (int): Semilla.
+
+    Returns:
+        list: Diccionarios con los campos de DiabetesData (los nombres de main.FIELDS).
+    """
+    sample = schema_sample(n_records, seed)
+    # Los campos de la API usan '_' en lugar de espacios (main.FIELDS)
+    fields = [column.replace(' ', '_') for column in COLUMNS]
+    records = sample[COLUMNS].astype(object).values.tolist()
+    return [{field: (int(value) if field == 'Age' else value) for field, value in zip(fields, record)}
+            for record in records]
+
+
+class LoadStats:
+    """Latencias y errores de un nivel de concurrencia, por tipo de petición."""
+
+    def __init__(self):
+        self.latencies = {kind: [] for kind in KINDS}
+        self.errors = {kind: 0 for kind in KINDS}
+        self.records = 0
+        self.status_codes = {}
+
+    def add(self, kind, latency, status, n_records):
+        self.status_codes[status] = self.status_codes.get(status, 0) + 1
+        if status == 200:
+            self.latencies[kind].append(latency)
+            self.records += n_records
+        else:
+            self.errors[kind] += 1
+
+    def summary(self, concurrency, wall_time):
+        """
+        Resume el nivel de concurrencia.
+
+        Parameters:
+        concurrency (int): Número de clientes simultáneos.
+        wall_time (float): Duración del nivel, en segundos.
+
+        Returns:
+        dict: Throughput y latencias de todas las peticiones correctas y de cada tipo, tasa de
+        errores, registros evaluados por segundo y conteo de códigos de respuesta.
+        """
+        latencies = self.latencies['single'] + self.latencies['batch']
+        total = len(latencies) + sum(self.errors.values())
+        result = {'concurrency': concurrency, 'wall_time_s': wall_time, 'errors': sum(self.errors.values()),
+                  'error_rate': sum(self.errors.values()) / total if total else 0.0,
+                  'records_per_s': self.records / wall_time,
+                  'status_codes': {str(code): count
+                                   for code, count in sorted(self.status_codes.items(), key=str)}}
+        result.update(summarize_latencies(latencies, wall_time) if latencies else
+                      {'requests': 0, 'throughput_rps': 0.0})
+        for kind in KINDS:
+            if self.latencies[kind]:
+                result[kind] = summarize_latencies(self.latencies[kind], wall_time)
+                result[kind]['errors'] = self.errors[kind]
+        return result
+
+
+async def client_loop(client, payloads, batch_fraction, batch_size, deadline, stats, rng):
+    while time.perf_counter() < deadline:
+        if rng.random() < batch_fraction:
+            kind, start_index = 'batch', rng.randrange(len(payloads) - batch_size + 1)
+            body, n_records = payloads[start_index:start_index + batch_size], batch_size
+        else:
+            kind, body, n_records = 'single', rng.choice(payloads), 1
+        start = time.perf_counter()
+        try:
+            response = await client.post(PATHS[kind], json=body)
+            status = response.status_code
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        if stats is not None:
+            stats.add(kind, time.perf_counter() - start, status, n_records)
+
+
+async def run_level(client, payloads, concurrency, duration, warmup, batch_fraction, batch_size, seed):
+    """Mantiene `concurrency` clientes enviando peticiones durante `warmup` + `duration` segundos.
+
+    Las respuestas del calentamiento no se cuentan.
+
+    Returns:
+        dict: Resumen del nivel (ver LoadStats.summary).
+    """
+    rngs = [random.Random(seed * 1000 + i) for i in range(concurrency)]
+    if warmup > 0:
+        deadline = time.perf_counter() + warmup
+        await asyncio.gather(*(client_loop(client, payloads, batch_fraction, batch_size, deadline, None, rng)
+                               for rng in rngs))
+    stats = LoadStats()
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(client_loop(client, payloads, batch_fraction, batch_size, deadline, stats, rng)
+                           for rng in rngs))
+    return stats.summary(concurrency, time.perf_counter() - start)
+
+
+def find_saturation(levels, tolerance=0.05, max_error_rate=0.01):
+    """Nivel de concurrencia a partir del cual el throughput deja de crecer.
+
+    Args:
+        levels (list): Resúmenes de run_level, en orden de concurrencia creciente.
+        tolerance (float): Fracción del throughput máximo que se considera alcanzada.
+        max_error_rate (float): Los niveles con más errores no cuentan como saturación sana.
+
+    Returns:
+        dict: Concurrencia de saturación, su throughput y p99, y el primer nivel con una tasa
+        de errores mayor que `max_error_rate` (None si ninguno).
+    """
+    healthy = [level for level in levels if level['error_rate'] <= max_error_rate and level['requests']]
+    failing = [level['concurrency'] for level in levels if level['error_rate'] > max_error_rate]
+    saturation = None
+    if healthy:
+        max_throughput = max(level['throughput_rps'] for level in healthy)
+        saturation = next(level for level in healthy
+                          if level['throughput_rps'] >= (1 - tolerance) * max_throughput)
+    return {
+        'concurrency': saturation['concurrency'] if saturation else None,
+        'throughput_rps': saturation['throughput_rps'] if saturation else None,
+        'p99_ms': saturation['p99_ms'] if saturation else None,
+        'first_failing_concurrency': failing[0] if failing else None,
+    }
+
+
+def plot_curves(levels, path):
+    """Guarda la curva de throughput contra latencia (p50/p95/p99) de los niveles probados."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    levels = [level for level in levels if level['requests']]
+    throughput = [level['throughput_rps'] for level in levels]
+    fig, ax = plt.subplots(figsize=(7, 4.5))
+    for percentile in ['p50_ms', 'p95_ms', 'p99_ms']:
+        ax.plot(throughput, [level[percentile] for level in levels], marker='o', label=percentile[:3])
+    for level, x in zip(levels, throughput):
+        ax.annotate(str(level['concurrency']), (x, level['p99_ms']), textcoords='offset points',
+                    xytext=(0, 5), ha='center', fontsize=8)
+    ax.set_xlabel('Throughput (peticiones/s)')
+    ax.set_ylabel('Latencia (ms)')
+    ax.set_title('Throughput contra latencia por nivel de concurrencia')
+    ax.legend()
+    fig.tight_layout()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def make_client(url, max_connections, timeout):
+    if url:
+        return httpx.AsyncClient(base_url=url, timeout=timeout,
+                                 limits=httpx.Limits(max_connections=max_connections))
+    import main
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url='http://loadtest',
+                             timeout=timeout)
+
+
+async def run_load_test(args):
+    payloads = make_payloads(args.records, args.seed)
+    levels = []
+    async with AsyncExitStack() as stack:
+        if not args.url:
+            import main
+
+            # El cliente ASGI no ejecuta el lifespan de la app (carga del modelo y
+            # micro-batching): se ejecuta aquí y se espera a que el modelo esté listo
+            await stack.enter_async_context(main.app.router.lifespan_context(main.app))
+            if not await asyncio.to_thread(main.ready.wait, args.timeout * 10):
+                raise RuntimeError(f"El modelo no se cargó: {main.startup_error}")
+        client = await stack.enter_async_context(make_client(args.url, max(args.concurrency), args.timeout))
+        for concurrency in args.concurrency:
+            level = await run_level(client, payloads, concurrency, args.duration, args.warmup,
+                                    args.batch_fraction, args.batch_size, args.seed)
+            levels.append(level)
+            print(f"{concurrency:>6}{level['requests']:>9}{level['throughput_rps']:>10.1f}"
+                  f"{level['records_per_s']:>12.1f}{level.get('p50_ms', float('nan')):>9.1f}"
+                  f"{level.get('p95_ms', float('nan')):>9.1f}{level.get('p99_ms', float('nan')):>9.1f}"
+                  f"{level['error_rate']:>9.1%}")
+    return levels
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default=None, help='URL de un servidor local (por defecto, main.app en este proceso)')
+    parser.add_argument('--model', default=Config.MODEL_PATH, help='Modelo de la API en este proceso')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument('--duration', type=float, default=10.0, help='Segundos medidos por nivel')
+    parser.add_argument('--warmup', type=float, default=1.0, help='Segundos de calentamiento por nivel')
+    parser.add_argument('--batch-fraction', type=float, default=0.0,
+                        help='Fracción de peticiones a /predict/batch')
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--records', type=int, default=1000, help='Registros distintos de las peticiones')
+    parser.add_argument('--timeout', type=float, default=10.0)
+    parser.add_argument('--seed', type=int, default=Config.RANDOM_STATE)
+    parser.add_argument('--tolerance', type=float, default=0.05)
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    parser.add_argument('--output', default=None, help='Ruta del JSON con los resultados')
+    parser.add_argument('--plot', default=None, help='Ruta de la gráfica de throughput contra latencia')
+    args = parser.parse_args()
+    if not 0 < args.batch_size <= min(Config.MAX_BATCH_SIZE, args.records):
+        parser.error('--batch-size debe estar entre 1 y min(Config.MAX_BATCH_SIZE, --records)')
+    # main.py carga el modelo de Config.MODEL_PATH
+    Config.MODEL_PATH = args.model
+
+    target = args.url or 'main.app (en proceso)'
+    print(f"Objetivo: {target}; {args.duration:g} s por nivel; {args.batch_fraction:.0%} lotes de "
+          f"{args.batch_size} registros")
+    print(f"{'conc.':>6}{'petic.':>9}{'petic./s':>10}{'registros/s':>12}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'p99 ms':>9}{'errores':>9}")
+    levels = asyncio.run(run_load_test(args))
+    saturation = find_saturation(levels, args.tolerance, args.max_error_rate)
+    if saturation['concurrency'] is None:
+        print("Saturación: ningún nivel respondió sin errores")
+    else:
+        print(f"Saturación: concurrencia {saturation['concurrency']} "
+              f"({saturation['throughput_rps']:.1f} peticiones/s, p99 {saturation['p99_ms']:.1f} ms)")
+    if saturation['first_failing_concurrency'] is not None:
+        print(f"Errores por encima de {args.max_error_rate:.0%} desde la concurrencia "
+              f"{saturation['first_failing_concurrency']}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump({'target': target, 'params': {key: value for key, value in vars(args).items()
+                                                    if key not in ('output', 'plot')},
+                       'levels': levels, 'saturation': saturation}, f, indent=2)
+        print(f"Resultados guardados en {args.output}")
+    if args.plot:
+        plot_curves(levels, args.plot)
+        print(f"Gráfica guardada en {args.plot}")
+
+
+if __name__ == '__main__':
+    main()
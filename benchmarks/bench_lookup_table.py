@@ -0,0 +1,57 @@
+"""Mide la construcción y el uso de la tabla precalculada de predicciones (lookup.py).
+
+Reporta el tiempo de construcción y el tamaño de la tabla, y compara la latencia de
+predicción de 1 y 1000 registros con la tabla, con el pipeline compilado y con el
+pipeline completo de scikit-learn.
+
+Uso:
+    python benchmarks/bench_lookup_table.py --model models/trained_model.pkl
+"""
+import argparse
+import tempfile
+import time
+
+import joblib
+
+from common import Config
+from inference import CompiledPipeline, schema_sample
+from lookup import build_prediction_table, load_prediction_table
+from model_loader import file_md5
+
+
+def latency_us(fn, repeat):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default=Config.MODEL_PATH)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    version = file_md5(args.model)
+    compiled = CompiledPipeline(model)
+    with tempfile.TemporaryDirectory() as base_dir:
+        stats = build_prediction_table(model, version, base_dir=base_dir)
+        table = load_prediction_table(version, base_dir=base_dir)
+        print(f"construcción: {stats['seconds']:.1f} s, {stats['points']} puntos, "
+              f"{stats['bytes'] / 1e6:.1f} MB")
+
+        print(f"{'registros':>10}{'tabla (us)':>14}{'compilado (us)':>16}{'pipeline (us)':>16}")
+        for n_rows in (1, 1000):
+            frame = schema_sample(n_rows)
+            columns = {column: frame[column].tolist() for column in frame.columns}
+            repeat = max(args.repeat // n_rows, 10)
+            print(f"{n_rows:>10}"
+                  f"{latency_us(lambda: table.lookup(columns), repeat):>14.1f}"
+                  f"{latency_us(lambda: compiled.predict(columns), repeat):>16.1f}"
+                  f"{latency_us(lambda: model.predict(frame), repeat):>16.1f}")
+
+
+if __name__ == '__main__':
+    main()
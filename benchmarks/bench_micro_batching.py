@@ -0,0 +1,72 @@
+"""Compara la latencia (p50/p99) y el throughput de /predict con y sin micro-batching.
+
+Simula el threadpool de FastAPI con varios hilos que envían registros individuales de
+forma concurrente, primero llamando al modelo fila por fila y después a través de
+MicroBatcher.
+
+Uso:
+    python benchmarks/bench_micro_batching.py --model models/trained_model.pkl --threads 40
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+import joblib
+import pandas as pd
+
+from common import Config, summarize_latencies
+from batching import MicroBatcher
+from inference import schema_sample
+
+COLUMNS = Config.NUMERIC_FEATURES + Config.CATEGORICAL_FEATURES
+
+
+def run(call, rows, threads):
+    def worker(chunk):
+        latencies = []
+        for row in chunk:
+            start = time.perf_counter()
+            call(row)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    chunks = [rows[i::threads] for i in range(threads)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(worker, chunks))
+    wall_time = time.perf_counter() - start
+    return summarize_latencies([lat for chunk in results for lat in chunk], wall_time)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default=Config.MODEL_PATH)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=40)
+    parser.add_argument('--window-ms', type=float, default=Config.MICRO_BATCH_WINDOW_MS)
+    parser.add_argument('--max-batch-size', type=int, default=Config.MICRO_BATCH_MAX_SIZE)
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    rows = schema_sample(args.requests)[COLUMNS].values.tolist()
+
+    def predict_rows(batch):
+        return list(model.predict(pd.DataFrame(batch, columns=COLUMNS)))
+
+    # Llamada previa para inicializar los índices internos de pandas antes de usar varios hilos
+    predict_rows(rows[:1])
+    off = run(lambda row: predict_rows([row])[0], rows, args.threads)
+    batcher = MicroBatcher(predict_rows, max_batch_size=args.max_batch_size, window_ms=args.window_ms)
+    try:
+        on = run(batcher.predict, rows, args.threads)
+    finally:
+        batcher.close()
+
+    print(f"{'modo':<12}{'peticiones':>12}{'p50 (ms)':>12}{'p99 (ms)':>12}{'req/s':>12}")
+    for name, stats in (('sin lotes', off), ('micro-lotes', on)):
+        print(f"{name:<12}{stats['requests']:>12}{stats['p50_ms']:>12.2f}"
+              f"{stats['p99_ms']:>12.2f}{stats['throughput_rps']:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
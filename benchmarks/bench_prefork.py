@@ -0,0 +1,125 @@
+"""Compara `uvicorn --workers` con los workers pre-fork de serve.py: throughput y memoria.
+
+Para cada modo se lanza el servidor con --workers procesos, se espera a que /ready responda,
+se aplica carga con el generador de bench_load.py en cada nivel de --concurrency y al final
+se mide la memoria de todo el árbol de procesos (principal + workers):
+- RSS: suma de la memoria residente de cada proceso (cuenta varias veces las páginas compartidas).
+- USS: memoria privada de cada proceso, sumada.
+- PSS: memoria proporcional (las páginas compartidas se reparten entre los procesos que las usan);
+  es la memoria real que ocupa el servidor.
+
+Uso:
+    python benchmarks/bench_prefork.py --workers 4 --concurrency 4 16 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+import httpx
+import psutil
+
+from common import ROOT_DIR, Config
+from bench_load import make_payloads, run_level
+
+APP_DIR = os.path.join(ROOT_DIR, 'diabetes_mlops')
+
+
+def server_command(mode, workers, port):
+    if mode == 'uvicorn':
+        return [sys.executable, '-m', 'uvicorn', 'main:app', '--app-dir', APP_DIR, '--port', str(port),
+                '--workers', str(workers), '--log-level', 'warning']
+    return [sys.executable, os.path.join(APP_DIR, 'serve.py'), '--port', str(port), '--workers', str(workers)]
+
+
+def wait_ready(url, process, timeout):
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout and process.poll() is None:
+        try:
+            with urllib.request.urlopen(url + '/ready', timeout=5) as response:
+                if response.status == 200:
+                    return time.perf_counter() - start
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.05)
+    raise RuntimeError(f"El servidor no estuvo listo en {timeout} s")
+
+
+def tree_memory(pid):
+    """Suma de RSS, USS y PSS (MB) de un proceso y sus descendientes."""
+    parent = psutil.Process(pid)
+    totals = {'processes': 0, 'rss_mb': 0.0, 'uss_mb': 0.0, 'pss_mb': 0.0}
+    for process in [parent] + parent.children(recursive=True):
+        try:
+            memory = process.memory_full_info()
+        except psutil.NoSuchProcess:
+            continue
+        totals['processes'] += 1
+        totals['rss_mb'] += memory.rss / 2 ** 20
+        totals['uss_mb'] += memory.uss / 2 ** 20
+        totals['pss_mb'] += memory.pss / 2 ** 20
+    return totals
+
+
+async def apply_load(url, payloads, args):
+    levels = []
+    async with httpx.AsyncClient(base_url=url, timeout=args.timeout,
+                                 limits=httpx.Limits(max_connections=max(args.concurrency))) as client:
+        for concurrency in args.concurrency:
+            levels.append(await run_level(client, payloads, concurrency, args.duration, args.warmup,
+                                          args.batch_fraction, args.batch_size, args.seed))
+    return levels
+
+
+def run_mode(mode, args, payloads, env):
+    url = f'http://127.0.0.1:{args.port}'
+    process = subprocess.Popen(server_command(mode, args.workers, args.port), env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        ready = wait_ready(url, process, args.ready_timeout)
+        levels = asyncio.run(apply_load(url, payloads, args))
+        return ready, levels, tree_memory(process.pid)
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modes', nargs='+', choices=['uvicorn', 'prefork'], default=['uvicorn', 'prefork'])
+    parser.add_argument('--workers', type=int, default=Config.SERVING_WORKERS)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[4, 16])
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--warmup', type=float, default=1.0)
+    parser.add_argument('--batch-fraction', type=float, default=0.0)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--timeout', type=float, default=10.0)
+    parser.add_argument('--ready-timeout', type=float, default=120.0)
+    parser.add_argument('--model', default=Config.MODEL_PATH)
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--seed', type=int, default=Config.RANDOM_STATE)
+    args = parser.parse_args()
+
+    env = dict(os.environ, MODEL_PATH=os.path.abspath(args.model))
+    payloads = make_payloads(1000, args.seed)
+    print(f"{args.workers} worker(s), {os.cpu_count()} CPU(s)")
+    print(f"{'modo':<9}{'listo (s)':>10}{'conc.':>7}{'petic./s':>10}{'p50 ms':>8}{'p99 ms':>8}"
+          f"{'errores':>9}{'procesos':>10}{'RSS MB':>8}{'USS MB':>8}{'PSS MB':>8}")
+    for mode in args.modes:
+        ready, levels, memory = run_mode(mode, args, payloads, env)
+        for i, level in enumerate(levels):
+            line = (f"{mode:<9}{ready:>10.2f}{level['concurrency']:>7}{level['throughput_rps']:>10.1f}"
+                    f"{level.get('p50_ms', float('nan')):>8.1f}{level.get('p99_ms', float('nan')):>8.1f}"
+                    f"{level['error_rate']:>9.1%}")
+            if i == len(levels) - 1:
+                line += (f"{memory['processes']:>10}{memory['rss_mb']:>8.0f}{memory['uss_mb']:>8.0f}"
+                         f"{memory['pss_mb']:>8.0f}")
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Mide el ahorro de la caché de preprocesamiento por pliegue en la búsqueda de hiperparámetros.
+
+Ejecuta la misma búsqueda de train.py (GridSearchCV de las tres familias de modelos sobre
+los datos procesados) sin caché y con la caché de modeling/search.py, y comprueba que los
+mejores parámetros y puntajes de validación cruzada sean idénticos.
+
+Uso:
+    python benchmarks/bench_preprocessing_cache.py --n-jobs -1
+"""
+import argparse
+import time
+import warnings
+
+import numpy as np
+from sklearn.model_selection import GridSearchCV, train_test_split
+
+from common import Config
+from dataset import load_processed_data, preprocess_data
+from features import create_pipeline
+from diabetes_mlops.modeling.search import (PARAM_GRIDS, build_model_pipeline, get_models,
+                                            preprocessing_cache)
+
+
+def run_search(X_train, y_train, enabled, n_jobs):
+    preprocessor = create_pipeline()
+    preprocessor.set_output(transform='pandas')
+    results = {}
+    start = time.perf_counter()
+    with preprocessing_cache(enabled=enabled, cache_dir=None) as cache_dir:
+        for model_name, model in get_models().items():
+            family_start = time.perf_counter()
+            search = GridSearchCV(build_model_pipeline(preprocessor, model, cache_dir),
+                                  PARAM_GRIDS[model_name], cv=Config.CV_FOLDS, n_jobs=n_jobs)
+            search.fit(X_train, y_train)
+            results[model_name] = (search.best_params_, search.cv_results_['mean_test_score'],
+                                   time.perf_counter() - family_start)
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore')
+
+    data = preprocess_data(load_processed_data())
+    X = data.drop('class', axis=1)
+    y = data['class']
+    X_train, _, y_train, _ = train_test_split(X, y, test_size=Config.TEST_SIZE,
+                                              random_state=Config.RANDOM_STATE)
+
+    baseline, baseline_time = run_search(X_train, y_train, False, args.n_jobs)
+    cached, cached_time = run_search(X_train, y_train, True, args.n_jobs)
+
+    print(f"{'modelo':<20}{'sin caché (s)':>15}{'con caché (s)':>15}")
+    for model_name in baseline:
+        assert baseline[model_name][0] == cached[model_name][0], "Los mejores parámetros difieren"
+        assert np.array_equal(baseline[model_name][1], cached[model_name][1]), "Los puntajes difieren"
+        print(f"{model_name:<20}{baseline[model_name][2]:>15.1f}{cached[model_name][2]:>15.1f}")
+    print(f"{'total':<20}{baseline_time:>15.1f}{cached_time:>15.1f}"
+          f"   ahorro: {1 - cached_time / baseline_time:.0%}")
+
+
+if __name__ == '__main__':
+    main()
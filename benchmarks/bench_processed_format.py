@@ -0,0 +1,69 @@
+"""Compara el tiempo de carga y la memoria de los datos procesados en CSV y Parquet.
+
+Genera un dataset del tamaño indicado remuestreando los datos procesados reales, lo
+escribe en ambos formatos y mide:
+- CSV con la inferencia de tipos por defecto de pandas (comportamiento anterior).
+- CSV con tipos explícitos (dataset.read_processed).
+- Parquet con tipos compactos (dataset.read_processed), completo y sólo con dos columnas.
+
+Uso:
+    python benchmarks/bench_processed_format.py --rows 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from common import Config
+from dataset import load_processed_data, read_processed, to_processed_dtypes
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    reference = load_processed_data()
+    rng = np.random.default_rng(Config.RANDOM_STATE)
+    data = reference.iloc[rng.integers(0, len(reference), size=args.rows)].reset_index(drop=True)
+    # El CSV procesado conserva los valores originales de 'class'
+    csv_data = data.astype(object).assign(
+        Age=data['Age'].astype('int64'),
+        **{'class': np.where(data['class'], 'Positive', 'Negative')})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'data.csv')
+        parquet_path = os.path.join(tmp, 'data.parquet')
+        csv_data.to_csv(csv_path, index=False)
+        to_processed_dtypes(data).to_parquet(parquet_path, index=False)
+
+        cases = [
+            ('csv (tipos por defecto)', csv_path, lambda: pd.read_csv(csv_path)),
+            ('csv (tipos explícitos)', csv_path, lambda: read_processed(csv_path)),
+            ('parquet', parquet_path, lambda: read_processed(parquet_path)),
+            ('parquet (Age, class)', parquet_path,
+             lambda: read_processed(parquet_path, columns=['Age', 'class'])),
+        ]
+        print(f"{args.rows} filas")
+        print(f"{'caso':<26}{'archivo (MB)':>14}{'carga (s)':>12}{'memoria (MB)':>14}")
+        for name, path, load in cases:
+            seconds, frame = timed(load, args.repeat)
+            memory = frame.memory_usage(deep=True).sum() / 1e6
+            print(f"{name:<26}{os.path.getsize(path) / 1e6:>14.1f}{seconds:>12.3f}{memory:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
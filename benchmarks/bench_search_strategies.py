@@ -0,0 +1,87 @@
+"""Compara las estrategias de búsqueda de hiperparámetros de modeling/search.py.
+
+Para cada estrategia y familia de modelos reporta el número de ajustes de validación
+cruzada (con el motor nativo de XGBoost, boosters entrenados), el tiempo de la búsqueda y
+el f1 del mejor modelo en el conjunto de prueba (la misma métrica con la que train.py elige
+el modelo final).
+
+Con --rows el conjunto de entrenamiento se remuestrea para simular un dataset más grande
+(el conjunto de prueba no cambia).
+
+Uso:
+    python benchmarks/bench_search_strategies.py --n-jobs -1 [--rows 20000]
+"""
+import argparse
+import time
+import warnings
+
+from sklearn.metrics import f1_score
+from sklearn.model_selection import train_test_split
+
+from common import Config
+from dataset import load_processed_data, preprocess_data
+from features import create_pipeline
+from diabetes_mlops.modeling.search import (build_model_pipeline, build_search, count_fits,
+                                            get_models, preprocessing_cache)
+
+# (etiqueta, estrategia, recurso de successive halving, motor de XGBoost en 'grid')
+STRATEGIES = [
+    ('grid', 'grid', None, 'native'),
+    ('grid (xgb sklearn)', 'grid', None, 'sklearn'),
+    ('halving (filas)', 'halving', 'n_samples', None),
+    ('halving (n_estimators)', 'halving', 'n_estimators', None),
+    ('random', 'random', None, None),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--rows', type=int, default=None,
+                        help='Remuestrea el conjunto de entrenamiento a este número de filas')
+    parser.add_argument('--strategies', nargs='+', default=[label for label, *_ in STRATEGIES])
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore')
+
+    data = preprocess_data(load_processed_data())
+    X = data.drop('class', axis=1)
+    y = data['class']
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=Config.TEST_SIZE,
+                                                        random_state=Config.RANDOM_STATE)
+    if args.rows is not None:
+        X_train = X_train.sample(args.rows, replace=True, random_state=Config.RANDOM_STATE)
+        y_train = y_train.loc[X_train.index]
+        X_train = X_train.reset_index(drop=True)
+        y_train = y_train.reset_index(drop=True)
+    preprocessor = create_pipeline()
+    preprocessor.set_output(transform='pandas')
+
+    print(f"{'estrategia':<24}{'modelo':<20}{'ajustes':>8}{'segundos':>10}{'f1 prueba':>11}")
+    for label, strategy, resource, xgb_engine in STRATEGIES:
+        if label not in args.strategies:
+            continue
+        total_fits = 0
+        total_time = 0.0
+        best_f1 = 0.0
+        # Cada estrategia parte de una caché vacía y sin puntajes de ejecuciones anteriores
+        with preprocessing_cache(cache_dir=None) as cache_dir:
+            for model_name, model in get_models().items():
+                search = build_search(model_name, build_model_pipeline(preprocessor, model, cache_dir),
+                                      strategy, n_jobs=args.n_jobs,
+                                      halving_resource=resource or Config.HALVING_RESOURCE,
+                                      results_dir=None,
+                                      xgb_engine=xgb_engine or Config.XGB_SEARCH_ENGINE)
+                start = time.perf_counter()
+                search.fit(X_train, y_train)
+                elapsed = time.perf_counter() - start
+                score = f1_score(y_test, search.best_estimator_.predict(X_test))
+                fits = count_fits(search)
+                total_fits += fits
+                total_time += elapsed
+                best_f1 = max(best_f1, score)
+                print(f"{label:<24}{model_name:<20}{fits:>8}{elapsed:>10.1f}{score:>11.4f}")
+        print(f"{label:<24}{'total / mejor':<20}{total_fits:>8}{total_time:>10.1f}{best_f1:>11.4f}")
+
+
+if __name__ == '__main__':
+    main()
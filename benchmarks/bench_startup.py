@@ -0,0 +1,155 @@
+"""Mide el arranque en frío de la API: desde el lanzamiento de uvicorn hasta la primera predicción.
+
+Para cada arranque se lanza `uvicorn main:app` en un proceso nuevo y se consulta /ready
+(o / si la versión no tiene /ready) hasta que responde 200. Se reportan:
+- import: tiempo de `import main` en un intérprete aparte.
+- escucha: segundos hasta la primera respuesta HTTP del servidor.
+- listo: segundos hasta que /ready responde 200 (sin /ready, igual a escucha).
+- 1.ª pred.: segundos desde el lanzamiento hasta recibir la primera respuesta de /predict,
+  y la latencia de esa petición.
+- latencia p50 de las peticiones siguientes y memoria RSS/USS del servidor.
+
+Con --rev se compara con la versión de diabetes_mlops/ de otro commit (por ejemplo, el
+anterior a un cambio), usando el mismo modelo y las mismas tablas de predicciones.
+
+Uso:
+    python benchmarks/bench_startup.py --rev HEAD~1 --repeat 3
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+import psutil
+
+from common import ROOT_DIR, Config
+from bench_load import make_payloads
+
+POLL_INTERVAL = 0.05
+
+
+def request(url, payload=None):
+    data = json.dumps(payload).encode() if payload is not None else None
+    req = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def import_time(app_dir, env):
+    code = "import time; start = time.perf_counter(); import main; print(time.perf_counter() - start)"
+    result = subprocess.run([sys.executable, '-c', code], cwd=app_dir, env=env,
+                            capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def cold_start(app_dir, env, port, payload, n_requests, timeout):
+    """Lanza el servidor y mide el tiempo hasta que está listo y hasta la primera predicción.
+
+    Args:
+        app_dir (str): Directorio de main.py.
+        env (dict): Variables de entorno del servidor.
+        port (int): Puerto local.
+        payload (dict): Registro de las peticiones a /predict.
+        n_requests (int): Peticiones posteriores a la primera para medir la latencia estable.
+        timeout (float): Segundos máximos de espera a que el servidor esté listo.
+
+    Returns:
+        dict: Tiempos en segundos desde el lanzamiento, latencias en ms y memoria en MB.
+    """
+    base_url = f'http://127.0.0.1:{port}'
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-m', 'uvicorn', 'main:app', '--app-dir', app_dir,
+                                '--port', str(port), '--log-level', 'warning'],
+                               env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        listening = None
+        while True:
+            if time.perf_counter() - start > timeout or process.poll() is not None:
+                raise RuntimeError(f"El servidor no estuvo listo en {timeout} s")
+            try:
+                status = request(base_url + '/ready')
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(POLL_INTERVAL)
+                continue
+            if listening is None:
+                listening = time.perf_counter() - start
+            # Sin /ready (404) el modelo ya se cargó al importar main
+            if status in (200, 404):
+                ready = time.perf_counter() - start
+                break
+            time.sleep(POLL_INTERVAL)
+
+        request_start = time.perf_counter()
+        status = request(base_url + '/predict', payload)
+        first_prediction = time.perf_counter() - start
+        first_latency = time.perf_counter() - request_start
+        if status != 200:
+            raise RuntimeError(f"/predict respondió {status}")
+        latencies = []
+        for _ in range(n_requests):
+            request_start = time.perf_counter()
+            request(base_url + '/predict', payload)
+            latencies.append(time.perf_counter() - request_start)
+        memory = psutil.Process(process.pid).memory_full_info()
+        return {'listening_s': listening, 'ready_s': ready, 'first_prediction_s': first_prediction,
+                'first_latency_ms': first_latency * 1000,
+                'p50_ms': statistics.median(latencies) * 1000 if latencies else float('nan'),
+                'rss_mb': memory.rss / 2 ** 20, 'uss_mb': memory.uss / 2 ** 20}
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def export_revision(rev, tmp_dir):
+    """Extrae diabetes_mlops/ de un commit; models/ apunta al del repositorio (tablas de predicciones)."""
+    archive = subprocess.run(['git', 'archive', rev, 'diabetes_mlops'], cwd=ROOT_DIR,
+                             capture_output=True, check=True).stdout
+    subprocess.run(['tar', '-x', '-C', tmp_dir], input=archive, check=True)
+    os.symlink(os.path.join(ROOT_DIR, 'models'), os.path.join(tmp_dir, 'models'))
+    return os.path.join(tmp_dir, 'diabetes_mlops')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default=Config.MODEL_PATH)
+    parser.add_argument('--rev', default=None, help='Commit de referencia (por ejemplo, HEAD~1)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--timeout', type=float, default=120.0)
+    args = parser.parse_args()
+
+    env = dict(os.environ, MODEL_PATH=os.path.abspath(args.model))
+    payload = make_payloads(1, Config.RANDOM_STATE)[0]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        variants = [('actual', os.path.join(ROOT_DIR, 'diabetes_mlops'))]
+        if args.rev:
+            variants.insert(0, (args.rev, export_revision(args.rev, tmp_dir)))
+
+        print(f"Medianas de {args.repeat} arranques")
+        print(f"{'versión':<10}{'import':>8}{'escucha':>9}{'listo':>8}{'1.ª pred.':>11}"
+              f"{'1.ª lat.':>10}{'p50':>8}{'RSS MB':>8}{'USS MB':>8}")
+        for name, app_dir in variants:
+            runs = []
+            for _ in range(args.repeat):
+                run = cold_start(app_dir, env, args.port, payload, args.requests, args.timeout)
+                run['import_s'] = import_time(app_dir, env)
+                runs.append(run)
+            result = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+            print(f"{name:<10}{result['import_s']:>7.2f}s{result['listening_s']:>8.2f}s"
+                  f"{result['ready_s']:>7.2f}s{result['first_prediction_s']:>10.2f}s"
+                  f"{result['first_latency_ms']:>8.1f}ms{result['p50_ms']:>6.1f}ms"
+                  f"{result['rss_mb']:>8.0f}{result['uss_mb']:>8.0f}")
+
+
+if __name__ == '__main__':
+    main()
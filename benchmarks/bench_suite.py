@@ -0,0 +1,427 @@
+"""Suite de benchmarks de las rutas críticas de datos, entrenamiento e inferencia.
+
+Mide el tiempo (varias repeticiones, al estilo de asv) y el pico de memoria asignada
+(tracemalloc, en una ejecución aparte) de:
+- data.load_data: dataset.load_data.
+- data.validate_data y data.legacy_checks: las validaciones del esquema (validation.py y
+  dataset.test_data_types/test_data_content).
+- features.fit_transform: features.create_pipeline().fit_transform.
+- search.fold.<familia>: un pliegue de GridSearchCV por familia de modelos, con el candidato
+  de Config.ENABLED_PARAMS.
+- predict.predict: modeling.predict.predict con 1, 1.000 y 1.000.000 de filas (--predict-rows).
+- api.predict: latencia de una petición a /predict de main.py con un cliente ASGI en el
+  mismo proceso (httpx), sirviendo un modelo entrenado con cada conjunto de datos.
+- metrics.record_request: costo de la instrumentación de una petición a /predict (etapas,
+  contadores y middleware de metrics.py), que se suma a la latencia de api.predict.
+
+Los casos de datos, entrenamiento y API se repiten con los datos reales y con datos
+sintéticos (synthetic.py, modo 'joint') de los tamaños de --sizes. El pico de memoria
+incluye los arreglos de numpy y pandas, pero no la memoria interna de XGBoost.
+
+Los resultados se guardan en JSON (por defecto en Config.BENCHMARK_RESULTS_DIR/<commit>.json)
+y se comparan con --compare; el proceso termina con código 1 si algún caso empeora más
+que --factor.
+
+Uso:
+    python benchmarks/bench_suite.py --sizes 20000 100000
+    python benchmarks/bench_suite.py --bench 'predict|api' --compare reports/benchmarks/abc1234.json
+    python benchmarks/bench_suite.py --compare reports/benchmarks/abc1234.json reports/benchmarks/def5678.json
+"""
+import argparse
+import asyncio
+from collections import namedtuple
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime, timezone
+from functools import lru_cache, partial
+import json
+import math
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import joblib
+import pandas as pd
+
+from common import ROOT_DIR, Config
+
+FEATURES = Config.NUMERIC_FEATURES + Config.CATEGORICAL_FEATURES
+PACKAGES = ['numpy', 'pandas', 'sklearn', 'category_encoders', 'xgboost', 'fastapi']
+# Duración mínima de cada muestra: las funciones rápidas se repiten varias veces por muestra
+MIN_SAMPLE_TIME = 0.01
+# Por debajo de este pico de memoria (MB) las diferencias no se consideran cambios
+MIN_COMPARED_MEMORY_MB = 1.0
+
+Case = namedtuple('Case', ['name', 'setup'])
+"""
+Caso de la suite: nombre y función sin argumentos que prepara los datos y devuelve la
+función a medir (sólo se ejecuta si el caso está seleccionado).
+"""
+
+
+@contextmanager
+def quiet():
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        yield
+
+
+@lru_cache(maxsize=None)
+def read_dataset(path):
+    return pd.read_csv(path)
+
+
+@lru_cache(maxsize=None)
+def synthetic_dataset(tmp_dir, n_rows):
+    """Escribe (una sola vez) un CSV sintético con la estructura de los datos crudos."""
+    from synthetic import write_synthetic
+
+    return write_synthetic(os.path.join(tmp_dir, f'synthetic_{n_rows}.csv'), n_rows, 'joint')
+
+
+def features_and_labels(path):
+    data = read_dataset(path)
+    return data[FEATURES], data['class'] == 'Positive'
+
+
+def data_cases(label, dataset):
+    from dataset import load_data, test_data_content, test_data_types
+    from validation import validate_data
+
+    def setup_load():
+        path = dataset()
+
+        def run():
+            # load_data lee Config.DATA_PATH en cada llamada
+            previous, Config.DATA_PATH = Config.DATA_PATH, path
+            try:
+                return load_data()
+            finally:
+                Config.DATA_PATH = previous
+        return run
+
+    def setup_validate():
+        data = read_dataset(dataset())
+        return lambda: validate_data(data)
+
+    def setup_legacy():
+        data = read_dataset(dataset())
+        return lambda: (test_data_types(data), test_data_content(data))
+
+    yield Case(f'data.load_data[{label}]', setup_load)
+    yield Case(f'data.validate_data[{label}]', setup_validate)
+    yield Case(f'data.legacy_checks[{label}]', setup_legacy)
+
+
+def training_cases(label, dataset):
+    from sklearn.model_selection import GridSearchCV, StratifiedKFold, train_test_split
+
+    from features import create_pipeline
+    from diabetes_mlops.modeling.search import build_model_pipeline, get_models
+
+    def setup_fit_transform():
+        X, y = features_and_labels(dataset())
+        return lambda: create_pipeline().fit_transform(X, y)
+
+    def setup_fold(model_name):
+        X, y = features_and_labels(dataset())
+        X_train, _, y_train, _ = train_test_split(X, y, test_size=Config.TEST_SIZE,
+                                                  random_state=Config.RANDOM_STATE)
+        # El primer pliegue de los que usa GridSearchCV(cv=Config.CV_FOLDS) en train.py
+        fold = next(StratifiedKFold(Config.CV_FOLDS).split(X_train, y_train))
+        param_grid = {param: [value] for param, value in Config.ENABLED_PARAMS[model_name].items()}
+
+        def run():
+            pipeline = build_model_pipeline(create_pipeline(), get_models()[model_name])
+            search = GridSearchCV(pipeline, param_grid, cv=[fold], refit=False, n_jobs=1)
+            return search.fit(X_train, y_train)
+        return run
+
+    yield Case(f'features.fit_transform[{label}]', setup_fit_transform)
+    for model_name in Config.ENABLED_PARAMS:
+        yield Case(f'search.fold.{model_name}[{label}]', lambda model_name=model_name: setup_fold(model_name))
+
+
+def predict_cases(model_path, n_rows, tmp_dir):
+    def setup():
+        from synthetic import SyntheticGenerator
+        import diabetes_mlops.modeling.predict as predict_module
+
+        # predict() usa el modelo de Config.MODEL_PATH y escribe sus predicciones en output_path
+        Config.MODEL_PATH = model_path
+        predict_module.output_path = os.path.join(tmp_dir, 'predictions.csv')
+        data = SyntheticGenerator('joint').chunk(n_rows, 0)[FEATURES]
+        return lambda: predict_module.predict(data)
+
+    yield Case(f'predict.predict[{n_rows}]', setup)
+
+
+def api_cases(label, dataset, model_name, tmp_dir):
+    def setup():
+        import httpx
+
+        import main
+        from model_loader import ModelLoader
+        from diabetes_mlops.modeling.search import build_model_pipeline, get_models
+        from features import create_pipeline
+
+        X, y = features_and_labels(dataset())
+        pipeline = build_model_pipeline(create_pipeline(), get_models()[model_name])
+        pipeline.set_params(**Config.ENABLED_PARAMS[model_name]).fit(X, y)
+        model_path = os.path.join(tmp_dir, f'api_{label}.pkl')
+        joblib.dump(pipeline, model_path)
+        # Se sustituye el cargador de la API para servir el modelo de este conjunto de datos
+        main.loader = ModelLoader(model_path, prepare=main.prepare_model)
+        main.loader.get()
+
+        row = X.iloc[0]
+        payload = {field: row[column].item() if hasattr(row[column], 'item') else row[column]
+                   for field, column in zip(main.FIELDS, main.COLUMNS)}
+        loop = asyncio.new_event_loop()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url='http://test')
+
+        def run():
+            response = loop.run_until_complete(client.post('/predict', json=payload))
+            if response.status_code != 200:
+                raise RuntimeError(f"/predict respondió {response.status_code}: {response.text}")
+            return response
+        return run
+
+    yield Case(f'api.predict[{label}]', setup)
+
+
+def metrics_cases():
+    def setup():
+        from metrics import API_METRICS, REQUEST_SECONDS, ROWS_TOTAL, MetricsRegistry, StageTimer
+
+        registry = MetricsRegistry(API_METRICS)
+        version = '0' * 32
+
+        # Las mismas llamadas que main.predict y MetricsMiddleware hacen en cada petición
+        def run():
+            start = time.perf_counter()
+            timer = StageTimer(start)
+            for stage in ('parse', 'frame', 'preprocess', 'classify'):
+                timer.lap(stage)
+            registry.record_stages(timer, ('/predict', version))
+            registry.inc(ROWS_TOTAL, ('/predict', version), 1)
+            registry.observe(REQUEST_SECONDS, ('/predict', '200'), time.perf_counter() - start)
+        return run
+
+    yield Case('metrics.record_request', setup)
+
+
+def time_case(func, min_time, max_repeat):
+    """Mide el tiempo de una función sin argumentos.
+
+    La primera llamada es de calentamiento y no se cuenta. Después se toman muestras hasta
+    acumular `min_time` segundos o `max_repeat` muestras (al menos una); si una llamada dura
+    menos de MIN_SAMPLE_TIME, cada muestra es el promedio de varias llamadas.
+
+    Args:
+        func (callable): Función a medir.
+        min_time (float): Tiempo total mínimo de las muestras, en segundos.
+        max_repeat (int): Número máximo de muestras.
+
+    Returns:
+        dict: Llamadas por muestra, número de muestras y mínimo, mediana, media y desviación
+        estándar por llamada, en segundos.
+    """
+    start = time.perf_counter()
+    func()
+    warmup = time.perf_counter() - start
+    number = max(1, math.ceil(MIN_SAMPLE_TIME / warmup)) if warmup > 0 else 1
+    samples = []
+    while not samples or (len(samples) < max_repeat and sum(samples) * number < min_time):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return {
+        'number': number,
+        'repeat': len(samples),
+        'min_s': min(samples),
+        'median_s': statistics.median(samples),
+        'mean_s': statistics.fmean(samples),
+        'stdev_s': statistics.pstdev(samples),
+    }
+
+
+def peak_memory(func):
+    """Pico de memoria asignada durante una llamada, en MB (tracemalloc)."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+
+def git_revision():
+    """Commit actual (abreviado) y si hay cambios sin confirmar en archivos versionados."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', False
+    return commit, bool(status)
+
+
+def machine_info():
+    versions = {}
+    for package in PACKAGES:
+        try:
+            versions[package] = __import__(package).__version__
+        except ImportError:
+            versions[package] = None
+    return {'python': platform.python_version(), 'platform': platform.platform(),
+            'processor': platform.processor(), 'cpus': os.cpu_count(), 'packages': versions}
+
+
+def run_suite(cases, pattern, min_time, max_repeat, memory):
+    """Ejecuta los casos cuyo nombre coincide con `pattern` e imprime cada resultado."""
+    results = {}
+    print(f"{'caso':<48}{'mediana':>12}{'mínimo':>12}{'muestras':>10}{'memoria (MB)':>14}")
+    for case in cases:
+        if not re.search(pattern, case.name):
+            continue
+        try:
+            with quiet():
+                func = case.setup()
+                result = time_case(func, min_time, max_repeat)
+                if memory:
+                    result['peak_memory_mb'] = peak_memory(func)
+        except Exception as e:
+            print(f"{case.name:<48} error: {e}")
+            results[case.name] = {'error': str(e)}
+            continue
+        results[case.name] = result
+        memory_mb = f"{result['peak_memory_mb']:.1f}" if memory else '-'
+        print(f"{case.name:<48}{format_time(result['median_s']):>12}{format_time(result['min_s']):>12}"
+              f"{result['repeat']:>10}{memory_mb:>14}")
+    return results
+
+
+def format_time(seconds):
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds:.2f} s"
+
+
+def compare(base, new, factor):
+    """Compara dos resultados de la suite caso por caso.
+
+    Un caso empeora si la mediana del tiempo o el pico de memoria de `new` supera `factor`
+    veces el de `base`, y mejora si es menor que `base` entre `factor`. Los picos de memoria
+    menores que MIN_COMPARED_MEMORY_MB no se comparan.
+
+    Args:
+        base (dict): Resultado de referencia (JSON de la suite).
+        new (dict): Resultado a comparar.
+        factor (float): Razón a partir de la cual se marca un cambio.
+
+    Returns:
+        int: Número de casos que empeoraron.
+    """
+    print(f"\nComparación {base['commit']} -> {new['commit']} (+ empeora, - mejora, factor {factor})")
+    if base.get('machine') != new.get('machine'):
+        print("Aviso: los resultados se obtuvieron en entornos distintos")
+    print(f"{'caso':<48}{'tiempo':>12}{'razón':>8}{'memoria (MB)':>16}{'razón':>8}")
+    regressions = 0
+    for name in sorted(set(base['benchmarks']) & set(new['benchmarks'])):
+        old, current = base['benchmarks'][name], new['benchmarks'][name]
+        if 'error' in old or 'error' in current:
+            continue
+        marks = []
+        time_ratio = current['median_s'] / old['median_s']
+        marks.append(time_ratio)
+        line = f"{format_time(current['median_s']):>12}{time_ratio:>7.2f}x"
+        if 'peak_memory_mb' in current and old.get('peak_memory_mb', 0) >= MIN_COMPARED_MEMORY_MB:
+            memory_ratio = current['peak_memory_mb'] / old['peak_memory_mb']
+            marks.append(memory_ratio)
+            line += f"{current['peak_memory_mb']:>16.1f}{memory_ratio:>7.2f}x"
+        mark = ' '
+        if any(ratio > factor for ratio in marks):
+            mark = '+'
+            regressions += 1
+        elif any(ratio < 1 / factor for ratio in marks):
+            mark = '-'
+        print(f"{mark} {name:<46}{line}")
+    only_base = set(base['benchmarks']) - set(new['benchmarks'])
+    only_new = set(new['benchmarks']) - set(base['benchmarks'])
+    if only_base or only_new:
+        print(f"{len(only_base)} caso(s) sólo en {base['commit']} y {len(only_new)} sólo en {new['commit']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bench', default='.', help='Expresión regular de los casos a ejecutar')
+    parser.add_argument('--sizes', type=int, nargs='*', default=[20_000],
+                        help='Tamaños de los conjuntos sintéticos, además de los datos reales')
+    parser.add_argument('--predict-rows', type=int, nargs='+', default=[1, 1_000, 1_000_000])
+    parser.add_argument('--model', default=Config.MODEL_PATH, help='Modelo de los casos predict.*')
+    parser.add_argument('--api-model', default='RandomForest', choices=list(Config.ENABLED_PARAMS),
+                        help='Familia del modelo que sirve la API en los casos api.*')
+    parser.add_argument('--min-time', type=float, default=1.0)
+    parser.add_argument('--max-repeat', type=int, default=10)
+    parser.add_argument('--no-memory', action='store_true', help='No medir el pico de memoria')
+    parser.add_argument('--output', default=None,
+                        help='Ruta del JSON (por defecto, Config.BENCHMARK_RESULTS_DIR/<commit>.json)')
+    parser.add_argument('--compare', nargs='+', metavar='JSON',
+                        help='Resultado de referencia; con dos rutas sólo se comparan, sin ejecutar la suite')
+    parser.add_argument('--factor', type=float, default=1.1)
+    args = parser.parse_args()
+
+    if args.compare and len(args.compare) == 2:
+        with open(args.compare[0]) as f_base, open(args.compare[1]) as f_new:
+            sys.exit(1 if compare(json.load(f_base), json.load(f_new), args.factor) else 0)
+
+    commit, dirty = git_revision()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        datasets = {'raw': lambda: Config.DATA_PATH}
+        for n_rows in args.sizes:
+            datasets[f'synthetic_{n_rows}'] = partial(synthetic_dataset, tmp_dir, n_rows)
+        cases = []
+        for label, dataset in datasets.items():
+            cases.extend(data_cases(label, dataset))
+        for label, dataset in datasets.items():
+            cases.extend(training_cases(label, dataset))
+        for n_rows in args.predict_rows:
+            cases.extend(predict_cases(args.model, n_rows, tmp_dir))
+        for label, dataset in datasets.items():
+            cases.extend(api_cases(label, dataset, args.api_model, tmp_dir))
+        cases.extend(metrics_cases())
+        benchmarks = run_suite(cases, args.bench, args.min_time, args.max_repeat, not args.no_memory)
+
+    results = {
+        'commit': commit,
+        'dirty': dirty,
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'machine': machine_info(),
+        'params': {'sizes': args.sizes, 'predict_rows': args.predict_rows, 'api_model': args.api_model,
+                   'min_time': args.min_time, 'max_repeat': args.max_repeat},
+        'benchmarks': benchmarks,
+    }
+    output = args.output or os.path.join(os.path.normpath(Config.BENCHMARK_RESULTS_DIR),
+                                         f"{commit}{'-dirty' if dirty else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResultados guardados en {output}")
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            sys.exit(1 if compare(json.load(f), results, args.factor) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Mide el tiempo que el entrenamiento pasa registrando runs en MLflow.
+
+Compara el registro síncrono de train.py anterior (mlflow.start_run + log_params +
+log_metric + mlflow.sklearn.log_model) con tracking.AsyncTracker:
+- contra un almacenamiento local de MLflow (file:///...), como sustituto del servidor;
+- contra un servidor inalcanzable, en cuyo caso los runs quedan en el directorio local y
+  después se reenvían al almacenamiento local con replay_spool.
+
+En ambos casos se verifica que los runs subidos contengan lo registrado (test_uploaded_run).
+
+Uso:
+    python benchmarks/bench_tracking.py --runs 3
+"""
+import argparse
+import os
+import tempfile
+import time
+import warnings
+
+os.environ.setdefault('MLFLOW_ALLOW_FILE_STORE', 'true')
+
+import mlflow  # noqa: E402
+import mlflow.sklearn  # noqa: E402
+from mlflow.tracking import MlflowClient  # noqa: E402
+from sklearn.linear_model import LogisticRegression  # noqa: E402
+from sklearn.pipeline import Pipeline  # noqa: E402
+
+from common import Config  # noqa: E402
+from dataset import load_processed_data, preprocess_data  # noqa: E402
+from features import create_pipeline  # noqa: E402
+from tracking import AsyncTracker, replay_spool, test_uploaded_run  # noqa: E402
+
+UNREACHABLE_URI = 'http://127.0.0.1:9'
+
+
+def log_run(run, model, index):
+    run.log_params({'classifier__C': 1, 'classifier__solver': 'lbfgs', 'run': index})
+    run.log_metric('accuracy', 0.9)
+    run.log_metric('f1_score', 0.95)
+    run.log_model(model, 'model')
+
+
+def sync_logging(uri, model, n_runs):
+    mlflow.set_tracking_uri(uri)
+    mlflow.set_experiment(Config.MLFLOW_EXPERIMENT)
+    start = time.perf_counter()
+    for i in range(n_runs):
+        with mlflow.start_run(run_name=f'sync_{i}'):
+            mlflow.log_params({'classifier__C': 1, 'classifier__solver': 'lbfgs', 'run': i})
+            mlflow.log_metric('accuracy', 0.9)
+            mlflow.log_metric('f1_score', 0.95)
+            mlflow.sklearn.log_model(
+                model, 'model', serialization_format=mlflow.sklearn.SERIALIZATION_FORMAT_CLOUDPICKLE)
+    return time.perf_counter() - start
+
+
+def async_logging(uri, spool_dir, model, n_runs):
+    """Devuelve el tiempo en el hilo de entrenamiento, el tiempo de close() y los runs registrados."""
+    tracker = AsyncTracker(uri, Config.MLFLOW_EXPERIMENT, spool_dir)
+    records = []
+    start = time.perf_counter()
+    for i in range(n_runs):
+        with tracker.start_run(f'async_{i}') as run:
+            log_run(run, model, i)
+        records.append(run)
+    training_time = time.perf_counter() - start
+    start = time.perf_counter()
+    pending = tracker.close()
+    return training_time, time.perf_counter() - start, records, tracker.uploaded, pending
+
+
+def check_runs(uri, run_ids, records):
+    client = MlflowClient(uri)
+    for run_id, record in zip(run_ids, records):
+        test_uploaded_run(client, run_id, record)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore')
+
+    data = preprocess_data(load_processed_data())
+    model = Pipeline([('preprocessor', create_pipeline()), ('classifier', LogisticRegression())])
+    model.fit(data.drop('class', axis=1), data['class'])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        uri = 'file://' + os.path.join(tmp, 'mlruns')
+        sync_time = sync_logging(uri, model, args.runs)
+        training_time, close_time, records, run_ids, pending = async_logging(
+            uri, os.path.join(tmp, 'spool_file'), model, args.runs)
+        check_runs(uri, run_ids, records)
+        print(f"almacenamiento local: síncrono {sync_time:.2f} s; asíncrono {training_time:.2f} s "
+              f"en el entrenamiento + {close_time:.2f} s en close() ({pending} pendientes)")
+
+        spool_dir = os.path.join(tmp, 'spool_down')
+        training_time, close_time, records, _, pending = async_logging(
+            UNREACHABLE_URI, spool_dir, model, args.runs)
+        print(f"servidor inalcanzable: asíncrono {training_time:.2f} s en el entrenamiento + "
+              f"{close_time:.2f} s en close() ({pending} pendientes)")
+        run_ids = replay_spool(uri, spool_dir=spool_dir)
+        check_runs(uri, run_ids, records)
+        print(f"reenvío: {len(run_ids)} run(s) subidos y verificados")
+
+
+if __name__ == '__main__':
+    main()
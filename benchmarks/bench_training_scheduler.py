@@ -0,0 +1,98 @@
+"""Compara el entrenamiento secuencial y el planificador paralelo de modeling/scheduler.py.
+
+Ajusta la búsqueda de hiperparámetros de las tres familias de modelos una tras otra y
+después a la vez con el presupuesto de CPUs indicado, muestra el tiempo de reloj y la
+utilización de CPU de cada familia y comprueba que los resultados sean idénticos. Antes
+comprueba que XGBNativeSearchCV funcione dentro del planificador con varios trabajos
+(check_native_search).
+
+Uso:
+    python benchmarks/bench_training_scheduler.py --cpus 8
+"""
+import argparse
+import os
+import time
+import warnings
+
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+from common import Config
+from dataset import load_processed_data, preprocess_data
+from features import create_pipeline
+from diabetes_mlops.modeling.scheduler import allocate_cpus, fit_families, format_report
+from diabetes_mlops.modeling.search import get_models, preprocessing_cache
+
+
+def run(X_train, y_train, cpus, parallel, strategy):
+    preprocessor = create_pipeline()
+    preprocessor.set_output(transform='pandas')
+    start = time.perf_counter()
+    with preprocessing_cache(cache_dir=None) as cache_dir:
+        results = fit_families(get_models(), preprocessor, X_train, y_train, strategy, cache_dir,
+                               total_cpus=cpus, parallel=parallel)
+    return results, time.perf_counter() - start
+
+
+def check_native_search(X_train, y_train, cpus=8):
+    """
+    Ajusta XGBNativeSearchCV con el planificador (parallel_config con backend='loky') y más
+    de un trabajo, sin la caché de resultados de la CV para que se entrenen los pliegues.
+    """
+    name = 'XGBClassifier'
+    allocation = allocate_cpus(list(get_models()), cpus)[name]
+    assert allocation.outer_jobs > 1, f"{name} debe recibir más de un trabajo ({allocation})"
+    preprocessor = create_pipeline()
+    preprocessor.set_output(transform='pandas')
+    # El proceso de la familia importa Config de nuevo y lee CV_RESULTS_DIR vacío (sin caché)
+    previous = os.environ.get('CV_RESULTS_DIR')
+    os.environ['CV_RESULTS_DIR'] = ''
+    try:
+        results = fit_families({name: get_models()[name]}, preprocessor, X_train, y_train,
+                               'grid', None, total_cpus=allocation.outer_jobs, parallel=True)
+    finally:
+        if previous is None:
+            del os.environ['CV_RESULTS_DIR']
+        else:
+            os.environ['CV_RESULTS_DIR'] = previous
+    result = results[name]
+    assert not isinstance(result, Exception), f"XGBNativeSearchCV falló con el planificador: {result!r}"
+    assert result.search.n_fits_ > 0, "La búsqueda no entrenó ningún pliegue"
+    print(f"XGBNativeSearchCV con {allocation.outer_jobs} trabajos: {result.search.n_fits_} ajustes, "
+          f"{result.wall_time:.1f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cpus', type=int, default=Config.TRAINING_CPUS)
+    parser.add_argument('--strategy', default=Config.SEARCH_STRATEGY)
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore')
+
+    data = preprocess_data(load_processed_data())
+    X = data.drop('class', axis=1)
+    y = data['class']
+    X_train, _, y_train, _ = train_test_split(X, y, test_size=Config.TEST_SIZE,
+                                              random_state=Config.RANDOM_STATE)
+
+    check_native_search(X_train, y_train)
+    sequential, sequential_time = run(X_train, y_train, args.cpus, False, args.strategy)
+    print(f"Secuencial ({args.cpus} CPUs): {sequential_time:.1f} s")
+    print(format_report(sequential))
+    parallel, parallel_time = run(X_train, y_train, args.cpus, True, args.strategy)
+    print(f"\nPlanificador paralelo ({args.cpus} CPUs): {parallel_time:.1f} s")
+    print(format_report(parallel))
+
+    for name in sequential:
+        for results in (sequential, parallel):
+            assert not isinstance(results[name], Exception), f"{name} falló: {results[name]!r}"
+        assert sequential[name].search.best_params_ == parallel[name].search.best_params_, \
+            f"Los mejores parámetros de {name} difieren"
+        assert np.array_equal(sequential[name].search.cv_results_['mean_test_score'],
+                              parallel[name].search.cv_results_['mean_test_score']), \
+            f"Los puntajes de {name} difieren"
+    print(f"\nResultados idénticos; aceleración: {sequential_time / parallel_time:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Compara el costo de la validación de datos contra Config.SCHEMA.
+
+- Pruebas anteriores (dataset.test_data_types + dataset.test_data_content) sobre un
+  DataFrame completo en memoria.
+- Motor vectorizado (validation.validate_data) sobre el mismo DataFrame.
+- Motor vectorizado por bloques (streaming), generando los bloques al vuelo para mantener
+  la memoria acotada a un bloque.
+
+Los datos se generan remuestreando los datos crudos reales.
+
+Uso:
+    python benchmarks/bench_validation.py --rows 1000000 10000000
+"""
+import argparse
+import contextlib
+import io
+import time
+
+import numpy as np
+
+from common import Config
+from dataset import load_data, test_data_content, test_data_types
+from validation import validate_chunk, validate_data
+
+
+def resample(reference, n_rows, rng):
+    return reference.iloc[rng.integers(0, len(reference), size=n_rows)].reset_index(drop=True)
+
+
+def generate_chunks(reference, n_rows, chunksize, seed):
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_rows, chunksize):
+        chunk = resample(reference, min(chunksize, n_rows - start), rng)
+        chunk.index += start
+        yield chunk
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000_000, 10_000_000])
+    parser.add_argument('--chunksize', type=int, default=Config.VALIDATION_CHUNKSIZE)
+    parser.add_argument('--in-memory-limit', type=int, default=2_000_000,
+                        help='Tamaño máximo para las pruebas sobre el DataFrame completo')
+    args = parser.parse_args()
+
+    reference = load_data()
+    print(f"{'filas':>12}{'modo':>28}{'segundos':>10}{'Mfilas/s':>10}")
+    for n_rows in args.rows:
+        results = []
+        if n_rows <= args.in_memory_limit:
+            data = resample(reference, n_rows, np.random.default_rng(Config.RANDOM_STATE))
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                test_data_types(data)
+                test_data_content(data)
+            results.append(('pruebas anteriores', time.perf_counter() - start))
+            start = time.perf_counter()
+            validate_data(data)
+            results.append(('motor vectorizado', time.perf_counter() - start))
+            del data
+
+        # Sólo se mide la validación, no la generación de los bloques
+        elapsed = 0.0
+        chunks = generate_chunks(reference, n_rows, args.chunksize, Config.RANDOM_STATE)
+        report = None
+        for chunk in chunks:
+            start = time.perf_counter()
+            report = validate_chunk(chunk, report)
+            elapsed += time.perf_counter() - start
+        assert report.ok and report.n_rows == n_rows
+        results.append((f'por bloques de {args.chunksize}', elapsed))
+
+        for mode, seconds in results:
+            print(f"{n_rows:>12}{mode:>28}{seconds:>10.2f}{n_rows / seconds / 1e6:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,32 @@
+"""Utilidades compartidas por los scripts de benchmark del proyecto."""
+import os
+import sys
+
+import numpy as np
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'diabetes_mlops'))
+# Para los módulos de diabetes_mlops/modeling, que se importan como paquete
+sys.path.insert(1, ROOT_DIR)
+
+from config import Config  # noqa: E402,F401
+
+
+def summarize_latencies(latencies, wall_time):
+    """Resume una lista de latencias individuales.
+
+    Args:
+        latencies (list): Latencias de cada petición, en segundos.
+        wall_time (float): Tiempo total de la prueba, en segundos.
+
+    Returns:
+        dict: Número de peticiones, p50/p95/p99 en milisegundos y throughput en peticiones/s.
+    """
+    latencies_ms = np.asarray(latencies) * 1000.0
+    return {
+        'requests': len(latencies_ms),
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p95_ms': float(np.percentile(latencies_ms, 95)),
+        'p99_ms': float(np.percentile(latencies_ms, 99)),
+        'throughput_rps': len(latencies_ms) / wall_time if wall_time > 0 else float('nan'),
+    }
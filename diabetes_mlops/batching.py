@@ -0,0 +1,122 @@
+"""Micro-batching de peticiones concurrentes de inferencia.
+
+Agrupa las peticiones individuales que llegan al mismo tiempo (por ejemplo, desde el
+threadpool de FastAPI) y las evalúa con una sola llamada vectorizada al modelo.
+"""
+from concurrent.futures import Future
+import queue
+import threading
+import time
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Encola registros individuales y los evalúa en lotes con una sola llamada a `predict_fn`.
+
+    Un hilo de fondo toma el primer registro disponible y espera hasta `window_ms`
+    milisegundos, o hasta reunir `max_batch_size` registros, antes de evaluar el lote.
+    Cada llamador recibe únicamente el resultado de su propio registro.
+
+    Parameters:
+    predict_fn (callable): Función que recibe una lista de registros y devuelve una lista
+        de resultados del mismo tamaño y en el mismo orden.
+    max_batch_size (int): Número máximo de registros por lote.
+    window_ms (float): Tiempo máximo de espera para completar un lote, en milisegundos.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=64, window_ms=2):
+        self._predict_fn = predict_fn
+        self._max_batch_size = max_batch_size
+        self._window = window_ms / 1000.0
+        self._queue = queue.Queue()
+        # Protege el cierre: ningún registro se encola después de la marca de fin
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, record):
+        """
+        Encola un registro para su evaluación.
+
+        Parameters:
+        record: Registro a evaluar.
+
+        Returns:
+        Future: Un futuro que se resuelve con el resultado del registro.
+
+        Raises:
+        RuntimeError: Si el micro-batcher ya se cerró.
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("El micro-batcher está cerrado")
+            self._queue.put((record, future))
+        return future
+
+    def predict(self, record, timeout=None):
+        """
+        Evalúa un registro bloqueando hasta que su lote haya sido procesado.
+
+        Parameters:
+        record: Registro a evaluar.
+        timeout (float): Tiempo máximo de espera en segundos (None para esperar indefinidamente).
+
+        Returns:
+        El resultado de `predict_fn` correspondiente al registro.
+
+        Raises:
+        RuntimeError: Si el micro-batcher ya se cerró.
+        """
+        return self.submit(record).result(timeout=timeout)
+
+    def close(self):
+        """Detiene el hilo de fondo después de procesar los registros pendientes."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            stop = False
+            deadline = time.perf_counter() + self._window
+            while len(batch) < self._max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    if remaining > 0:
+                        item = self._queue.get(timeout=remaining)
+                    else:
+                        item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+            if stop:
+                return
+
+    def _flush(self, batch):
+        records = [record for record, _ in batch]
+        try:
+            results = list(self._predict_fn(records))
+            if len(results) != len(batch):
+                # Sin un resultado por registro no se puede saber a quién corresponde cada uno
+                raise ValueError(f"predict_fn devolvió {len(results)} resultados para {len(batch)} registros")
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
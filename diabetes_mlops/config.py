@@ -10,6 +10,8 @@ class Config:
     Atributos:
         BASE_DIR (str): Ruta base del directorio del archivo actual.
         DATA_PATH (str): Ruta al archivo CSV que contiene los datos de diabetes.
+        PROCESSED_DATA_PATH (str): Ruta al CSV de datos procesados.
+        PROCESSED_PARQUET_PATH (str): Ruta al Parquet de datos procesados con tipos compactos.
         MODEL_PATH (str): Ruta al archivo del modelo entrenado.
         MLFLOW_URI (str): URI del servidor MLflow para el seguimiento de experimentos.
         RANDOM_STATE (int): Semilla utilizada para la aleatorización.
@@ -17,6 +19,8 @@ class Config:
         CV_FOLDS (int): Número de pliegues para la validación cruzada.
         NUMERIC_FEATURES (list): Lista de características numéricas.
         CATEGORICAL_FEATURES (list): Lista de características categóricas.
+        MAX_BATCH_SIZE (int): Número máximo de registros por llamada a /predict/batch.
+        MICRO_BATCHING (bool): Indica si /predict agrupa las peticiones concurrentes en micro-lotes.
     """
     # Rutas relativas
     
@@ -25,27 +29,111 @@ class Config:
     Ruta base del directorio del archivo actual.
     """
 
-    DATA_PATH = os.path.join(BASE_DIR, '..', 'data', 'raw', 'diabetes_data_upload.csv')
+    DATA_PATH = os.environ.get('DATA_PATH', os.path.join(BASE_DIR, '..', 'data', 'raw', 'diabetes_data_upload.csv'))
     """
     Ruta al archivo CSV que contiene los datos de diabetes.
 
     El archivo se espera que esté ubicado en el directorio 'data/raw' 
-    en relación con el directorio base.
+    en relación con el directorio base. Se puede sobrescribir con la variable de
+    entorno DATA_PATH (por ejemplo, con datos generados por synthetic.py).
     """
 
-    MODEL_PATH = os.path.join(BASE_DIR, '..', 'models', 'trained_model.pkl')
+    PROCESSED_DATA_PATH = os.path.join(BASE_DIR, '..', 'data', 'processed', 'diabetes_data_upload.csv')
+    PROCESSED_PARQUET_PATH = os.path.join(BASE_DIR, '..', 'data', 'processed', 'diabetes_data_upload.parquet')
+    """
+    Rutas de los datos procesados en formato CSV y Parquet (tipos compactos).
+    """
+
+    PROCESSED_PACKED_PATH = os.path.join(BASE_DIR, '..', 'data', 'processed', 'diabetes_data_upload.npy')
+    """
+    Ruta de los datos procesados empaquetados (edad + máscara de bits, ver packing.py).
+    """
+
+    PROCESSED_FORMATS = ['csv', 'parquet']
+    """
+    Formatos que escribe la etapa de preprocesamiento ('csv', 'parquet' y/o 'packed').
+    Los lectores usan Parquet cuando existe.
+    """
+
+    PREPROCESS_CHUNK_ROWS = 100_000
+    """
+    Filas de cada bloque del archivo crudo en el preprocesamiento (incremental.py). El Parquet
+    procesado es un directorio con un archivo por bloque.
+    """
+
+    PREPROCESS_MANIFEST_PATH = os.path.join(BASE_DIR, '..', 'data', 'processed', 'manifest.json')
+    """
+    Manifiesto de los bloques del archivo crudo ya procesados (hash md5, filas y tamaño de las
+    salidas), usado por `dataset.py --incremental`.
+    """
+
+    MODEL_PATH = os.path.abspath(os.environ.get('MODEL_PATH',
+                                                os.path.join(BASE_DIR, '..', 'models', 'trained_model.pkl')))
     """
     Ruta al archivo del modelo entrenado.
 
     El archivo se espera que esté ubicado en el directorio 'models' 
-    en relación con el directorio base.
+    en relación con el directorio base. Se puede sobrescribir con la
+    variable de entorno MODEL_PATH (por ejemplo, dentro del contenedor de la API).
+    La ruta se resuelve una sola vez, de modo que train.py la guarda y la API, predict.py y el
+    reentrenamiento incremental la leen en el mismo archivo.
+    """
+
+    MODEL_RELOAD_INTERVAL = 5
+    """
+    Segundos entre comprobaciones de cambios en el archivo del modelo, en el hilo de fondo de la API.
     """
 
-    MLFLOW_URI = 'http://127.0.0.1:5000'
+    MODEL_MMAP_MODE = os.environ.get('MODEL_MMAP_MODE', 'r') or None
+    """
+    Modo de joblib.load(mmap_mode=...) con el que model_loader.ModelLoader carga el modelo:
+    los arreglos de NumPy del pickle se leen del archivo con memoria mapeada en lugar de
+    copiarse (los árboles de scikit-learn se copian igualmente al deserializarse). El archivo
+    debe reemplazarse con model_loader.save_model y no sobrescribirse en el mismo lugar.
+    Con la variable de entorno MODEL_MMAP_MODE vacía se desactiva.
+    """
+
+    LOOKUP_TABLE_DIR = os.path.join(BASE_DIR, '..', 'models', 'lookup')
+    """
+    Directorio de las tablas precalculadas de predicciones (una por versión del modelo).
+    """
+
+    BUILD_LOOKUP_TABLE = False
+    USE_LOOKUP_TABLE = True
+    LOOKUP_AGES_PER_BATCH = 4
+    """
+    Construir la tabla al guardar el mejor modelo en train.py, usarla en main.py y predict.py
+    cuando existe para la versión vigente, y número de edades evaluadas por lote al construirla.
+    """
+
+    MLFLOW_URI = os.environ.get('MLFLOW_TRACKING_URI', 'http://127.0.0.1:5000')
     """
     URI del servidor MLflow para el seguimiento de experimentos.
 
-    Se utiliza para registrar parámetros, métricas y modelos.
+    Se utiliza para registrar parámetros, métricas y modelos. Se puede sobrescribir con la
+    variable de entorno MLFLOW_TRACKING_URI (por ejemplo, file:///ruta/mlruns).
+    """
+
+    MLFLOW_EXPERIMENT = 'Diabetes Prediction'
+    """
+    Nombre del experimento de MLflow en el que se registran los entrenamientos.
+    """
+
+    TRACKING_SPOOL_DIR = os.path.join(BASE_DIR, '..', 'mlflow_spool')
+    """
+    Directorio local de los runs pendientes de subir a MLflow (ver tracking.py).
+    """
+
+    TRACKING_FLUSH_TIMEOUT = 30
+    """
+    Segundos máximos que train.py espera al final para subir los runs; los que falten
+    quedan en TRACKING_SPOOL_DIR.
+    """
+
+    TRACKING_HTTP_RETRIES = 2
+    TRACKING_HTTP_TIMEOUT = 10
+    """
+    Reintentos y tiempo de espera (s) de cada petición HTTP al servidor de MLflow.
     """
 
     # Parámetros del modelo
@@ -53,6 +141,110 @@ class Config:
     TEST_SIZE = 0.2
     CV_FOLDS = 5
 
+    SEARCH_STRATEGY = 'grid'
+    """
+    Estrategia de búsqueda de hiperparámetros de train.py: 'grid' (exhaustiva), 'halving'
+    (successive halving) o 'random' (aleatoria con presupuesto y parada temprana).
+    Ver modeling/search.py.
+    """
+
+    HALVING_RESOURCE = 'n_samples'
+    HALVING_FACTOR = 3
+    """
+    Recurso de successive halving ('n_samples' o 'n_estimators'; los modelos sin n_estimators
+    usan filas) y factor de eliminación de candidatos entre iteraciones.
+    """
+
+    RANDOM_SEARCH_BUDGET = 20
+    RANDOM_SEARCH_PATIENCE = 8
+    RANDOM_SEARCH_TOL = 1e-3
+    """
+    Número máximo de candidatos de la búsqueda aleatoria, candidatos consecutivos sin mejora
+    antes de detenerla y mejora mínima del puntaje de validación cruzada.
+    """
+
+    PARALLEL_TRAINING = True
+    TRAINING_CPUS = os.cpu_count() or 1
+    """
+    Entrena las familias de modelos a la vez (modeling/scheduler.py) y presupuesto total de CPUs.
+    """
+
+    TRAINING_CPU_WEIGHTS = {'LogisticRegression': 1, 'RandomForest': 4, 'XGBClassifier': 2}
+    """
+    Peso relativo del costo de cada familia para repartir el presupuesto de CPUs.
+    """
+
+    TRAINING_INNER_THREADS = {'RandomForest': 1, 'XGBClassifier': 1}
+    """
+    Hilos internos de cada ajuste (n_jobs del estimador). Con datasets pequeños es más eficiente
+    paralelizar los ajustes de la validación cruzada que los árboles de un mismo ajuste.
+    """
+
+    CACHE_PREPROCESSING = True
+    PREPROCESSING_CACHE_DIR = None
+    """
+    Memoiza el preprocesamiento de cada pliegue durante la búsqueda de hiperparámetros
+    (modeling/search.py) y directorio de la caché (None para un directorio temporal por entrenamiento).
+    """
+
+    XGB_SEARCH_ENGINE = 'native'
+    XGB_TREE_METHOD = 'hist'
+    XGB_EARLY_STOPPING_ROUNDS = 20
+    """
+    Motor de la búsqueda 'grid' de XGBClassifier: 'native' (modeling/xgb_search.py, matrices
+    compartidas por pliegue y n_estimators con parada temprana) o 'sklearn' (GridSearchCV).
+    Método de construcción de los árboles y rondas sin mejora antes de la parada temprana.
+    """
+
+    CV_RESULTS_DIR = os.environ.get('CV_RESULTS_DIR', os.path.join(BASE_DIR, '..', 'cv_cache')) or None
+    """
+    Directorio de los puntajes por pliegue de la validación cruzada, reutilizados entre
+    entrenamientos (modeling/search.py, CVResultsStore): un candidato ya evaluado con los mismos
+    datos, preprocesamiento, modelo, CV_FOLDS y RANDOM_STATE no se vuelve a ajustar. Con la
+    variable de entorno CV_RESULTS_DIR vacía se desactiva.
+    """
+
+    WARM_START = os.environ.get('WARM_START', '0') == '1'
+    """
+    Reentrenamiento incremental en train.py (también con --warm-start): cada familia parte del
+    modelo anterior (último run de MLflow o Config.MODEL_PATH) en lugar de repetir la búsqueda
+    de hiperparámetros. Ver modeling/warm_start.py.
+    """
+
+    WARM_START_F1_TOLERANCE = 0.01
+    """
+    Caída máxima del f1 de validación respecto del modelo anterior; si el modelo reentrenado
+    cae más, la familia vuelve a la búsqueda completa.
+    """
+
+    WARM_START_VALIDATION_SIZE = 0.2
+    """
+    Proporción del conjunto de entrenamiento reservada para decidir entre el modelo reentrenado
+    de forma incremental y la búsqueda completa; el conjunto de prueba sólo se usa en el reporte.
+    """
+
+    WARM_START_EXTRA_ESTIMATORS = {'RandomForest': 50, 'XGBClassifier': 50}
+    """
+    Árboles que se agregan en el reentrenamiento incremental (RandomForest con warm_start y
+    rondas de boosting adicionales de XGBoost).
+    """
+
+    WARM_START_MAX_ESTIMATORS = {'RandomForest': 300, 'XGBClassifier': 300}
+    """
+    Máximo de árboles (RandomForest) o rondas de boosting (XGBoost) tras un reentrenamiento
+    incremental. Al alcanzarlo, RandomForest reemplaza sus árboles más antiguos por los nuevos
+    (ventana de árboles) y XGBoost vuelve a la búsqueda completa.
+    """
+
+    CATEGORICAL_ENCODER = os.environ.get('CATEGORICAL_ENCODER', 'binary')
+    """
+    Codificador de las características categóricas en features.create_pipeline: 'binary'
+    (BinaryEncoder de category_encoders, dos columnas por característica; por defecto) o
+    'schema' (encoders.SchemaBinaryEncoder, una columna 0/1 por característica a partir de las
+    opciones de SCHEMA). A diferencia de BinaryEncoder, que codifica los valores desconocidos
+    o faltantes, SchemaBinaryEncoder los rechaza con un error.
+    """
+
     # Columnas de características
     NUMERIC_FEATURES = ['Age']
     CATEGORICAL_FEATURES = [
@@ -63,6 +255,108 @@ class Config:
     ]
     RESULT_FEATURE = ['class']
 
+    # Parámetros del servicio de inferencia
+    MAX_BATCH_SIZE = 5000
+    """
+    Número máximo de registros aceptados por una llamada a /predict/batch.
+    """
+
+    FAST_INFERENCE = True
+    """
+    Usa la ruta rápida de inferencia (inference.CompiledPipeline) en lugar del pipeline con pandas.
+    """
+
+    WARMUP_ROWS = 64
+    """
+    Registros de la predicción de calentamiento que main.py ejecuta con cada versión del modelo
+    antes de publicarla y de responder /ready (0 para no ejecutarla).
+    """
+
+    SERVING_WORKERS = int(os.environ.get('SERVING_WORKERS', os.cpu_count() or 1))
+    SERVING_WORKER_THREADS = 1
+    """
+    Workers de serve.py (variable de entorno SERVING_WORKERS) e hilos de BLAS/OpenMP de
+    cada worker, para no sobresuscribir las CPUs con varios workers.
+    """
+
+    METRICS_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                       0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+    """
+    Límites superiores (en segundos) de los histogramas de latencia de metrics.py, expuestos
+    en /metrics y usados en el resumen de predict.py.
+    """
+
+    MICRO_BATCHING = os.environ.get('MICRO_BATCHING', '0') == '1'
+    """
+    Activa el micro-batching de las llamadas concurrentes a /predict (variable de entorno MICRO_BATCHING=1).
+    """
+
+    MICRO_BATCH_WINDOW_MS = 2
+    MICRO_BATCH_MAX_SIZE = 64
+    """
+    Tiempo máximo de espera (ms) y número máximo de registros de cada micro-lote.
+    """
+
+    # Parámetros de la predicción por lotes en modo streaming (modeling/predict.py --stream)
+    PREDICT_CHUNKSIZE = 100_000
+    """
+    Número de filas leídas y evaluadas por bloque.
+    """
+
+    PREDICT_WORKERS = os.cpu_count() or 1
+    """
+    Número de procesos que evalúan bloques en paralelo, cada uno con el modelo precargado.
+    """
+
+    # Parámetros de la validación de datos (validation.py)
+    VALIDATION_CHUNKSIZE = 1_000_000
+    """
+    Número de filas por bloque al validar un archivo en streaming.
+    """
+
+    VALIDATION_MAX_SAMPLES = 10
+    """
+    Número máximo de índices de fila de ejemplo guardados por columna en el reporte.
+    """
+
+    VALIDATION_REPORT_PATH = os.path.join(BASE_DIR, '..', 'reports', 'validation.json')
+    """
+    Ruta del reporte de validación generado por la etapa de preprocesamiento.
+    """
+
+    # Parámetros del generador de datos sintéticos (synthetic.py)
+    SYNTHETIC_CHUNKSIZE = 1_000_000
+    """
+    Número de filas generadas y escritas por bloque.
+    """
+
+    SYNTHETIC_DATA_DIR = os.path.join(BASE_DIR, '..', 'data', 'interim')
+    """
+    Directorio por defecto de los datos sintéticos.
+    """
+
+    BENCHMARK_RESULTS_DIR = os.path.join(BASE_DIR, '..', 'reports', 'benchmarks')
+    """
+    Directorio de los resultados en JSON de benchmarks/bench_suite.py, uno por commit.
+    """
+
+    PROFILE_STAGES = os.environ.get('PROFILE_STAGES', '')
+    """
+    Perfilado de las etapas de dvc.yaml (profiling.py): 'cpu' (cProfile), 'memory'
+    (tracemalloc), 'all' o '1' (ambos); vacío o '0' lo desactiva. Cada script también
+    acepta --profile.
+    """
+
+    PROFILE_DIR = os.path.join(BASE_DIR, '..', 'reports', 'profiles')
+    """
+    Directorio de los perfiles de cada etapa (<etapa>.prof, <etapa>.txt y <etapa>.json).
+    """
+
+    PROFILE_TOP = 25
+    """
+    Número de funciones y de líneas de asignación de memoria incluidas en los reportes de perfilado.
+    """
+
     # Parámetros para las pruebas
     DTYPE = 'dtype'
     INT_DTYPE = 'int64'
@@ -1,8 +1,16 @@
+import argparse
+import shutil
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+import numpy as np
 import pandas as pd
 from config import Config
+from packing import pack_records, to_structured, unpack_records
+from profiling import add_profile_argument, profile_stage
+
+# Nombre de cada archivo del directorio Parquet procesado, uno por bloque del archivo crudo
+PARQUET_PART = 'part-{:05d}.parquet'
 
 def load_data():
     """Carga el dataset desde la ruta especificada en config.
@@ -28,26 +36,185 @@ def preprocess_data(data):
         pd.DataFrame: El DataFrame procesado con las transformaciones aplicadas.
     """
     # data['Gender'] = data['Gender'] == 'Male'
-    data['class'] = data['class'] == 'Positive'
+    if data['class'].dtype != bool:
+        data['class'] = data['class'] == 'Positive'
     
     # for column in data.columns[2:-1]:
     #     data[column] = data[column] == 'Yes'
     
     return data
 
-def save_processed_data(data):
-    """Guarda el dataset procesado en formato CSV en la ruta especificada.
+def save_processed_data(data, formats=Config.PROCESSED_FORMATS):
+    """Guarda el dataset procesado en los formatos indicados.
+
+    - 'csv': texto en Config.PROCESSED_DATA_PATH, con los valores originales.
+    - 'parquet': columnar en el directorio Config.PROCESSED_PARQUET_PATH, con los tipos de
+      processed_dtypes() y un archivo por cada Config.PREPROCESS_CHUNK_ROWS filas (la misma
+      división que el preprocesamiento incremental, ver incremental.py).
+    - 'packed': arreglo .npy en Config.PROCESSED_PACKED_PATH, con edad y máscara de bits
+      (4 bytes por registro, ver packing.py).
 
     Args:
         data (pd.DataFrame): El DataFrame que contiene los datos procesados.
+        formats (list): Formatos a escribir.
 
     Returns:
         None: Imprime un mensaje indicando que los datos se han guardado correctamente.
     """
+    if 'csv' in formats:
+        processed_path = Config.PROCESSED_DATA_PATH
+        data.to_csv(processed_path, index=False)
+        print(f"Datos procesados guardados correctamente en {processed_path}")
+    if 'parquet' in formats:
+        processed_path = Config.PROCESSED_PARQUET_PATH
+        remove_output(processed_path)
+        for index, start in enumerate(range(0, len(data), Config.PREPROCESS_CHUNK_ROWS)):
+            write_parquet_part(data.iloc[start:start + Config.PREPROCESS_CHUNK_ROWS], processed_path, index)
+        print(f"Datos procesados guardados correctamente en {processed_path}")
+    if 'packed' in formats:
+        processed_path = Config.PROCESSED_PACKED_PATH
+        np.save(processed_path, to_structured(pack_records(data)))
+        print(f"Datos procesados guardados correctamente en {processed_path}")
+
+def write_parquet_part(data, path, index):
+    """Escribe un bloque de datos procesados como el archivo número `index` del directorio Parquet `path`."""
+    os.makedirs(path, exist_ok=True)
+    to_processed_dtypes(data).to_parquet(os.path.join(path, PARQUET_PART.format(index)), index=False)
+
+def parquet_files(path):
+    """Archivos de un Parquet: el propio archivo o los archivos de un directorio, en orden."""
+    if os.path.isdir(path):
+        return [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith('.parquet')]
+    return [path]
+
+def remove_output(path):
+    """Elimina un archivo o directorio de salida si existe."""
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+def processed_dtypes():
+    """Tipos de dato compactos de cada columna, derivados de Config.SCHEMA.
+
+    - Numéricas: el entero sin signo más pequeño que contiene el rango (uint8 para Age).
+    - Categóricas: pd.CategoricalDtype con las opciones del esquema.
+    - 'class': bool (True si es 'Positive').
+
+    Returns:
+        dict: Diccionario columna -> tipo de dato.
+    """
+    dtypes = {}
+    for column in Config.NUMERIC_FEATURES:
+        node = Config.SCHEMA[column][Config.RANGE]
+        if node[Config.MIN] >= 0:
+            dtypes[column] = np.min_scalar_type(node[Config.MAX]).name
+        else:
+            dtypes[column] = np.result_type(np.min_scalar_type(node[Config.MIN]),
+                                            np.min_scalar_type(node[Config.MAX])).name
+    for column in Config.CATEGORICAL_FEATURES:
+        dtypes[column] = pd.CategoricalDtype(Config.SCHEMA[column][Config.OPTIONS])
+    for column in Config.RESULT_FEATURE:
+        dtypes[column] = 'bool'
+    return dtypes
+
+def to_processed_dtypes(data):
+    """Convierte las columnas del dataset a los tipos compactos de processed_dtypes().
+
+    Args:
+        data (pd.DataFrame): El DataFrame a convertir.
+
+    Returns:
+        pd.DataFrame: Una copia del DataFrame con los tipos compactos.
+    """
+    data = data.copy()
+    if 'class' in data.columns:
+        data = preprocess_data(data)
+    dtypes = processed_dtypes()
+    return data.astype({column: dtypes[column] for column in data.columns if column in dtypes})
+
+def _csv_dtypes(columns=None):
+    dtypes = processed_dtypes()
+    for column in Config.RESULT_FEATURE:
+        # 'class' se guarda como texto en el CSV y se convierte a bool al leerlo
+        dtypes[column] = pd.CategoricalDtype(Config.SCHEMA[column][Config.OPTIONS])
+    if columns is not None:
+        dtypes = {column: dtypes[column] for column in columns if column in dtypes}
+    return dtypes
+
+def read_processed(path, columns=None):
+    """Lee datos procesados (CSV, Parquet o empaquetados .npy) con tipos explícitos y
+    proyección de columnas.
+
+    Args:
+        path (str): Ruta del archivo (o directorio Parquet); el formato se determina por la extensión.
+        columns (list): Columnas a leer (por defecto, todas).
+
+    Returns:
+        pd.DataFrame: Los datos con los tipos de processed_dtypes().
+    """
+    if path.endswith('.parquet'):
+        data = pd.concat([pd.read_parquet(part, columns=columns) for part in parquet_files(path)],
+                         ignore_index=True)
+    elif path.endswith('.npy'):
+        data = _unpack_columns(np.load(path, mmap_mode='r'), columns)
+    else:
+        data = pd.read_csv(path, usecols=columns, dtype=_csv_dtypes(columns))
+    return to_processed_dtypes(data)
+
+def iter_processed_chunks(path, chunksize, columns=None):
+    """Lee datos procesados (CSV, Parquet o empaquetados .npy) por bloques, con tipos explícitos.
+
+    Args:
+        path (str): Ruta del archivo (o directorio Parquet); el formato se determina por la extensión.
+        chunksize (int): Número de filas por bloque.
+        columns (list): Columnas a leer (por defecto, todas).
+
+    Yields:
+        pd.DataFrame: Bloques consecutivos con los tipos de processed_dtypes(). Un bloque no
+        abarca dos archivos de un directorio Parquet.
+    """
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        for part in parquet_files(path):
+            for batch in pq.ParquetFile(part).iter_batches(batch_size=chunksize, columns=columns):
+                yield to_processed_dtypes(batch.to_pandas())
+    elif path.endswith('.npy'):
+        records = np.load(path, mmap_mode='r')
+        for start in range(0, len(records), chunksize):
+            chunk = _unpack_columns(records[start:start + chunksize], columns)
+            chunk.index += start
+            yield to_processed_dtypes(chunk)
+    else:
+        for chunk in pd.read_csv(path, usecols=columns, dtype=_csv_dtypes(columns),
+                                 chunksize=chunksize):
+            yield to_processed_dtypes(chunk)
+
+def _unpack_columns(records, columns):
+    data = unpack_records(records)
+    return data if columns is None else data[columns]
+
+def processed_data_path():
+    """Ruta de los datos procesados: el Parquet si existe y, si no, el CSV.
+
+    Returns:
+        str: Ruta del archivo de datos procesados.
+    """
+    if os.path.exists(Config.PROCESSED_PARQUET_PATH):
+        return Config.PROCESSED_PARQUET_PATH
+    return Config.PROCESSED_DATA_PATH
 
-    processed_path = 'data/processed/diabetes_data_upload.csv'  # Asegurarse de que sea un .csv
-    data.to_csv(processed_path, index=False)
-    print(f"Datos procesados guardados correctamente en {processed_path}")
+def load_processed_data(columns=None):
+    """Carga los datos procesados con tipos compactos (ver read_processed).
+
+    Args:
+        columns (list): Columnas a leer (por defecto, todas).
+
+    Returns:
+        pd.DataFrame: Los datos procesados.
+    """
+    return read_processed(processed_data_path(), columns)
 
 def test_data_types(data):
     """
@@ -133,20 +300,18 @@ def test_data_column(schema_node, column, data):
         raise(ae)
 
 if __name__ == '__main__':
-    # Cargar los datos
-    raw_data = load_data()
-    print("Datos crudos cargados correctamente")
-    # Pruebas de tipos de dato
-    data_type_errors = test_data_types(raw_data)
-    # Pruebas de valores
-    data_content_errors = test_data_content(raw_data)
-    if data_type_errors + data_content_errors > 0:
-        sys.exit()
-    
-    # Preprocesar los datos
-    # processed_data = preprocess_data(raw_data)
-    print("Datos preprocesados correctamente")
-    
-    # Guardar los datos preprocesados
-    save_processed_data(raw_data)
+    from incremental import preprocess_raw, save_preprocess_report
+
+    parser = argparse.ArgumentParser(description="Valida y guarda los datos preprocesados")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Procesar sólo las filas agregadas al archivo crudo desde la última ejecución")
+    add_profile_argument(parser)
+    args = parser.parse_args()
 
+    with profile_stage('preprocess', args.profile):
+        # Validar y guardar por bloques; con --incremental se reutilizan los bloques del manifiesto
+        result = preprocess_raw(incremental=args.incremental)
+        save_preprocess_report(result)
+        if not result['report'].ok:
+            sys.exit()
+        print("Datos preprocesados correctamente")
@@ -0,0 +1,140 @@
+"""Codificador vectorizado de las características categóricas de dos opciones.
+
+Todas las características categóricas de Config.SCHEMA tienen exactamente dos opciones. El
+BinaryEncoder de category_encoders las codifica con un mapeo ordinal en pandas y una matriz
+binaria de dos columnas por característica, cuyo orden depende del orden de aparición de los
+valores en los datos de entrenamiento. SchemaBinaryEncoder toma las opciones del esquema y
+codifica cada característica en una sola columna: 0 para la primera opción y 1 para la
+segunda, con una comparación de NumPy por columna (o sobre las categorías, si la columna es
+categórica).
+
+Vive en un módulo propio, sin dependencias del resto del proyecto salvo config.py, para que
+los modelos guardados se puedan cargar en la imagen de la API.
+"""
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.utils.validation import check_is_fitted
+
+from config import Config
+
+HANDLE_UNKNOWN = ('error', 'value')
+
+
+class InvalidValueError(ValueError):
+    """Valor desconocido o faltante en una característica categórica al transformar."""
+
+
+class SchemaBinaryEncoder(TransformerMixin, BaseEstimator):
+    """
+    Codifica columnas de dos opciones del esquema en 0/1, una columna de salida por columna de entrada.
+
+    No aprende nada de los datos: las opciones salen del esquema, por lo que la codificación es
+    la misma en todos los pliegues y entrenamientos. Admite set_output(transform='pandas'); los
+    nombres de salida son los de entrada.
+
+    Con una sola columna no hay un código libre como la fila de ceros de BinaryEncoder, por lo
+    que por defecto los valores desconocidos y los faltantes lanzan InvalidValueError en lugar de
+    recibir un código inventado.
+
+    Parameters:
+    handle_unknown (str): 'error' lanza InvalidValueError con los valores fuera de las opciones;
+        'value' los codifica con `unknown_value`.
+    handle_missing (str): Igual que `handle_unknown`, para los valores faltantes.
+    unknown_value (float): Código de los valores desconocidos y faltantes con 'value'.
+    schema (dict): Esquema con las opciones de cada columna (por defecto, Config.SCHEMA).
+    """
+
+    def __init__(self, handle_unknown='error', handle_missing='error', unknown_value=0.5, schema=None):
+        self.handle_unknown = handle_unknown
+        self.handle_missing = handle_missing
+        self.unknown_value = unknown_value
+        self.schema = schema
+
+    def fit(self, X, y=None):
+        """
+        Toma del esquema las opciones de cada columna de `X`.
+
+        Parameters:
+        X (pd.DataFrame): Columnas categóricas a codificar.
+        y: Ignorado.
+
+        Returns:
+        SchemaBinaryEncoder: El codificador ajustado.
+
+        Raises:
+        ValueError: Si handle_unknown o handle_missing no son válidos o alguna columna no tiene
+            exactamente dos opciones en el esquema.
+        """
+        for name, handling in (('handle_unknown', self.handle_unknown), ('handle_missing', self.handle_missing)):
+            if handling not in HANDLE_UNKNOWN:
+                raise ValueError(f"{name} debe ser uno de {HANDLE_UNKNOWN}, no {handling!r}")
+        schema = Config.SCHEMA if self.schema is None else self.schema
+        columns = list(X.columns)
+        options = []
+        for column in columns:
+            column_options = schema.get(column, {}).get(Config.OPTIONS)
+            if column_options is None or len(column_options) != 2:
+                raise ValueError(f"La columna {column} no tiene exactamente dos opciones en el esquema")
+            options.append(tuple(column_options))
+        self.feature_names_in_ = np.asarray(columns, dtype=object)
+        self.n_features_in_ = len(columns)
+        self.options_ = options
+        return self
+
+    def _encode(self, column, values, negative, positive):
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Se comparan sólo las categorías y se indexa con los códigos de cada fila
+            categories = values.cat.categories
+            codes = values.cat.codes.to_numpy()
+            table = np.full(len(categories) + 1, np.nan)
+            table[:-1][categories == negative] = 0.0
+            table[:-1][categories == positive] = 1.0
+            encoded = table[codes]
+            unknown = np.isnan(encoded)
+            if not unknown.any():
+                return encoded
+            missing = codes < 0
+            invalid = categories[codes[unknown & ~missing]]
+        else:
+            values = values.to_numpy()
+            encoded = (values == positive).astype(np.float64)
+            unknown = ~((encoded == 1.0) | (values == negative))
+            if not unknown.any():
+                return encoded
+            missing = pd.isna(values)
+            invalid = values[unknown & ~missing]
+        if self.handle_unknown == 'error' and len(invalid):
+            raise InvalidValueError(f"Valor desconocido {invalid[0]!r} en la columna {column}")
+        if self.handle_missing == 'error' and (unknown & missing).any():
+            raise InvalidValueError(f"Valor faltante en la columna {column}")
+        encoded[unknown] = self.unknown_value
+        return encoded
+
+    def transform(self, X):
+        """
+        Codifica las columnas de `X`.
+
+        Parameters:
+        X (pd.DataFrame): Las mismas columnas, en el mismo orden, que en el ajuste.
+
+        Returns:
+        np.ndarray: Matriz float64 de forma (n_registros, n_columnas).
+
+        Raises:
+        ValueError: Si las columnas no coinciden con las del ajuste.
+        InvalidValueError: Si hay un valor desconocido y handle_unknown='error' o un valor
+            faltante y handle_missing='error'.
+        """
+        check_is_fitted(self, 'options_')
+        if list(X.columns) != list(self.feature_names_in_):
+            raise ValueError(f"Se esperaban las columnas {list(self.feature_names_in_)}, no {list(X.columns)}")
+        encoded = np.empty((len(X), self.n_features_in_), dtype=np.float64)
+        for j, (column, (negative, positive)) in enumerate(zip(self.feature_names_in_, self.options_)):
+            encoded[:, j] = self._encode(column, X[column], negative, positive)
+        return encoded
+
+    def get_feature_names_out(self, input_features=None):
+        """Nombres de las columnas de salida: los mismos de entrada."""
+        check_is_fitted(self, 'options_')
+        return np.asarray(self.feature_names_in_, dtype=object)
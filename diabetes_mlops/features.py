@@ -3,27 +3,41 @@ from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 from category_encoders import BinaryEncoder
 from config import Config
+from encoders import SchemaBinaryEncoder
 import pandas as pd
 import numpy as np
 
 
-def create_pipeline():
+def create_pipeline(encoder=Config.CATEGORICAL_ENCODER):
     """Crea un pipeline de preprocesamiento.
 
     Este pipeline está compuesto por dos sub-pipelines:
     - Un pipeline para características numéricas que aplica escalado estándar.
     - Un pipeline para características categóricas que aplica codificación binaria.
 
+    Args:
+        encoder (str): Codificador categórico: 'schema' (SchemaBinaryEncoder, vectorizado a
+            partir de Config.SCHEMA) o 'binary' (BinaryEncoder de category_encoders).
+
     Returns:
         ColumnTransformer: Un objeto ColumnTransformer que aplica las transformaciones
         adecuadas a las características numéricas y categóricas del conjunto de datos.
+
+    Raises:
+        ValueError: Si el codificador no existe.
     """
     numeric_pipeline = Pipeline([
         ('scaler', StandardScaler())
     ])
 
+    if encoder == 'schema':
+        categorical_encoder = SchemaBinaryEncoder()
+    elif encoder == 'binary':
+        categorical_encoder = BinaryEncoder()
+    else:
+        raise ValueError(f"Codificador categórico desconocido: {encoder}. Opciones: 'schema', 'binary'")
     categorical_pipeline = Pipeline([
-        ('encoder', BinaryEncoder())
+        ('encoder', categorical_encoder)
     ])
 
     preprocessor = ColumnTransformer([
@@ -55,6 +69,8 @@ def test_feature_engineering_process(preprocessor: ColumnTransformer, X_train, y
             test_scaler(X_train, X_transformed_df, column)
         elif 'categorical' in column:
             test_encoder(X_transformed_df, column)
+    if isinstance(preprocessor.named_transformers_['categorical'].named_steps['encoder'], SchemaBinaryEncoder):
+        test_schema_encoder(X_train[Config.CATEGORICAL_FEATURES])
 
 def test_scaler(data, transformed_data, column):
     """
@@ -81,7 +97,7 @@ def test_scaler(data, transformed_data, column):
     
 def test_encoder(data, column):
     """
-    Verifica que los valores obtenidos después de aplicar el BinaryEncoder a una columna categórica sean correctos.
+    Verifica que los valores obtenidos después de aplicar el codificador a una columna categórica sean correctos.
 
     Parameters:
     data (pd.DataFrame): Datos transformados que contienen la columna codificada.
@@ -97,4 +113,57 @@ def test_encoder(data, column):
         assert data[column].isin([1.0, 0.0]).all(),\
         "Los valores de la columna {} despues del codificado son diferentes a 0 o 1".format(column)
     except AssertionError as ae:
-        raise(ae)
\ No newline at end of file
+        raise(ae)
+
+def test_schema_encoder(data):
+    """
+    Verifica que SchemaBinaryEncoder sea equivalente a BinaryEncoder sobre los mismos datos.
+
+    Para cada columna, la codificación de BinaryEncoder (dos columnas) y la de
+    SchemaBinaryEncoder (una columna) deben determinarse mutuamente: cada código de una
+    corresponde a un único código de la otra. Por defecto, los valores fuera de las opciones y
+    los faltantes deben lanzar ValueError; con 'value', codificarse con unknown_value.
+
+    Parameters:
+    data (pd.DataFrame): Columnas categóricas con valores de las opciones de Config.SCHEMA
+        (por ejemplo, inference.schema_sample()[Config.CATEGORICAL_FEATURES]).
+
+    Returns:
+    None
+
+    Raises:
+    AssertionError: Si alguna columna no es equivalente o los valores desconocidos o faltantes
+        no se manejan como se espera.
+    """
+    try:
+        binary = BinaryEncoder().fit(data).transform(data)
+        encoder = SchemaBinaryEncoder().fit(data)
+        encoded = encoder.transform(data)
+        assert encoded.shape == (len(data), data.shape[1]),\
+            "SchemaBinaryEncoder debe producir una columna por característica"
+        for j, column in enumerate(data.columns):
+            block = binary[[c for c in binary.columns if c.rsplit('_', 1)[0] == column]].to_numpy()
+            pairs = set(zip(map(tuple, block), encoded[:, j]))
+            assert len(pairs) == len({code for _, code in pairs}) == len({row for row, _ in pairs}),\
+                "La codificación de la columna {} no es equivalente a la de BinaryEncoder".format(column)
+            assert set(encoded[:, j]) <= {0.0, 1.0},\
+                "La columna {} tiene códigos distintos de 0 y 1".format(column)
+
+        lenient = SchemaBinaryEncoder(handle_unknown='value', handle_missing='value').fit(data)
+        for value in ('__desconocido__', None):
+            invalid = data.iloc[:1].astype(object)
+            invalid.iloc[0, 0] = value
+            try:
+                encoder.transform(invalid)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError("Por defecto el valor {!r} debe lanzar ValueError".format(value))
+            assert lenient.transform(invalid)[0, 0] == lenient.unknown_value,\
+                "Con 'value', el valor {!r} debe codificarse con unknown_value".format(value)
+
+        pandas_output = SchemaBinaryEncoder().set_output(transform='pandas').fit(data).transform(data)
+        assert list(pandas_output.columns) == list(data.columns) and pandas_output.to_numpy().tobytes() == encoded.tobytes(),\
+            "La salida de pandas difiere de la matriz de NumPy"
+    except AssertionError as ae:
+        raise(ae)
@@ -0,0 +1,333 @@
+"""Preprocesamiento incremental de los datos crudos.
+
+El archivo crudo se divide en bloques de Config.PREPROCESS_CHUNK_ROWS líneas. El manifiesto
+(Config.PREPROCESS_MANIFEST_PATH) guarda por bloque su rango de bytes en el archivo crudo,
+su hash md5, su número de filas y el tamaño de las salidas al terminar de escribirlo, además
+del reporte de validación acumulado hasta el último bloque completo.
+
+En cada ejecución se comprueban los hashes de los bloques registrados (calcular el md5 es
+mucho más barato que leer, validar y escribir los datos). Si el archivo sólo creció, se
+valida y se escribe únicamente lo nuevo: el último bloque incompleto se vuelve a procesar y
+las filas nuevas se agregan al final del CSV y del .npy y como archivos nuevos del directorio
+Parquet. Una reconstrucción completa es el mismo proceso partiendo de un manifiesto vacío,
+por lo que las salidas y el reporte de validación son idénticos byte a byte.
+
+Se reconstruye todo si cambió algo distinto del final del archivo (el encabezado o filas ya
+procesadas), el esquema, los formatos o el tamaño de bloque, o si las salidas no coinciden
+con el manifiesto. Se asume un registro por línea (sin saltos de línea dentro de campos
+entre comillas).
+
+Uso:
+    python diabetes_mlops/dataset.py --incremental
+"""
+import copy
+import hashlib
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+from dataset import PARQUET_PART, parquet_files, remove_output, write_parquet_part
+from packing import pack_records, to_structured, PACKED_DTYPE
+from validation import ValidationReport, save_report, validate_chunk
+
+MANIFEST_VERSION = 1
+
+
+def settings_fingerprint(header, chunk_rows, formats):
+    """
+    Hash de todo lo que determina las salidas además de las filas: el encabezado del archivo
+    crudo, el tamaño de bloque, los formatos y el esquema.
+
+    Parameters:
+    header (bytes): Primera línea del archivo crudo.
+    chunk_rows (int): Filas por bloque.
+    formats (list): Formatos de salida.
+
+    Returns:
+    str: El hash md5 en hexadecimal.
+    """
+    settings = {'version': MANIFEST_VERSION, 'header': header.decode('utf-8', 'replace'),
+                'chunk_rows': chunk_rows, 'formats': sorted(formats), 'schema': Config.SCHEMA}
+    return hashlib.md5(json.dumps(settings, sort_keys=True).encode()).hexdigest()
+
+
+def load_manifest(path=Config.PREPROCESS_MANIFEST_PATH):
+    """Lee el manifiesto, o devuelve None si no existe."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, path=Config.PREPROCESS_MANIFEST_PATH):
+    """Guarda el manifiesto de forma atómica."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def _npy_header(n_rows):
+    # El mismo encabezado que np.save; NumPy lo rellena con espacios para que la forma pueda
+    # crecer sin cambiar su longitud, por lo que se reescribe en su lugar al agregar filas
+    header = io.BytesIO()
+    np.lib.format.write_array_header_1_0(header, {'descr': np.lib.format.dtype_to_descr(PACKED_DTYPE),
+                                                  'fortran_order': False, 'shape': (n_rows,)})
+    return header.getvalue()
+
+
+class ProcessedOutputs:
+    """
+    Salidas procesadas que crecen por bloques y se pueden truncar a un estado anterior.
+
+    El estado es un diccionario con los bytes del CSV, las filas del .npy y el número de
+    archivos del directorio Parquet.
+
+    Parameters:
+    formats (list): Formatos a escribir ('csv', 'parquet' y/o 'packed').
+    output_dir (str): Directorio de las salidas, con los nombres de archivo de Config (por
+        defecto, las rutas de Config).
+    """
+
+    EMPTY = {'csv_bytes': 0, 'packed_rows': 0, 'parquet_parts': 0}
+
+    def __init__(self, formats=Config.PROCESSED_FORMATS, output_dir=None):
+        self.formats = formats
+        paths = [Config.PROCESSED_DATA_PATH, Config.PROCESSED_PARQUET_PATH, Config.PROCESSED_PACKED_PATH]
+        if output_dir is not None:
+            paths = [os.path.join(output_dir, os.path.basename(path)) for path in paths]
+        self.csv_path, self.parquet_path, self.packed_path = paths
+
+    def current_state(self):
+        """
+        Estado de las salidas en disco.
+
+        Returns:
+        dict: El estado, o None si alguna salida no tiene el formato esperado.
+        """
+        state = dict(self.EMPTY)
+        if 'csv' in self.formats and os.path.exists(self.csv_path):
+            state['csv_bytes'] = os.path.getsize(self.csv_path)
+        if 'packed' in self.formats and os.path.exists(self.packed_path):
+            size = os.path.getsize(self.packed_path) - len(_npy_header(0))
+            if size % PACKED_DTYPE.itemsize:
+                return None
+            state['packed_rows'] = size // PACKED_DTYPE.itemsize
+        if 'parquet' in self.formats and os.path.exists(self.parquet_path):
+            if not os.path.isdir(self.parquet_path):
+                return None
+            names = sorted(os.listdir(self.parquet_path))
+            if names != [PARQUET_PART.format(i) for i in range(len(names))]:
+                return None
+            state['parquet_parts'] = len(names)
+        return state
+
+    def clear(self):
+        """Elimina todas las salidas."""
+        for path in (self.csv_path, self.parquet_path, self.packed_path):
+            remove_output(path)
+
+    def truncate(self, state):
+        """
+        Descarta lo escrito después de `state`.
+
+        Parameters:
+        state (dict): Estado al que se vuelve (ver current_state).
+        """
+        if 'csv' in self.formats and os.path.exists(self.csv_path):
+            with open(self.csv_path, 'r+b') as f:
+                f.truncate(state['csv_bytes'])
+        if 'packed' in self.formats and os.path.exists(self.packed_path):
+            with open(self.packed_path, 'r+b') as f:
+                f.write(_npy_header(state['packed_rows']))
+                f.truncate(len(_npy_header(0)) + state['packed_rows'] * PACKED_DTYPE.itemsize)
+        if 'parquet' in self.formats and os.path.isdir(self.parquet_path):
+            for name in os.listdir(self.parquet_path):
+                if name >= PARQUET_PART.format(state['parquet_parts']):
+                    os.remove(os.path.join(self.parquet_path, name))
+
+    def append(self, data, state):
+        """
+        Agrega un bloque de datos procesados a las salidas.
+
+        Parameters:
+        data (pd.DataFrame): Bloque a agregar.
+        state (dict): Estado actual de las salidas.
+
+        Returns:
+        dict: El estado después de agregar el bloque.
+        """
+        state = dict(state)
+        if 'csv' in self.formats:
+            os.makedirs(os.path.dirname(os.path.abspath(self.csv_path)), exist_ok=True)
+            with open(self.csv_path, 'ab') as f:
+                data.to_csv(f, index=False, header=state['csv_bytes'] == 0)
+                state['csv_bytes'] = f.tell()
+        if 'parquet' in self.formats:
+            write_parquet_part(data, self.parquet_path, state['parquet_parts'])
+            state['parquet_parts'] += 1
+        if 'packed' in self.formats:
+            records = to_structured(pack_records(data))
+            state['packed_rows'] += len(records)
+            with open(self.packed_path, 'r+b' if os.path.exists(self.packed_path) else 'wb') as f:
+                f.write(_npy_header(state['packed_rows']))
+                f.seek(0, os.SEEK_END)
+                f.write(records.tobytes())
+        return state
+
+
+def _reusable_chunks(manifest, raw, fingerprint, outputs):
+    """Bloques completos del manifiesto que siguen siendo válidos, o None si hay que reconstruir todo."""
+    if manifest is None:
+        return None
+    if manifest.get('fingerprint') != fingerprint:
+        print("Cambió el encabezado, el esquema, los formatos o el tamaño de bloque")
+        return None
+    chunks = manifest['chunks']
+    expected = chunks[-1]['outputs'] if chunks else ProcessedOutputs.EMPTY
+    if outputs.current_state() != expected:
+        print("Las salidas procesadas no coinciden con el manifiesto")
+        return None
+    for chunk in chunks:
+        raw.seek(chunk['offset'])
+        if hashlib.md5(raw.read(chunk['length'])).hexdigest() != chunk['md5']:
+            print(f"Cambiaron filas ya procesadas del archivo crudo (desde la fila {chunk['start_row']})")
+            return None
+    # El último bloque incompleto se vuelve a procesar con las filas nuevas
+    return [chunk for chunk in chunks if chunk['rows'] == manifest['chunk_rows']]
+
+
+def _read_chunks(raw, header, offset, start_row, chunk_rows):
+    raw.seek(offset)
+    while True:
+        lines = []
+        for line in raw:
+            lines.append(line)
+            if len(lines) == chunk_rows:
+                break
+        if not lines:
+            return
+        block = b''.join(lines)
+        data = pd.read_csv(io.BytesIO(header + block))
+        data.index += start_row
+        yield offset, block, data
+        offset += len(block)
+        start_row += len(lines)
+
+
+def preprocess_raw(raw_path=Config.DATA_PATH, formats=Config.PROCESSED_FORMATS, incremental=True,
+                   manifest_path=Config.PREPROCESS_MANIFEST_PATH, chunk_rows=Config.PREPROCESS_CHUNK_ROWS,
+                   output_dir=None):
+    """
+    Valida el archivo crudo y escribe los datos procesados por bloques, reutilizando los bloques
+    ya procesados si `incremental` es True.
+
+    Si un bloque no pasa la validación se detiene: las salidas y el manifiesto quedan con los
+    bloques anteriores y el reporte de validación describe todos los bloques revisados.
+
+    Parameters:
+    raw_path (str): Archivo CSV crudo.
+    formats (list): Formatos de salida.
+    incremental (bool): Reutilizar los bloques del manifiesto (False para reconstruir todo).
+    manifest_path (str): Ruta del manifiesto.
+    chunk_rows (int): Filas por bloque.
+    output_dir (str): Directorio de las salidas (ver ProcessedOutputs).
+
+    Returns:
+    dict: 'report' (ValidationReport), 'rows' (filas totales), 'new_rows' (filas procesadas en
+    esta ejecución), 'reused_chunks' y 'rebuilt' (True si no se reutilizó ningún bloque).
+    """
+    outputs = ProcessedOutputs(formats, output_dir)
+    with open(raw_path, 'rb') as raw:
+        header = raw.readline()
+        fingerprint = settings_fingerprint(header, chunk_rows, formats)
+        manifest = load_manifest(manifest_path) if incremental else None
+        chunks = _reusable_chunks(manifest, raw, fingerprint, outputs)
+        raw_size = os.fstat(raw.fileno()).st_size
+
+        if chunks is None:
+            rebuilt = True
+            chunks = []
+            report = ValidationReport()
+            outputs.clear()
+        else:
+            rebuilt = False
+            last = manifest['chunks'][-1] if manifest['chunks'] else None
+            if last is not None and last['offset'] + last['length'] == raw_size:
+                print("El archivo crudo no tiene filas nuevas")
+                return {'report': ValidationReport.from_dict(manifest['report_all']), 'new_rows': 0,
+                        'rows': last['start_row'] + last['rows'], 'reused_chunks': len(manifest['chunks']),
+                        'rebuilt': False}
+            report = ValidationReport.from_dict(manifest['report']) if chunks else ValidationReport()
+
+        reused = len(chunks)
+        state = chunks[-1]['outputs'] if chunks else dict(ProcessedOutputs.EMPTY)
+        outputs.truncate(state)
+        offset = chunks[-1]['offset'] + chunks[-1]['length'] if chunks else len(header)
+        start_row = chunks[-1]['start_row'] + chunks[-1]['rows'] if chunks else 0
+        complete_report = copy.deepcopy(report.to_dict())
+        new_rows = 0
+
+        for offset, block, data in _read_chunks(raw, header, offset, start_row, chunk_rows):
+            validate_chunk(data, report)
+            if not report.ok:
+                break
+            state = outputs.append(data, state)
+            chunks.append({'offset': offset, 'length': len(block), 'start_row': start_row,
+                           'rows': len(data), 'md5': hashlib.md5(block).hexdigest(), 'outputs': state})
+            start_row += len(data)
+            new_rows += len(data)
+            if len(data) == chunk_rows:
+                complete_report = copy.deepcopy(report.to_dict())
+
+    save_manifest({'version': MANIFEST_VERSION, 'fingerprint': fingerprint, 'chunk_rows': chunk_rows,
+                   'chunks': chunks, 'report': complete_report, 'report_all': report.to_dict()},
+                  manifest_path)
+    return {'report': report, 'rows': start_row, 'new_rows': new_rows, 'reused_chunks': reused,
+            'rebuilt': rebuilt}
+
+
+def test_incremental_outputs(reference_dir, output_dir=None, formats=Config.PROCESSED_FORMATS):
+    """
+    Verifica que las salidas procesadas sean idénticas byte a byte a las de una reconstrucción completa.
+
+    Parameters:
+    reference_dir (str): Directorio con las salidas de una reconstrucción completa
+        (preprocess_raw con incremental=False y output_dir=reference_dir).
+    output_dir (str): Directorio de las salidas a verificar (por defecto, las rutas de Config).
+    formats (list): Formatos a comparar.
+
+    Returns:
+    None
+
+    Raises:
+    AssertionError: Si algún archivo difiere o falta.
+    """
+    def files(outputs):
+        paths = {'csv': [outputs.csv_path], 'packed': [outputs.packed_path],
+                 'parquet': parquet_files(outputs.parquet_path)}
+        return {os.path.relpath(path, os.path.dirname(outputs.csv_path)): path
+                for fmt in formats for path in paths[fmt]}
+
+    try:
+        actual = files(ProcessedOutputs(formats, output_dir))
+        expected = files(ProcessedOutputs(formats, reference_dir))
+        assert sorted(actual) == sorted(expected),\
+            f"Los archivos {sorted(actual)} difieren de los de la reconstrucción completa {sorted(expected)}"
+        for name, path in actual.items():
+            with open(path, 'rb') as f, open(expected[name], 'rb') as g:
+                assert f.read() == g.read(), f"{name} difiere de la reconstrucción completa"
+    except AssertionError as ae:
+        raise(ae)
+
+
+def save_preprocess_report(result, path=Config.VALIDATION_REPORT_PATH):
+    """Guarda el reporte de validación de preprocess_raw e imprime el resumen."""
+    print(result['report'].summary())
+    save_report(result['report'], path)
+    mode = 'reconstrucción completa' if result['rebuilt'] else f"{result['reused_chunks']} bloque(s) reutilizados"
+    print(f"{result['new_rows']} fila(s) nuevas procesadas de {result['rows']} ({mode})")
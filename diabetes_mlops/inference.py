@@ -0,0 +1,296 @@
+"""Ruta rápida de inferencia sin pandas.
+
+Lee una sola vez los parámetros ajustados del preprocesador (media y escala del
+StandardScaler y mapeos del BinaryEncoder o del SchemaBinaryEncoder) de un pipeline entrenado y codifica los
+registros directamente en una matriz de NumPy que se entrega al clasificador.
+"""
+import copy
+
+import numpy as np
+from category_encoders import BinaryEncoder
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from config import Config
+from encoders import InvalidValueError, SchemaBinaryEncoder
+
+
+class CompiledPipeline:
+    """
+    Versión compilada de un pipeline entrenado ('preprocessor' + 'classifier').
+
+    Produce exactamente la misma matriz de características que `pipeline[:-1].transform`,
+    sin construir DataFrames de pandas.
+
+    Parameters:
+    pipeline (Pipeline): Pipeline entrenado con los pasos 'preprocessor' (ColumnTransformer)
+        y 'classifier'.
+
+    Raises:
+    TypeError: Si el preprocesador contiene transformadores que no se pueden compilar.
+    """
+
+    def __init__(self, pipeline):
+        preprocessor = pipeline.named_steps['preprocessor']
+        self.n_features_out = sum(s.stop - s.start for s in preprocessor.output_indices_.values())
+        self._numeric = []
+        self._categorical = []
+        for name, transformer, columns in preprocessor.transformers_:
+            if name == 'remainder':
+                if transformer != 'drop':
+                    raise TypeError("No se puede compilar un remainder distinto de 'drop'")
+                continue
+            if isinstance(transformer, Pipeline):
+                if len(transformer.steps) != 1:
+                    raise TypeError(f"El transformador {name} debe tener un solo paso")
+                transformer = transformer.steps[0][1]
+            start = preprocessor.output_indices_[name].start
+            if isinstance(transformer, StandardScaler):
+                self._compile_scaler(transformer, columns, start)
+            elif isinstance(transformer, BinaryEncoder):
+                self._compile_binary_encoder(transformer, start)
+            elif isinstance(transformer, SchemaBinaryEncoder):
+                self._compile_schema_encoder(transformer, start)
+            else:
+                raise TypeError(f"Transformador no soportado: {type(transformer).__name__}")
+
+        # El clasificador recibe matrices de NumPy; se omite la verificación de nombres de columnas
+        classifier = copy.copy(pipeline.named_steps['classifier'])
+        if 'feature_names_in_' in vars(classifier):
+            del classifier.feature_names_in_
+        self.classifier = classifier
+        self.classes_ = pipeline.classes_
+        self._input_columns = [c[0] for c in self._numeric] + [c[0] for c in self._categorical]
+
+    def _compile_scaler(self, scaler, columns, start):
+        for i, column in enumerate(columns):
+            mean = scaler.mean_[i] if scaler.with_mean else None
+            scale = scaler.scale_[i] if scaler.with_std else None
+            self._numeric.append((column, start + i, mean, scale))
+
+    def _compile_binary_encoder(self, encoder, start):
+        ordinal_mappings = {m['col']: m['mapping'] for m in encoder.ordinal_encoder.mapping}
+        offset = start
+        for switch in encoder.mapping:
+            column = switch['col']
+            binary = switch['mapping']
+            width = binary.shape[1]
+            # Tabla de códigos binarios: una fila por valor conocido y dos filas finales para
+            # valores desconocidos (-1) y faltantes (-2)
+            index = {}
+            rows = []
+            for value, ordinal in ordinal_mappings[column].items():
+                if isinstance(value, float) and np.isnan(value):
+                    continue
+                index[value] = len(rows)
+                rows.append(binary.loc[ordinal].to_numpy(dtype=np.float64))
+            unknown = len(rows)
+            rows.append(self._special_row(encoder.handle_unknown, binary, -1, width))
+            rows.append(self._special_row(encoder.handle_missing, binary, -2, width))
+            table = np.vstack(rows)
+            self._categorical.append((column, slice(offset, offset + width), index, unknown, table,
+                                      encoder.handle_unknown == 'error', encoder.handle_missing == 'error'))
+            offset += width
+
+    def _compile_schema_encoder(self, encoder, start):
+        # Misma estructura de tabla: las dos opciones, desconocidos y faltantes
+        table = np.array([[0.0], [1.0], [encoder.unknown_value], [encoder.unknown_value]])
+        for i, (column, options) in enumerate(zip(encoder.feature_names_in_, encoder.options_)):
+            index = {option: code for code, option in enumerate(options)}
+            self._categorical.append((column, slice(start + i, start + i + 1), index, len(options), table,
+                                      encoder.handle_unknown == 'error', encoder.handle_missing == 'error'))
+
+    @staticmethod
+    def _special_row(handling, binary, ordinal, width):
+        if handling == 'return_nan':
+            return np.full(width, np.nan)
+        if ordinal in binary.index:
+            return binary.loc[ordinal].to_numpy(dtype=np.float64)
+        return np.zeros(width)
+
+    def transform(self, data):
+        """
+        Codifica los datos de entrada en la matriz de características del clasificador.
+
+        Parameters:
+        data (dict o pd.DataFrame): Columnas de entrada (nombre de columna -> secuencia de valores).
+
+        Returns:
+        np.ndarray: Matriz float64 (orden Fortran) de forma (n_registros, n_features_out).
+
+        Raises:
+        InvalidValueError: Si una columna categórica contiene un valor desconocido (o faltante) y el
+            codificador se entrenó con handle_unknown='error' (o handle_missing='error').
+        """
+        n_rows = len(data[self._input_columns[0]])
+        # Orden por columnas, igual que la salida del ColumnTransformer, para que el
+        # clasificador realice exactamente las mismas operaciones de punto flotante
+        X = np.empty((n_rows, self.n_features_out), dtype=np.float64, order='F')
+        for column, position, mean, scale in self._numeric:
+            values = np.asarray(data[column], dtype=np.float64)
+            if mean is not None:
+                values = values - mean
+            if scale is not None:
+                values = values / scale
+            X[:, position] = values
+        for column, columns_slice, index, unknown, table, strict, strict_missing in self._categorical:
+            codes = np.fromiter((index.get(value, unknown) for value in data[column]),
+                                dtype=np.intp, count=n_rows)
+            if (codes == unknown).any():
+                codes = self._resolve_unknown(column, data[column], codes, unknown, strict, strict_missing)
+            X[:, columns_slice] = table[codes]
+        return X
+
+    @staticmethod
+    def _resolve_unknown(column, values, codes, unknown, strict, strict_missing):
+        codes = codes.copy()
+        values = np.asarray(values, dtype=object)
+        for i in np.flatnonzero(codes == unknown):
+            value = values[i]
+            if value is None or (isinstance(value, float) and np.isnan(value)):
+                if strict_missing:
+                    raise InvalidValueError(f"Valor faltante en la columna {column}")
+                codes[i] = unknown + 1
+            elif strict:
+                raise InvalidValueError(f"Valor desconocido {value!r} en la columna {column}")
+        return codes
+
+    def transform_packed(self, packed):
+        """
+        Codifica registros empaquetados (edad + máscara de bits, ver packing.py) sin
+        reconstruir los valores de texto.
+
+        Parameters:
+        packed (pd.DataFrame o np.ndarray estructurado): Columnas 'Age' y 'mask'.
+
+        Returns:
+        np.ndarray: La misma matriz que `transform(unpack_records(packed))`.
+
+        Raises:
+        ValueError: Si el pipeline usa columnas distintas de las empaquetadas.
+        """
+        from packing import MASK_COLUMN, PACKED_FEATURES
+
+        if [c[0] for c in self._categorical] != PACKED_FEATURES or \
+                [c[0] for c in self._numeric] != ['Age']:
+            raise ValueError("El pipeline no usa las columnas de la representación empaquetada")
+        mask = np.asarray(packed[MASK_COLUMN])
+        X = np.empty((len(mask), self.n_features_out), dtype=np.float64, order='F')
+        _, position, mean, scale = self._numeric[0]
+        values = np.asarray(packed['Age'], dtype=np.float64)
+        if mean is not None:
+            values = values - mean
+        if scale is not None:
+            values = values / scale
+        X[:, position] = values
+        for bit, (column, columns_slice, index, unknown, table, strict, _) in enumerate(self._categorical):
+            options = Config.SCHEMA[column][Config.OPTIONS]
+            if strict and any(option not in index for option in options):
+                raise ValueError(f"La columna {column} tiene opciones desconocidas para el codificador")
+            # Código de la tabla binaria para cada valor posible del bit
+            codes = np.array([index.get(option, unknown) for option in options], dtype=np.intp)
+            X[:, columns_slice] = table[codes[(mask >> bit) & 1]]
+        return X
+
+    def predict(self, data):
+        """Realiza predicciones con la matriz codificada por `transform`."""
+        return self.classifier.predict(self.transform(data))
+
+    def predict_proba(self, data):
+        """Calcula las probabilidades por clase con la matriz codificada por `transform`."""
+        return self.classifier.predict_proba(self.transform(data))
+
+
+def compile_pipeline(pipeline, check_data=None):
+    """
+    Compila un pipeline entrenado y, opcionalmente, verifica su equivalencia.
+
+    Parameters:
+    pipeline (Pipeline): Pipeline entrenado.
+    check_data (pd.DataFrame): Datos con los que se comprueba la equivalencia con el pipeline
+        original (por defecto, una muestra generada a partir de Config.SCHEMA).
+
+    Returns:
+    CompiledPipeline: El pipeline compilado.
+
+    Raises:
+    TypeError: Si el pipeline no se puede compilar.
+    AssertionError: Si la salida compilada no es idéntica a la del pipeline original.
+    """
+    compiled = CompiledPipeline(pipeline)
+    if check_data is None:
+        check_data = schema_sample()
+    test_compiled_pipeline(pipeline, compiled, check_data)
+    return compiled
+
+
+def model_steps(model):
+    """
+    Separa un modelo en su preprocesamiento y su clasificador, para medir cada etapa por separado.
+
+    Parameters:
+    model (Pipeline o CompiledPipeline): Modelo entrenado.
+
+    Returns:
+    tuple: (transform, classifier). `classifier.predict(transform(X))` es idéntico a
+    `model.predict(X)`; `transform` es None si el modelo no tiene pasos de preprocesamiento.
+    """
+    if isinstance(model, CompiledPipeline):
+        return model.transform, model.classifier
+    if isinstance(model, Pipeline) and len(model.steps) > 1:
+        return model[:-1].transform, model[-1]
+    return None, model
+
+
+def schema_sample(n_rows=256, seed=Config.RANDOM_STATE):
+    """
+    Genera una muestra de registros que cubre todas las opciones definidas en Config.SCHEMA.
+
+    Parameters:
+    n_rows (int): Número de registros de la muestra.
+    seed (int): Semilla del generador aleatorio.
+
+    Returns:
+    pd.DataFrame: Registros con las columnas de entrada del modelo.
+    """
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    data = {}
+    for column in Config.NUMERIC_FEATURES + Config.CATEGORICAL_FEATURES:
+        node = Config.SCHEMA[column]
+        if Config.RANGE in node:
+            data[column] = rng.integers(node[Config.RANGE][Config.MIN],
+                                        node[Config.RANGE][Config.MAX] + 1, size=n_rows)
+        else:
+            options = np.array(node[Config.OPTIONS], dtype=object)
+            data[column] = options[rng.integers(0, len(options), size=n_rows)]
+    return pd.DataFrame(data)
+
+
+def test_compiled_pipeline(pipeline, compiled, data):
+    """
+    Verifica que el pipeline compilado produzca exactamente la misma salida que el pipeline original.
+
+    Parameters:
+    pipeline (Pipeline): Pipeline entrenado original.
+    compiled (CompiledPipeline): Pipeline compilado a partir de `pipeline`.
+    data (pd.DataFrame): Registros de entrada.
+
+    Returns:
+    None
+
+    Raises:
+    AssertionError: Si la matriz de características o las predicciones no son idénticas bit a bit.
+    """
+    try:
+        expected = np.asarray(pipeline[:-1].transform(data), dtype=np.float64)
+        actual = compiled.transform(data)
+        assert expected.shape == actual.shape and expected.tobytes() == actual.tobytes(),\
+            "La matriz compilada difiere de la salida del preprocesador"
+        assert np.array_equal(pipeline.predict(data), compiled.predict(data)),\
+            "Las predicciones compiladas difieren de las del pipeline"
+        assert np.array_equal(pipeline.predict_proba(data), compiled.predict_proba(data)),\
+            "Las probabilidades compiladas difieren de las del pipeline"
+    except AssertionError as ae:
+        raise(ae)
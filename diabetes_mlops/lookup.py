@@ -0,0 +1,230 @@
+"""Tabla precalculada de predicciones para todo el dominio de entrada del modelo.
+
+El dominio es finito: Age en el rango de Config.SCHEMA por las 2^15 combinaciones de las
+características binarias (ver packing.py), unos 2.4 millones de puntos. La tabla se
+calcula una vez por versión del modelo y se guarda como arreglos .npy que se abren con
+memory-mapping, de modo que una predicción es un acceso O(1) indexado por (edad, máscara).
+
+Cada versión del modelo (hash md5 del archivo) tiene su propio directorio dentro de
+Config.LOOKUP_TABLE_DIR; si no existe la tabla de la versión vigente se usa el modelo.
+"""
+import json
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+
+from config import Config
+from packing import MASK_COLUMN, PACKED_FEATURES, pack_columns, unpack_records
+
+PREDICTIONS_FILE = 'predictions.npy'
+PROBABILITIES_FILE = 'probabilities.npy'
+META_FILE = 'meta.json'
+
+
+class PredictionTable:
+    """
+    Tabla de predicciones indexada por (edad - edad mínima, máscara).
+
+    Parameters:
+    directory (str): Directorio con los arreglos y los metadatos de la tabla.
+    mmap_mode (str): Modo de memory-mapping de np.load (None para cargar en memoria).
+    """
+
+    def __init__(self, directory, mmap_mode='r'):
+        with open(os.path.join(directory, META_FILE)) as f:
+            self.meta = json.load(f)
+        if self.meta['features'] != PACKED_FEATURES:
+            raise ValueError("La tabla se construyó con otras características empaquetadas")
+        self.version = self.meta['model_version']
+        self.age_min = self.meta['age_min']
+        self.age_max = self.meta['age_max']
+        self.classes_ = np.asarray(self.meta['classes'])
+        self.predictions = np.load(os.path.join(directory, PREDICTIONS_FILE), mmap_mode=mmap_mode)
+        self.probabilities = np.load(os.path.join(directory, PROBABILITIES_FILE), mmap_mode=mmap_mode)
+
+    def lookup(self, data):
+        """
+        Busca las predicciones de los registros que pertenecen al dominio de la tabla.
+
+        Parameters:
+        data (dict o pd.DataFrame): Columnas de entrada del modelo.
+
+        Returns:
+        tuple: (predictions, probabilities, found). `predictions` tiene el tipo de
+        `classes_` y `probabilities` es la probabilidad de la clase positiva;
+        sólo son válidos donde `found` es True (registros con edad en el rango y valores
+        dentro de las opciones del esquema).
+        """
+        age, mask, found = pack_columns(data)
+        found &= (age >= self.age_min) & (age <= self.age_max)
+        rows = np.where(found, age - self.age_min, 0)
+        masks = np.where(found, mask, 0)
+        predictions = self.classes_[self.predictions[rows, masks]]
+        probabilities = self.probabilities[rows, masks]
+        return predictions, probabilities, found
+
+
+def table_directory(version, base_dir=Config.LOOKUP_TABLE_DIR):
+    """Directorio de la tabla correspondiente a una versión del modelo."""
+    return os.path.join(base_dir, version)
+
+
+def load_prediction_table(version, base_dir=Config.LOOKUP_TABLE_DIR):
+    """
+    Abre la tabla de una versión del modelo, si existe.
+
+    Parameters:
+    version (str): Versión (hash md5) del modelo.
+    base_dir (str): Directorio base de las tablas.
+
+    Returns:
+    PredictionTable: La tabla, o None si no existe o no es compatible.
+    """
+    directory = table_directory(version, base_dir)
+    if not os.path.exists(os.path.join(directory, META_FILE)):
+        return None
+    try:
+        return PredictionTable(directory)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"No se pudo abrir la tabla de predicciones {directory}: {e}")
+        return None
+
+
+def build_prediction_table(model, version, base_dir=Config.LOOKUP_TABLE_DIR,
+                           ages_per_batch=Config.LOOKUP_AGES_PER_BATCH):
+    """
+    Evalúa el modelo sobre todo el dominio de entrada y guarda la tabla de la versión indicada.
+
+    Las tablas de otras versiones se eliminan al terminar.
+
+    Parameters:
+    model (Pipeline): Modelo entrenado.
+    version (str): Versión (hash md5) del modelo.
+    base_dir (str): Directorio base de las tablas.
+    ages_per_batch (int): Número de edades (de 2^15 registros cada una) evaluadas por lote.
+
+    Returns:
+    dict: Número de puntos, segundos de construcción y tamaño en bytes de la tabla.
+    """
+    from inference import CompiledPipeline
+
+    start = time.perf_counter()
+    age_range = Config.SCHEMA['Age'][Config.RANGE]
+    age_min, age_max = age_range[Config.MIN], age_range[Config.MAX]
+    n_ages = age_max - age_min + 1
+    n_masks = 1 << len(PACKED_FEATURES)
+    try:
+        compiled = CompiledPipeline(model)
+    except TypeError:
+        compiled = None
+
+    classes = np.asarray(model.classes_)
+    positive = len(classes) - 1  # La clase positiva (True) es la última en model.classes_
+    predictions = np.empty((n_ages, n_masks), dtype=np.uint8)
+    probabilities = np.empty((n_ages, n_masks), dtype=np.float64)
+    masks = np.arange(n_masks, dtype=np.uint16)
+    for first in range(0, n_ages, ages_per_batch):
+        ages = np.arange(first, min(first + ages_per_batch, n_ages))
+        packed = {'Age': np.repeat(ages + age_min, n_masks).astype(np.uint8),
+                  MASK_COLUMN: np.tile(masks, len(ages))}
+        if compiled is not None:
+            X = compiled.transform_packed(packed)
+            labels = compiled.classifier.predict(X)
+            proba = compiled.classifier.predict_proba(X)[:, positive]
+        else:
+            frame = unpack_records(packed)
+            labels = model.predict(frame)
+            proba = model.predict_proba(frame)[:, positive]
+        predictions[ages] = np.searchsorted(classes, labels).reshape(len(ages), n_masks)
+        probabilities[ages] = proba.reshape(len(ages), n_masks)
+
+    # Se escribe en un directorio temporal que se renombra al terminar
+    directory = table_directory(version, base_dir)
+    tmp_directory = directory + '.tmp'
+    shutil.rmtree(tmp_directory, ignore_errors=True)
+    os.makedirs(tmp_directory)
+    np.save(os.path.join(tmp_directory, PREDICTIONS_FILE), predictions)
+    np.save(os.path.join(tmp_directory, PROBABILITIES_FILE), probabilities)
+    elapsed = time.perf_counter() - start
+    meta = {'model_version': version, 'age_min': age_min, 'age_max': age_max,
+            'features': PACKED_FEATURES, 'classes': classes.tolist(),
+            'build_seconds': elapsed}
+    with open(os.path.join(tmp_directory, META_FILE), 'w') as f:
+        json.dump(meta, f, indent=2)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp_directory, directory)
+    for name in os.listdir(base_dir):
+        if name != version:
+            shutil.rmtree(os.path.join(base_dir, name), ignore_errors=True)
+
+    size = predictions.nbytes + probabilities.nbytes
+    print(f"Tabla de predicciones {directory}: {n_ages * n_masks} puntos en {elapsed:.1f} s "
+          f"({size / 1e6:.1f} MB)")
+    return {'points': n_ages * n_masks, 'seconds': elapsed, 'bytes': size}
+
+
+_tables = {}
+"""Tablas abiertas por versión: (PredictionTable o None, mtime del archivo de metadatos)."""
+
+
+def get_prediction_table(version):
+    """
+    Devuelve la tabla de una versión del modelo, abriéndola una sola vez por proceso.
+
+    Si la tabla no existe (o no se pudo abrir) se vuelve a intentar cuando cambia su archivo
+    de metadatos, por ejemplo cuando `build_prediction_table` la genera después de publicar
+    el modelo.
+
+    Parameters:
+    version (str): Versión (hash md5) del modelo.
+
+    Returns:
+    PredictionTable: La tabla, o None si no existe.
+    """
+    cached = _tables.get(version)
+    if cached is not None and cached[0] is not None:
+        return cached[0]
+    try:
+        stat = os.stat(os.path.join(table_directory(version), META_FILE)).st_mtime_ns
+    except OSError:
+        stat = None
+    if cached is None or cached[1] != stat:
+        cached = _tables[version] = (load_prediction_table(version), stat)
+    return cached[0]
+
+
+def predict_with_table(model, table, data):
+    """
+    Predice con la tabla los registros de su dominio y con el modelo el resto.
+
+    Parameters:
+    model: Objeto con predict/predict_proba para los registros fuera del dominio (el pipeline
+        completo o el pipeline compilado).
+    table (PredictionTable): Tabla de predicciones de la versión del modelo.
+    data (dict o pd.DataFrame): Columnas de entrada del modelo.
+
+    Returns:
+    tuple: (predictions, probabilities) de todos los registros, en el orden de entrada.
+    """
+    predictions, probabilities, found = table.lookup(data)
+    if not found.all():
+        missing = np.flatnonzero(~found)
+        if hasattr(data, 'iloc'):
+            subset = data.iloc[missing]
+        else:
+            subset = {column: [values[i] for i in missing] for column, values in data.items()}
+        predictions = predictions.astype(np.result_type(predictions, table.classes_), copy=True)
+        probabilities = probabilities.copy()
+        predictions[missing] = model.predict(subset)
+        probabilities[missing] = model.predict_proba(subset)[:, -1]
+    return predictions, probabilities
+
+
+if __name__ == '__main__':
+    from model_loader import get_model_loader
+
+    current = get_model_loader(sys.argv[1] if len(sys.argv) > 1 else Config.MODEL_PATH).get()
+    build_prediction_table(current.model, current.version)
@@ -1,52 +1,352 @@
-from typing import List
-from fastapi import FastAPI, HTTPException
-import joblib
-from pydantic import BaseModel
-import uvicorn
-import pandas as pd
+from collections import namedtuple
+from contextlib import asynccontextmanager
+import threading
+from typing import Annotated, List, Literal
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel, Field
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+from config import Config
+from encoders import InvalidValueError
+from batching import MicroBatcher
+from metrics import API_METRICS, REQUEST_START, ROWS_TOTAL, MetricsMiddleware, MetricsRegistry, StageTimer
+from model_loader import ModelLoader
 
-with open('trained_model.pkl', "rb") as f:
-    model = joblib.load(f)
+# pandas, scikit-learn, category_encoders, xgboost y los módulos que dependen de ellos
+# (inference, lookup) se importan al cargar el modelo, en segundo plano al iniciar el
+# servidor, y no al importar este módulo
 
+def prepare_model(model, version):
+    """Prepara los artefactos de inferencia de una versión del modelo.
+
+    - 'compiled': ruta rápida sin pandas; si no es posible se usará el pipeline completo.
+    - 'table': tabla precalculada de predicciones de la versión, si existe.
+    - 'steps': preprocesamiento y clasificador de la ruta usada, medidos por separado en /metrics.
+
+    Antes de publicar la versión se ejecuta una predicción de calentamiento (ver warm_up).
+    """
+    from inference import compile_pipeline, model_steps
+    from lookup import load_prediction_table
+
+    compiled = None
+    if Config.FAST_INFERENCE:
+        try:
+            compiled = compile_pipeline(model)
+        except (TypeError, AssertionError) as e:
+            print(f"Ruta rápida de inferencia deshabilitada: {e}")
+    table = load_prediction_table(version) if Config.USE_LOOKUP_TABLE else None
+    extra = {'compiled': compiled, 'table': table,
+             'steps': model_steps(compiled if compiled is not None else model)}
+    warm_up(scorer_of(model, version, extra))
+    return extra
+
+# El modelo se recarga en caliente cuando cambia Config.MODEL_PATH; los arreglos del
+# modelo se leen con memoria mapeada (Config.MODEL_MMAP_MODE)
+loader = ModelLoader(Config.MODEL_PATH, prepare=prepare_model)
+
+# Estado de la carga inicial del modelo, consultado por /ready
+ready = threading.Event()
+startup_error = None
+
+def mark_ready(current=None):
+    """Marca la API como lista tras publicar una versión del modelo."""
+    global startup_error
+    startup_error = None
+    ready.set()
+
+def load_model(stop=None):
+    """Carga y calienta la versión vigente del modelo y marca la API como lista.
+
+    Con `stop`, el hilo sigue vigilando el archivo del modelo hasta que se active: las
+    recargas en caliente se hacen en este hilo y las peticiones sólo leen la versión publicada.
+    Si la carga inicial falla (por ejemplo, el modelo todavía no existe), /ready informa el
+    error y la API queda lista en cuanto el hilo logra cargar una versión.
+    """
+    global startup_error
+    try:
+        loader.get()
+    except Exception as e:
+        startup_error = e
+        print(f"No se pudo cargar el modelo {Config.MODEL_PATH}: {e}")
+    else:
+        mark_ready()
+    if stop is not None:
+        loader.watch(stop, on_publish=mark_ready)
+
+# Micro-batching opcional de las peticiones concurrentes a /predict
+batcher = None
+
+# Latencias por etapa, peticiones y registros evaluados de este proceso, expuestos en /metrics
+registry = MetricsRegistry(API_METRICS)
+
+@asynccontextmanager
+async def lifespan(app):
+    global batcher
+    # El hilo del micro-batching se crea en cada proceso del servidor: los hilos no
+    # sobreviven a os.fork (ver serve.py)
+    if Config.MICRO_BATCHING:
+        batcher = MicroBatcher(predict_with_scorer, max_batch_size=Config.MICRO_BATCH_MAX_SIZE,
+                               window_ms=Config.MICRO_BATCH_WINDOW_MS)
+    # El servidor acepta conexiones mientras el modelo se carga; /ready responde 503 hasta
+    # que termina y las predicciones que lleguen antes esperan a la carga. Si el modelo ya
+    # está cargado (workers de serve.py), sólo se marca la API como lista. Después, el mismo
+    # hilo recarga el modelo cuando cambia el archivo
+    stop_watching = threading.Event()
+    threading.Thread(target=load_model, args=(stop_watching,), name='model-loader', daemon=True).start()
+    yield
+    stop_watching.set()
+    if batcher is not None:
+        batcher.close()
+        batcher = None
+
+def options(column):
+    """Tipo de un campo categórico que sólo acepta las opciones de la columna en Config.SCHEMA."""
+    return Literal[tuple(Config.SCHEMA[column][Config.OPTIONS])]
+
+# Los campos categóricos se validan contra el esquema: un valor desconocido se rechaza con 422
+# antes de llegar al modelo, cuyo codificador (encoders.SchemaBinaryEncoder) lanza ValueError
 class DiabetesData(BaseModel):
     Age: int
-    Gender: str
-    Polyuria: str
-    Polydipsia: str
-    sudden_weight_loss: str
-    weakness: str
-    Polyphagia: str
-    Genital_thrush: str
-    visual_blurring: str
-    Itching: str
-    Irritability: str
-    delayed_healing: str
-    partial_paresis: str
-    muscle_stiffness: str
-    Alopecia: str
-    Obesity: str
-
-app = FastAPI()
+    Gender: options('Gender')
+    Polyuria: options('Polyuria')
+    Polydipsia: options('Polydipsia')
+    sudden_weight_loss: options('sudden weight loss')
+    weakness: options('weakness')
+    Polyphagia: options('Polyphagia')
+    Genital_thrush: options('Genital thrush')
+    visual_blurring: options('visual blurring')
+    Itching: options('Itching')
+    Irritability: options('Irritability')
+    delayed_healing: options('delayed healing')
+    partial_paresis: options('partial paresis')
+    muscle_stiffness: options('muscle stiffness')
+    Alopecia: options('Alopecia')
+    Obesity: options('Obesity')
+
+# Lote de /predict/batch. El máximo de registros se comprueba antes de validar cada registro,
+# por lo que un lote demasiado grande se rechaza sin pagar su validación completa
+BatchData = Annotated[List[DiabetesData], Field(max_length=Config.MAX_BATCH_SIZE)]
+BATCH_TOO_LARGE = "El lote supera el máximo de {} registros".format(Config.MAX_BATCH_SIZE)
+
+# Campos del modelo de entrada y columnas esperadas por el pipeline, en el mismo orden
+FIELDS = list(DiabetesData.model_fields)
+COLUMNS = ['Age','Gender','Polyuria','Polydipsia','sudden weight loss',
+           'weakness','Polyphagia','Genital thrush','visual blurring','Itching',
+           'Irritability','delayed healing','partial paresis','muscle stiffness','Alopecia',
+           'Obesity']
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware, registry=registry)
+
+@app.exception_handler(RequestValidationError)
+async def validation_error(request: Request, exc: RequestValidationError):
+    """Responde 413 si el cuerpo de /predict/batch supera Config.MAX_BATCH_SIZE y 422 en otro caso."""
+    if any(error['type'] == 'too_long' and tuple(error['loc']) == ('body',) for error in exc.errors()):
+        return JSONResponse(status_code=413, content={'detail': BATCH_TOO_LARGE})
+    return await request_validation_exception_handler(request, exc)
+
+def records_to_frame(records: List[DiabetesData], compiled=None):
+    """Construye la entrada orientada a columnas del modelo a partir de una lista de registros.
+
+    Args:
+        records (List[DiabetesData]): Registros recibidos por la API.
+        compiled (CompiledPipeline): Ruta rápida del modelo vigente, si existe.
+
+    Returns:
+        dict | pd.DataFrame: Columnas con una fila por registro, en el orden de entrada. Es un
+        diccionario de listas si se usa la ruta rápida y un DataFrame en caso contrario.
+    """
+    data = {column: [getattr(record, field) for record in records]
+            for field, column in zip(FIELDS, COLUMNS)}
+    if compiled is not None:
+        return data
+    import pandas as pd
+
+    return pd.DataFrame(data, columns=COLUMNS)
+
+def format_result(pred) -> str:
+    return "Diabetes: {}".format('Yes' if int(pred) == 1 else 'No')
+
+Scorer = namedtuple('Scorer', ['model', 'compiled', 'table', 'transform', 'classifier', 'version'])
+"""
+Artefactos de inferencia de una versión del modelo: la ruta rápida (o el pipeline completo),
+la ruta rápida, la tabla de predicciones, el preprocesamiento y el clasificador de la ruta
+usada y la versión (hash md5) del modelo.
+"""
+
+def scorer_of(model, version, extra):
+    """Artefactos de inferencia (Scorer) de una versión del modelo."""
+    compiled = extra['compiled']
+    transform, classifier = extra['steps']
+    return Scorer(compiled if compiled is not None else model, compiled, extra['table'],
+                  transform, classifier, version)
+
+def get_scorer():
+    """Devuelve los artefactos de inferencia (Scorer) del modelo vigente."""
+    current = loader.get()
+    return scorer_of(current.model, current.version, current.extra)
+
+def _skip_lap(stage):
+    pass
+
+def score(records: List[DiabetesData], scorer, timer=None, proba=False):
+    """Evalúa una lista de registros midiendo cada etapa.
+
+    Etapas: 'frame' (construcción de la entrada del modelo) y 'preprocess' y 'classify', o
+    'lookup' si la versión tiene tabla de predicciones.
+
+    Args:
+        records (List[DiabetesData]): Registros a evaluar.
+        scorer (Scorer): Artefactos de la versión del modelo.
+        timer (StageTimer): Temporizador donde se registran las etapas (None para no medirlas).
+        proba (bool): Calcular también la probabilidad de la clase positiva.
+
+    Returns:
+        tuple: Predicciones y probabilidades (None si proba es False), en el orden de entrada.
+
+    Raises:
+        HTTPException: 422 si el codificador del modelo rechaza un valor desconocido o faltante.
+    """
+    lap = timer.lap if timer is not None else _skip_lap
+    df = records_to_frame(records, scorer.compiled)
+    lap('frame')
+    try:
+        if scorer.table is not None:
+            from lookup import predict_with_table
+
+            result = predict_with_table(scorer.model, scorer.table, df)
+            lap('lookup')
+            return result
+        # Se transforma una sola vez aunque se pidan predicciones y probabilidades
+        X = scorer.transform(df) if scorer.transform is not None else df
+    except InvalidValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    lap('preprocess')
+    preds = scorer.classifier.predict(X)
+    # La clase positiva (True) es la última en classes_
+    probas = scorer.classifier.predict_proba(X)[:, -1] if proba else None
+    lap('classify')
+    return preds, probas
+
+def predict_records(records: List[DiabetesData], scorer=None, timer=None):
+    return list(score(records, scorer or get_scorer(), timer)[0])
+
+def predict_with_scorer(records: List[DiabetesData]):
+    """Predicciones de un micro-lote, cada una con los artefactos (Scorer) del modelo que la produjo.
+
+    Tras una recarga en caliente, /predict etiqueta sus métricas con la versión que realmente
+    evaluó el micro-lote y no con la vigente al recibir la petición.
+    """
+    scorer = get_scorer()
+    return [(pred, scorer) for pred in predict_records(records, scorer)]
+
+def predict_probabilities(records: List[DiabetesData], scorer=None, timer=None):
+    """Predicciones y probabilidad de la clase positiva de una lista de registros.
+
+    Args:
+        records (List[DiabetesData]): Registros a evaluar.
+        scorer (Scorer): Artefactos del modelo (por defecto, los del modelo vigente).
+        timer (StageTimer): Temporizador de las etapas (ver score).
+
+    Returns:
+        tuple: Predicciones y probabilidades, en el orden de entrada.
+    """
+    return score(records, scorer or get_scorer(), timer, proba=True)
+
+def record_prediction(endpoint, scorer, timer, n_rows):
+    """Registra en /metrics las etapas de una petición y los registros evaluados."""
+    registry.record_stages(timer, (endpoint, scorer.version))
+    registry.inc(ROWS_TOTAL, (endpoint, scorer.version), n_rows)
+
+def warm_up(scorer, n_rows=Config.WARMUP_ROWS):
+    """Ejecuta una predicción individual y una por lotes con registros de Config.SCHEMA.
+
+    La primera predicción de cada ruta inicializa estructuras internas (validación de
+    scikit-learn, el booster de XGBoost, las páginas mapeadas del modelo y de la tabla), por
+    lo que se paga antes de publicar la versión y no en la primera petición.
+
+    Args:
+        scorer (Scorer): Artefactos de la versión a calentar.
+        n_rows (int): Registros de la predicción por lotes (0 para no calentar).
+    """
+    if not n_rows:
+        return
+    from inference import schema_sample
+
+    sample = schema_sample(n_rows)[COLUMNS].astype(object).values.tolist()
+    records = [DiabetesData(**dict(zip(FIELDS, row))) for row in sample]
+    predict_records(records[:1], scorer)
+    predict_probabilities(records, scorer)
 
 @app.post("/predict")
-def predict(data: DiabetesData):
-    new_data = [data.Age, data.Gender, data.Polyuria, data.Polydipsia, data.sudden_weight_loss, 
-                data.weakness, data.Polyphagia, data.Genital_thrush, data.visual_blurring, data.Itching, 
-                data.Irritability, data.delayed_healing, data.partial_paresis, data.muscle_stiffness, 
-                data.Alopecia, data.Obesity]
-    cols = ['Age','Gender','Polyuria','Polydipsia','sudden weight loss',
-            'weakness','Polyphagia','Genital thrush','visual blurring','Itching',
-            'Irritability','delayed healing','partial paresis','muscle stiffness','Alopecia',
-            'Obesity']
-    df = pd.DataFrame([new_data], columns=cols)
+def predict(data: DiabetesData, request: Request):
+    # La etapa 'parse' va desde la llegada de la petición (lectura del cuerpo, validación
+    # de pydantic y despacho al threadpool) hasta aquí
+    timer = StageTimer(request.scope.get(REQUEST_START))
+    timer.lap('parse')
+    if batcher is not None:
+        pred, scorer = batcher.predict(data)
+        timer.lap('micro_batch')
+    else:
+        scorer = get_scorer()
+        pred = predict_records([data], scorer, timer)[0]
+    record_prediction('/predict', scorer, timer, 1)
+    return {"result": format_result(pred)}
+
+@app.post("/predict/batch")
+def predict_batch(data: BatchData, request: Request):
+    """Realiza predicciones para un lote de registros con una sola llamada al modelo.
+
+    Args:
+        data (List[DiabetesData]): Registros a evaluar.
+
+    Raises:
+        HTTPException: Si el lote está vacío o supera Config.MAX_BATCH_SIZE.
 
-    pred = model.predict(df)
-    return {"result": "Diabetes: {}".format('Yes' if int(pred) == 1 else 'No')}    
+    Returns:
+        dict: Resultado y probabilidad de diabetes para cada registro, en el orden de entrada.
+    """
+    if not data:
+        raise HTTPException(status_code=422, detail="El lote de registros está vacío")
 
+    timer = StageTimer(request.scope.get(REQUEST_START))
+    timer.lap('parse')
+    scorer = get_scorer()
+    preds, probas = predict_probabilities(data, scorer, timer)
+    record_prediction('/predict/batch', scorer, timer, len(data))
+    return {"results": [{"result": format_result(pred), "probability": float(proba)}
+                        for pred, proba in zip(preds, probas)]}
+
+
+@app.get('/ready')
+def read_ready():
+    """Indica si el modelo ya se cargó y se calentó.
+
+    Raises:
+        HTTPException: 503 mientras el modelo se carga o si la carga falló.
+
+    Returns:
+        dict: Estado y versión (hash md5) del modelo vigente.
+    """
+    if not ready.is_set():
+        detail = "Cargando el modelo" if startup_error is None else f"Error al cargar el modelo: {startup_error}"
+        raise HTTPException(status_code=503, detail=detail)
+    return {"status": "ready", "model_version": loader.get().version}
+
+@app.get('/metrics', response_class=PlainTextResponse)
+def read_metrics():
+    """Métricas de este proceso en el formato de texto de Prometheus (ver metrics.py)."""
+    return PlainTextResponse(registry.render(), media_type='text/plain; version=0.0.4; charset=utf-8')
 
 @app.get('/')
 def read_root():
     return {"message": "API para predecir riesgo de presentar Diabetes"}
 
 if __name__ == "__main__":
-    uvicorn.run(app, host='0.0.0.0', port=8000)
\ No newline at end of file
+    import uvicorn
+
+    uvicorn.run(app, host='0.0.0.0', port=8000)
@@ -0,0 +1,323 @@
+"""Métricas de latencia por etapa de la inferencia, con exposición en formato de Prometheus.
+
+Las etapas se miden con StageTimer (una llamada a time.perf_counter por etapa) y se
+acumulan en histogramas de buckets fijos (Config.METRICS_BUCKETS) y contadores de
+MetricsRegistry. Registrar una petición completa cuesta unos pocos microsegundos (caso
+metrics.record_request de benchmarks/bench_suite.py).
+
+Cada proceso tiene sus propias métricas; con los workers de serve.py cada serie lleva la
+etiqueta `pid` del worker que respondió, para que Prometheus no confunda los contadores de
+workers distintos con reinicios.
+"""
+from bisect import bisect_left
+import math
+import os
+import threading
+import time
+
+from config import Config
+
+STAGE_SECONDS = 'diabetes_stage_seconds'
+REQUEST_SECONDS = 'diabetes_request_seconds'
+ROWS_TOTAL = 'diabetes_predicted_rows_total'
+
+API_METRICS = {
+    STAGE_SECONDS: ('histogram', 'Duración de cada etapa de la predicción en segundos',
+                    ('endpoint', 'model_version', 'stage')),
+    REQUEST_SECONDS: ('histogram', 'Duración total de las peticiones HTTP en segundos', ('endpoint', 'status')),
+    ROWS_TOTAL: ('counter', 'Registros evaluados por el modelo', ('endpoint', 'model_version')),
+}
+"""
+Métricas de la API (main.py): tipo, descripción y nombres de las etiquetas. El número de
+peticiones por endpoint y código de estado es diabetes_request_seconds_count.
+"""
+
+BATCH_METRICS = {
+    STAGE_SECONDS: ('histogram', 'Duración de cada etapa de la predicción en segundos', ('stage',)),
+    ROWS_TOTAL: ('counter', 'Registros evaluados por el modelo', ()),
+}
+"""Métricas de la predicción por lotes (modeling/predict.py)."""
+
+# Clave del scope ASGI con el instante de llegada de la petición (ver MetricsMiddleware)
+REQUEST_START = 'metrics.request_start'
+
+
+class StageTimer:
+    """
+    Mide la duración de etapas consecutivas: cada `lap` cierra la etapa que empezó en el `lap`
+    anterior (o al crear el temporizador), de modo que las etapas suman el tiempo total.
+
+    Parameters:
+    start (float): Instante inicial según time.perf_counter (por defecto, ahora).
+    """
+    __slots__ = ('stages', '_last')
+
+    def __init__(self, start=None):
+        self.stages = []
+        self._last = time.perf_counter() if start is None else start
+
+    def lap(self, stage):
+        """Cierra la etapa en curso con el nombre `stage`."""
+        now = time.perf_counter()
+        self.stages.append((stage, now - self._last))
+        self._last = now
+
+
+class Histogram:
+    """
+    Histograma de buckets fijos.
+
+    Parameters:
+    buckets (tuple): Límites superiores ordenados; un último bucket implícito (+Inf) recoge el resto.
+    """
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """
+        Estima un cuantil interpolando dentro de su bucket, como histogram_quantile de Prometheus.
+
+        Parameters:
+        q (float): Cuantil entre 0 y 1.
+
+        Returns:
+        float: El cuantil estimado (NaN si no hay observaciones). Si cae en el bucket +Inf se
+        devuelve el último límite finito.
+        """
+        if not self.count:
+            return math.nan
+        rank = q * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            if cumulative + count >= rank and count:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+
+class MetricsRegistry:
+    """
+    Histogramas y contadores con etiquetas, seguros entre hilos.
+
+    Parameters:
+    definitions (dict): Nombre de la métrica -> (tipo 'histogram' o 'counter', descripción,
+        nombres de las etiquetas), como API_METRICS.
+    buckets (tuple): Límites de los histogramas, en segundos.
+    """
+
+    def __init__(self, definitions, buckets=Config.METRICS_BUCKETS):
+        self.definitions = definitions
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {name: {} for name in definitions}
+
+    def observe(self, name, labels, value):
+        """
+        Registra una observación en el histograma `name`.
+
+        Parameters:
+        name (str): Nombre de la métrica.
+        labels (tuple): Valores de las etiquetas, en el orden de la definición.
+        value (float): Valor observado (segundos).
+        """
+        series = self._series[name]
+        with self._lock:
+            histogram = series.get(labels)
+            if histogram is None:
+                histogram = series[labels] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def inc(self, name, labels, amount=1):
+        """Suma `amount` al contador `name` con los valores de etiquetas `labels`."""
+        series = self._series[name]
+        with self._lock:
+            series[labels] = series.get(labels, 0) + amount
+
+    def record_stages(self, timer, labels=(), stage_metric=STAGE_SECONDS):
+        """
+        Registra las etapas de un StageTimer en un histograma cuya última etiqueta es 'stage'.
+
+        Parameters:
+        timer (StageTimer): Temporizador con las etapas medidas.
+        labels (tuple): Valores de las demás etiquetas del histograma.
+        stage_metric (str): Histograma donde se registran las etapas.
+        """
+        series = self._series[stage_metric]
+        buckets = self.buckets
+        # Un solo bloqueo para todas las etapas: es la llamada más frecuente de la API
+        with self._lock:
+            for stage, seconds in timer.stages:
+                key = labels + (stage,)
+                histogram = series.get(key)
+                if histogram is None:
+                    histogram = series[key] = Histogram(buckets)
+                histogram.counts[bisect_left(buckets, seconds)] += 1
+                histogram.sum += seconds
+                histogram.count += 1
+
+    def reset(self):
+        """Descarta todas las observaciones."""
+        with self._lock:
+            for series in self._series.values():
+                series.clear()
+
+    def snapshot(self):
+        """
+        Copia de las series registradas.
+
+        Returns:
+        dict: Nombre de la métrica -> {valores de etiquetas: Histogram o número}.
+        """
+        with self._lock:
+            snapshot = {}
+            for name, series in self._series.items():
+                copied = {}
+                for labels, value in series.items():
+                    if isinstance(value, Histogram):
+                        histogram = Histogram(value.buckets)
+                        histogram.counts = list(value.counts)
+                        histogram.sum, histogram.count = value.sum, value.count
+                        value = histogram
+                    copied[labels] = value
+                snapshot[name] = copied
+            return snapshot
+
+    def render(self):
+        """
+        Genera el texto de exposición de Prometheus (versión 0.0.4).
+
+        Returns:
+        str: Las métricas con sus líneas HELP y TYPE; los buckets de los histogramas son acumulados.
+        """
+        pid = str(os.getpid())
+        lines = []
+        for name, series in self.snapshot().items():
+            kind, description, label_names = self.definitions[name]
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in sorted(series.items()):
+                pairs = list(zip(label_names, labels)) + [('pid', pid)]
+                if kind == 'counter':
+                    lines.append(f'{name}{_format_labels(pairs)} {_format_value(value)}')
+                    continue
+                cumulative = 0
+                for bound, count in zip(value.buckets + (math.inf,), value.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == math.inf else repr(bound)
+                    lines.append(f'{name}_bucket{_format_labels(pairs + [("le", le)])} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(pairs)} {_format_value(value.sum)}')
+                lines.append(f'{name}_count{_format_labels(pairs)} {value.count}')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self, name=STAGE_SECONDS):
+        """
+        Resume un histograma por combinación de etiquetas.
+
+        Parameters:
+        name (str): Nombre del histograma.
+
+        Returns:
+        list: Un diccionario por serie con sus etiquetas, el número de observaciones, el total
+        en segundos, la fracción del total del histograma y la media, p50 y p95 en milisegundos
+        (cuantiles estimados a partir de los buckets).
+        """
+        label_names = self.definitions[name][2]
+        series = self.snapshot()[name]
+        total = sum(histogram.sum for histogram in series.values())
+        rows = []
+        for labels, histogram in series.items():
+            row = dict(zip(label_names, labels))
+            row.update({'count': histogram.count, 'seconds': histogram.sum,
+                        'share': histogram.sum / total if total > 0 else math.nan,
+                        'mean_ms': histogram.sum / histogram.count * 1000,
+                        'p50_ms': histogram.quantile(0.5) * 1000,
+                        'p95_ms': histogram.quantile(0.95) * 1000})
+            rows.append(row)
+        return rows
+
+
+def _format_labels(pairs):
+    escaped = (f'{key}="{_escape(value)}"' for key, value in pairs)
+    return '{' + ','.join(escaped) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que registra la duración total y el código de estado de cada petición HTTP.
+
+    Guarda el instante de llegada en scope[REQUEST_START] para que los endpoints midan la
+    etapa de lectura y validación del cuerpo (ver StageTimer). La etiqueta 'endpoint' es la
+    plantilla de la ruta ('other' si ninguna coincide), para no crear una serie por URL.
+
+    Parameters:
+    app: Aplicación ASGI.
+    registry (MetricsRegistry): Registro con el histograma REQUEST_SECONDS.
+    """
+
+    def __init__(self, app, registry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        scope[REQUEST_START] = start
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get('route')
+            labels = (route.path if route is not None else 'other', str(status))
+            self.registry.observe(REQUEST_SECONDS, labels, time.perf_counter() - start)
+
+
+_SUMMARY_FIELDS = ('count', 'seconds', 'share', 'mean_ms', 'p50_ms', 'p95_ms')
+
+
+def format_summary(rows):
+    """
+    Formatea el resultado de MetricsRegistry.summary como una tabla de texto.
+
+    Parameters:
+    rows (list): Filas de MetricsRegistry.summary.
+
+    Returns:
+    str: Una línea por serie, ordenadas por tiempo total descendente.
+    """
+    lines = [f"{'etapa':<24}{'n':>8}{'total s':>10}{'%':>7}{'media ms':>10}{'p50 ms':>9}{'p95 ms':>9}"]
+    for row in sorted(rows, key=lambda r: r['seconds'], reverse=True):
+        name = '/'.join(str(row[key]) for key in row if key not in _SUMMARY_FIELDS)
+        lines.append(f"{name:<24}{row['count']:>8}{row['seconds']:>10.3f}{row['share']:>7.1%}"
+                     f"{row['mean_ms']:>10.2f}{row['p50_ms']:>9.2f}{row['p95_ms']:>9.2f}")
+    return '\n'.join(lines)
+
@@ -0,0 +1,223 @@
+"""Carga del modelo entrenado con caché y recarga en caliente.
+
+El pipeline deserializado se mantiene en memoria y sólo se vuelve a cargar cuando
+cambia el archivo en disco (fecha de modificación, tamaño y hash md5). La comprobación y
+la recarga se hacen en un hilo de fondo (ModelLoader.watch); el modelo nuevo se publica con
+una única asignación, de modo que las peticiones en curso terminan con el modelo anterior y
+ninguna paga el tiempo de la recarga. Sin hilo de vigilancia (por ejemplo, en
+modeling/predict.py), `get` comprueba el archivo como mucho cada `check_interval` segundos
+sin esperar a una recarga en curso.
+"""
+from collections import namedtuple
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+import joblib
+
+from config import Config
+
+LoadedModel = namedtuple('LoadedModel', ['model', 'version', 'extra'])
+"""
+Modelo cargado: el pipeline, su versión (hash md5 del archivo) y los artefactos derivados
+por la función `prepare` del cargador (None si no se definió).
+"""
+
+
+def file_md5(path, chunk_size=1 << 20):
+    """
+    Calcula el hash md5 de un archivo, igual que el registrado por DVC en dvc.lock.
+
+    Parameters:
+    path (str): Ruta del archivo.
+    chunk_size (int): Tamaño de los bloques de lectura en bytes.
+
+    Returns:
+    str: El hash md5 en hexadecimal.
+    """
+    md5 = hashlib.md5()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            md5.update(block)
+    return md5.hexdigest()
+
+
+def save_model(model, path=Config.MODEL_PATH, before_publish=None):
+    """
+    Guarda un modelo de forma atómica: se escribe en un archivo temporal del mismo
+    directorio y después se reemplaza el destino, por lo que un lector nunca ve un
+    archivo a medio escribir.
+
+    Parameters:
+    model: Modelo a serializar con joblib.
+    path (str): Ruta de destino.
+    before_publish (callable): Función opcional que recibe la versión (hash md5) del archivo
+        escrito y se ejecuta antes de reemplazar el destino, para generar artefactos asociados
+        a esa versión antes de que los lectores la vean.
+
+    Returns:
+    str: La versión (hash md5) del modelo guardado.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_', suffix='.pkl')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            joblib.dump(model, f)
+        version = file_md5(tmp_path)
+        if before_publish is not None:
+            before_publish(version)
+        os.replace(tmp_path, path)
+        return version
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ModelLoader:
+    """
+    Mantiene en caché el modelo de `path` y lo recarga cuando el archivo cambia: desde `watch`
+    si hay un hilo de vigilancia o, si no, desde `get` cada `check_interval` segundos.
+
+    Parameters:
+    path (str): Ruta del modelo serializado con joblib.
+    prepare (callable): Función opcional que recibe el modelo cargado y su versión y devuelve
+        artefactos derivados (por ejemplo, el pipeline compilado); se ejecuta una vez por versión.
+    check_interval (float): Segundos mínimos entre comprobaciones del archivo en disco.
+    mmap_mode (str): Modo de memoria mapeada de joblib.load para los arreglos de NumPy del
+        modelo (None para copiarlos en memoria).
+    """
+
+    def __init__(self, path=Config.MODEL_PATH, prepare=None,
+                 check_interval=Config.MODEL_RELOAD_INTERVAL, mmap_mode=Config.MODEL_MMAP_MODE):
+        self.path = path
+        self.prepare = prepare
+        self.check_interval = check_interval
+        self.mmap_mode = mmap_mode
+        self._current = None
+        self._stat = None
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self._watchers = 0
+
+    def get(self):
+        """
+        Devuelve el modelo vigente. Lo carga si todavía no hay ninguno; después, las versiones
+        nuevas las publica `watch` desde otro hilo o, si no se está ejecutando, esta misma
+        llamada como mucho cada `check_interval` segundos (sin esperar si otro hilo ya está
+        recargando).
+
+        Returns:
+        LoadedModel: El modelo vigente. Quien lo obtiene puede seguir usándolo aunque
+        otro hilo publique una versión nueva.
+
+        Raises:
+        FileNotFoundError: Si el modelo nunca se pudo cargar porque el archivo no existe.
+        """
+        current = self._current
+        if current is None:
+            self.refresh()
+            current = self._current
+        elif not self._watchers and time.monotonic() - self._last_check >= self.check_interval:
+            self.refresh(blocking=False)
+            current = self._current
+        return current
+
+    def watch(self, stop, on_publish=None):
+        """
+        Comprueba el archivo cada `check_interval` segundos y publica las versiones nuevas
+        hasta que se active `stop`. Se ejecuta en un hilo de fondo del proceso que sirve el
+        modelo, por lo que el hash, joblib.load y `prepare` nunca se ejecutan en una petición.
+        Si todavía no hay ningún modelo (por ejemplo, el archivo aún no existe), sigue
+        intentando cargarlo.
+
+        Parameters:
+        stop (threading.Event): Evento que detiene la vigilancia.
+        on_publish (callable): Función opcional que recibe cada LoadedModel publicado.
+        """
+        with self._lock:
+            self._watchers += 1
+        try:
+            while not stop.wait(self.check_interval):
+                try:
+                    published = self.refresh()
+                except Exception as e:
+                    # Sólo ocurre si todavía no hay ningún modelo cargado
+                    print(f"No se pudo cargar el modelo {self.path}: {e}")
+                    continue
+                if published and on_publish is not None:
+                    on_publish(self._current)
+        finally:
+            with self._lock:
+                self._watchers -= 1
+
+    def refresh(self, blocking=True):
+        """
+        Comprueba el archivo en disco y carga una versión nueva si cambió.
+
+        Si la recarga falla se conserva el modelo anterior; sólo se propaga el error
+        cuando todavía no hay ningún modelo cargado.
+
+        Parameters:
+        blocking (bool): Si es False y otro hilo está recargando, no espera y devuelve False.
+
+        Returns:
+        bool: True si se publicó una versión nueva del modelo.
+        """
+        if not self._lock.acquire(blocking=blocking):
+            return False
+        try:
+            self._last_check = time.monotonic()
+            try:
+                stat = self._file_stat()
+                if self._current is not None and stat == self._stat:
+                    return False
+                version = file_md5(self.path)
+                if self._current is not None and version == self._current.version:
+                    self._stat = stat
+                    return False
+                # save_model reemplaza el archivo (otro inodo), por lo que la versión anterior
+                # sigue mapeada y válida mientras se use
+                model = joblib.load(self.path, mmap_mode=self.mmap_mode)
+                extra = self.prepare(model, version) if self.prepare is not None else None
+            except Exception as e:
+                if self._current is None:
+                    raise
+                print(f"Error al recargar el modelo {self.path}, se conserva la versión "
+                      f"{self._current.version}: {e}")
+                return False
+            # Publicación atómica: una sola asignación de referencia
+            self._current = LoadedModel(model, version, extra)
+            self._stat = stat
+            print(f"Modelo {self.path} cargado (versión {version})")
+            return True
+        finally:
+            self._lock.release()
+
+    def _file_stat(self):
+        stat = os.stat(self.path)
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+_loaders = {}
+_loaders_lock = threading.Lock()
+
+
+def get_model_loader(path=Config.MODEL_PATH):
+    """
+    Devuelve el cargador compartido del proceso para la ruta indicada.
+
+    Parameters:
+    path (str): Ruta del modelo serializado.
+
+    Returns:
+    ModelLoader: El cargador asociado a `path`.
+    """
+    key = os.path.abspath(path)
+    with _loaders_lock:
+        if key not in _loaders:
+            _loaders[key] = ModelLoader(key)
+        return _loaders[key]
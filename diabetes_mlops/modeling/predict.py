@@ -1,7 +1,10 @@
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import sys
 import os
+import time
 import pandas as pd
-import joblib
 
 # Añadir el directorio raíz que contiene config.py al sys.path
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -10,9 +13,18 @@ config_path = os.path.join(root_dir, 'diabetes_mlops')  # Ajustar la ruta para e
 sys.path.insert(0, config_path)
 
 from config import Config  # Importar el archivo de configuración
+from dataset import iter_processed_chunks, processed_data_path, read_processed
+from inference import model_steps
+from lookup import get_prediction_table, predict_with_table
+from metrics import BATCH_METRICS, ROWS_TOTAL, STAGE_SECONDS, MetricsRegistry, StageTimer, format_summary
+from model_loader import get_model_loader
+from profiling import add_profile_argument, profile_stage
 
-# Definir la ruta del archivo de datos de entrada
-input_data_path = os.path.join(root_dir, 'data', 'processed', 'diabetes_data_upload.csv')
+# Definir la ruta del archivo de datos de entrada (Parquet si existe, si no CSV)
+input_data_path = processed_data_path()
+
+# Columnas que necesita el modelo; el resto no se lee
+feature_columns = Config.NUMERIC_FEATURES + Config.CATEGORICAL_FEATURES
 
 # Definir la ruta de salida de las predicciones
 output_dir = os.path.join(root_dir, 'data', 'predictions')
@@ -21,13 +33,17 @@ if not os.path.exists(output_dir):
 
 output_path = os.path.join(output_dir, 'predictions.csv')
 
+# Duración de cada etapa de las predicciones de este proceso (ver print_summary)
+stage_metrics = MetricsRegistry(BATCH_METRICS)
+
 # Definir la función de predicción
 def predict(new_data):
     """Realiza predicciones utilizando un modelo previamente entrenado.
 
-    Esta función carga el modelo desde el archivo especificado en la configuración,
-    verifica que las columnas de los datos de entrada coincidan con las esperadas y
-    realiza predicciones sobre los nuevos datos.
+    Esta función obtiene el modelo especificado en la configuración desde el cargador
+    compartido (que sólo lo deserializa de nuevo si el archivo cambió), verifica que las
+    columnas de los datos de entrada coincidan con las esperadas y realiza predicciones
+    sobre los nuevos datos.
 
     Args:
         new_data (pd.DataFrame): Un DataFrame que contiene los datos sobre los que se realizarán las predicciones.
@@ -38,9 +54,55 @@ def predict(new_data):
     Returns:
         np.ndarray: Un array con las predicciones generadas por el modelo.
     """
-    # Cargar el modelo entrenado desde el archivo almacenado
-    model = joblib.load(Config.MODEL_PATH)
+    timer = StageTimer()
+    # Obtener el modelo entrenado (en caché mientras el archivo no cambie)
+    current = get_model_loader(Config.MODEL_PATH).get()
+    timer.lap('load')
+
+    # Realizar predicciones
+    predictions = predict_with_model(current.model, new_data, current_table(current), timer)
+
+    # Convertir predicciones a un DataFrame para guardarlo como CSV
+    df_predictions = pd.DataFrame(predictions, columns=['Prediction'])
+    df_predictions.to_csv(output_path, index=False)
+    timer.lap('write')
+    record_batch(timer.stages, len(predictions))
+
+    return predictions
 
+def record_batch(stages, n_rows, registry=stage_metrics):
+    """Registra las etapas (nombre, segundos) y las filas de un bloque de predicciones."""
+    for stage, seconds in stages:
+        registry.observe(STAGE_SECONDS, (stage,), seconds)
+    registry.inc(ROWS_TOTAL, (), n_rows)
+
+def print_summary():
+    """Imprime el tiempo de cada etapa acumulado en stage_metrics."""
+    rows = stage_metrics.snapshot()[ROWS_TOTAL].get((), 0)
+    print(f"Etapas de la predicción ({rows} filas):")
+    print(format_summary(stage_metrics.summary()))
+
+def current_table(current):
+    """Tabla precalculada de predicciones de la versión cargada del modelo, si existe."""
+    return get_prediction_table(current.version) if Config.USE_LOOKUP_TABLE else None
+
+def predict_with_model(model, new_data, table=None, timer=None):
+    """Verifica las columnas de entrada y realiza predicciones con el modelo indicado.
+
+    Args:
+        model (Pipeline): Modelo entrenado.
+        new_data (pd.DataFrame): Datos sobre los que se realizarán las predicciones.
+        table (PredictionTable): Tabla precalculada de la versión del modelo; los registros
+            fuera de su dominio se evalúan con el modelo.
+        timer (StageTimer): Temporizador donde se registran las etapas 'lookup' o
+            'preprocess' y 'classify' (None para no medirlas).
+
+    Raises:
+        ValueError: Si faltan columnas en los datos de entrada que son necesarias para las predicciones.
+
+    Returns:
+        np.ndarray: Un array con las predicciones generadas por el modelo.
+    """
     # Verificar si las columnas de entrada coinciden con las esperadas (nueva forma)
     try:
         expected_cols = model.feature_names_in_
@@ -52,21 +114,137 @@ def predict(new_data):
     if missing_cols:
         raise ValueError(f"Las siguientes columnas faltan en new_data: {missing_cols}")
 
-    # Realizar predicciones
-    predictions = model.predict(new_data)
+    if table is not None:
+        predictions = predict_with_table(model, table, new_data)[0]
+        if timer is not None:
+            timer.lap('lookup')
+        return predictions
+    if timer is None:
+        return model.predict(new_data)
+    transform, classifier = model_steps(model)
+    X = transform(new_data) if transform is not None else new_data
+    timer.lap('preprocess')
+    predictions = classifier.predict(X)
+    timer.lap('classify')
+    return predictions
 
-    # Convertir predicciones a un DataFrame para guardarlo como CSV
-    df_predictions = pd.DataFrame(predictions, columns=['Prediction'])
-    df_predictions.to_csv(output_path, index=False)
+def _init_worker(model_path):
+    """Precarga el modelo en el cargador compartido de cada proceso del pool."""
+    get_model_loader(model_path).get()
 
-    return predictions
+def _predict_chunk(model_path, chunk):
+    """Evalúa un bloque con el modelo precargado del proceso actual; devuelve también sus etapas."""
+    timer = StageTimer()
+    current = get_model_loader(model_path).get()
+    predictions = predict_with_model(current.model, chunk, current_table(current), timer)
+    return predictions, timer.stages
+
+def predict_streaming(input_path=input_data_path, output_path=output_path,
+                      chunksize=Config.PREDICT_CHUNKSIZE, n_workers=Config.PREDICT_WORKERS,
+                      model_path=Config.MODEL_PATH):
+    """Realiza predicciones por bloques sin cargar todo el archivo de entrada en memoria.
+
+    Lee la entrada (CSV o Parquet) en bloques de `chunksize` filas, los evalúa en un pool de `n_workers`
+    procesos (cada uno con el modelo precargado) y escribe las predicciones de forma
+    incremental y en el orden de entrada. Sólo se mantienen en memoria a la vez unos
+    pocos bloques por proceso.
+
+    Args:
+        input_path (str): Ruta de los datos de entrada (CSV o Parquet).
+        output_path (str): Ruta del CSV de predicciones.
+        chunksize (int): Número de filas por bloque.
+        n_workers (int): Número de procesos; con 1 se evalúa en el proceso actual.
+        model_path (str): Ruta del modelo entrenado.
+
+    Raises:
+        ValueError: Si faltan columnas en los datos de entrada que son necesarias para las predicciones.
+
+    Returns:
+        dict: Número de filas evaluadas, segundos transcurridos, filas por segundo y el resumen
+        de las etapas (MetricsRegistry.summary; con varios procesos las etapas de los bloques se
+        solapan y su suma supera el tiempo transcurrido).
+    """
+    start = time.perf_counter()
+    rows = 0
+    # Etapas de esta llamada (también se acumulan en stage_metrics)
+    chunk_metrics = MetricsRegistry(BATCH_METRICS)
+    # Se escribe en un archivo temporal para no dejar predicciones incompletas si algo falla
+    tmp_path = output_path + '.tmp'
+    reader = iter_processed_chunks(input_path, chunksize, columns=feature_columns)
+    executor = None
+    if n_workers > 1:
+        executor = ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                       initargs=(model_path,))
+    try:
+        with open(tmp_path, 'w', newline='') as out:
+            pending = deque()
+
+            def write_next():
+                nonlocal rows
+                result = pending.popleft()
+                if executor is not None:
+                    result = result.result()
+                predictions, stages = result
+                write_start = time.perf_counter()
+                pd.DataFrame(predictions, columns=['Prediction']).to_csv(
+                    out, index=False, header=(rows == 0))
+                rows += len(predictions)
+                stages = stages + [('write', time.perf_counter() - write_start)]
+                record_batch(stages, len(predictions), chunk_metrics)
+                record_batch(stages, len(predictions))
+
+            read_start = time.perf_counter()
+            for chunk in reader:
+                read = [('read', time.perf_counter() - read_start)]
+                record_batch(read, 0, chunk_metrics)
+                record_batch(read, 0)
+                if executor is None:
+                    pending.append(_predict_chunk(model_path, chunk))
+                else:
+                    pending.append(executor.submit(_predict_chunk, model_path, chunk))
+                # Limitar los bloques en vuelo para mantener la memoria acotada
+                while len(pending) > 2 * max(n_workers, 1) - 1:
+                    write_next()
+                read_start = time.perf_counter()
+            while pending:
+                write_next()
+        os.replace(tmp_path, output_path)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    elapsed = time.perf_counter() - start
+    stats = {'rows': rows, 'seconds': elapsed,
+             'rows_per_sec': rows / elapsed if elapsed > 0 else float('nan'),
+             'stages': chunk_metrics.summary()}
+    print(f"{rows} filas evaluadas en {elapsed:.2f} s ({stats['rows_per_sec']:.0f} filas/s)")
+    print(format_summary(stats['stages']))
+    return stats
 
 # Cargar los datos de entrada y realizar la predicción
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Predicción por lotes con el modelo entrenado")
+    parser.add_argument('--input', default=input_data_path, help="Datos de entrada (CSV o Parquet)")
+    parser.add_argument('--output', default=output_path, help="CSV de predicciones")
+    parser.add_argument('--stream', action='store_true',
+                        help="Evaluar por bloques en paralelo sin cargar toda la entrada en memoria")
+    parser.add_argument('--chunksize', type=int, default=Config.PREDICT_CHUNKSIZE)
+    parser.add_argument('--workers', type=int, default=Config.PREDICT_WORKERS)
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
     try:
-        new_data = pd.read_csv(input_data_path)
-        predict(new_data)
-        print(f"Predicciones guardadas en {output_path}")
+        with profile_stage('predict', args.profile):
+            if args.stream:
+                predict_streaming(args.input, args.output, args.chunksize, args.workers)
+            else:
+                output_path = args.output
+                new_data = read_processed(args.input, columns=feature_columns)
+                predict(new_data)
+                print_summary()
+        print(f"Predicciones guardadas en {args.output}")
     except FileNotFoundError as e:
         print(f"Error: {e}")
     except ValueError as e:
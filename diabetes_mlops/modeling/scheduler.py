@@ -0,0 +1,187 @@
+"""Planificador de entrenamiento en paralelo de las familias de modelos.
+
+Las familias (LogisticRegression, RandomForest, XGBClassifier) se entrenan a la vez, cada
+una en su propio proceso, y el presupuesto total de CPUs (Config.TRAINING_CPUS) se reparte
+entre ellas según Config.TRAINING_CPU_WEIGHTS. Dentro de cada familia las CPUs asignadas se
+dividen entre los procesos de la validación cruzada (n_jobs de la búsqueda) y los hilos
+internos de cada estimador (n_jobs de RandomForest/XGBoost y BLAS/OpenMP, limitados con
+threadpoolctl y joblib.parallel_config), evitando la sobresuscripción.
+
+Cada familia usa la misma semilla y los mismos pliegues que en el entrenamiento secuencial,
+por lo que los resultados no dependen del reparto de CPUs.
+"""
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import time
+
+from joblib import parallel_config
+import psutil
+from threadpoolctl import threadpool_limits
+
+from diabetes_mlops.config import Config
+from diabetes_mlops.modeling.search import build_model_pipeline, build_search
+
+CpuAllocation = namedtuple('CpuAllocation', ['cpus', 'outer_jobs', 'inner_threads'])
+"""
+CPUs asignadas a una familia, procesos de la validación cruzada e hilos internos de cada ajuste.
+"""
+
+FamilyResult = namedtuple('FamilyResult', ['search', 'allocation', 'wall_time', 'cpu_time'])
+"""
+Búsqueda ajustada de una familia, su asignación de CPUs, tiempo de reloj y tiempo de CPU
+(proceso de la familia más sus procesos hijos) en segundos.
+"""
+
+
+def allocate_cpus(model_names, total_cpus=Config.TRAINING_CPUS, weights=Config.TRAINING_CPU_WEIGHTS,
+                  inner_threads=Config.TRAINING_INNER_THREADS):
+    """Reparte el presupuesto de CPUs entre las familias de modelos.
+
+    Cada familia recibe al menos una CPU y el resto se reparte en proporción a su peso
+    (método del mayor resto). Con menos CPUs que familias, cada familia recibe una.
+
+    Args:
+        model_names (list): Familias de modelos a entrenar.
+        total_cpus (int): Presupuesto total de CPUs.
+        weights (dict): Peso relativo del costo de cada familia (1 si no está definido).
+        inner_threads (dict): Hilos internos deseados por ajuste de cada familia (1 si no está definido).
+
+    Returns:
+        dict: Familia -> CpuAllocation.
+    """
+    cpus = {name: 1 for name in model_names}
+    spare = max(total_cpus - len(model_names), 0)
+    if spare:
+        total_weight = sum(weights.get(name, 1) for name in model_names)
+        shares = {name: spare * weights.get(name, 1) / total_weight for name in model_names}
+        for name in model_names:
+            cpus[name] += int(shares[name])
+        remaining = total_cpus - sum(cpus.values())
+        by_remainder = sorted(model_names, key=lambda name: shares[name] - int(shares[name]), reverse=True)
+        for name in by_remainder[:remaining]:
+            cpus[name] += 1
+
+    allocation = {}
+    for name in model_names:
+        inner = max(min(inner_threads.get(name, 1), cpus[name]), 1)
+        allocation[name] = CpuAllocation(cpus[name], max(cpus[name] // inner, 1), inner)
+    return allocation
+
+
+def _fit_family(model_name, model, preprocessor, X_train, y_train, allocation, strategy, cache_dir):
+    start = time.perf_counter()
+    if 'n_jobs' in model.get_params() and model_name in Config.TRAINING_INNER_THREADS:
+        model.set_params(n_jobs=allocation.inner_threads)
+    search = build_search(model_name, build_model_pipeline(preprocessor, model, cache_dir),
+                          strategy, n_jobs=allocation.outer_jobs)
+    # Límite de hilos para el reajuste final (en este proceso) y para los procesos de la CV
+    with threadpool_limits(limits=allocation.inner_threads), \
+            parallel_config(backend='loky', inner_max_num_threads=allocation.inner_threads):
+        search.fit(X_train, y_train)
+    wall_time = time.perf_counter() - start
+    return search, wall_time
+
+
+def _process_tree_cpu_time(process):
+    times = process.cpu_times()
+    total = times.user + times.system + times.children_user + times.children_system
+    for child in process.children(recursive=True):
+        try:
+            child_times = child.cpu_times()
+            total += child_times.user + child_times.system
+        except psutil.NoSuchProcess:
+            pass
+    return total
+
+
+def _fit_family_measured(*args):
+    # Los procesos de la CV (loky) se cierran antes de medir para que su tiempo de CPU
+    # se contabilice en children_user/children_system
+    from joblib.externals.loky import get_reusable_executor
+
+    process = psutil.Process()
+    cpu_start = _process_tree_cpu_time(process)
+    search, wall_time = _fit_family(*args)
+    get_reusable_executor().shutdown(wait=True)
+    return search, wall_time, _process_tree_cpu_time(process) - cpu_start
+
+
+def fit_families(models, preprocessor, X_train, y_train, strategy=Config.SEARCH_STRATEGY,
+                 cache_dir=None, total_cpus=Config.TRAINING_CPUS, parallel=Config.PARALLEL_TRAINING):
+    """Ajusta la búsqueda de hiperparámetros de cada familia de modelos.
+
+    Con `parallel` las familias se ajustan a la vez en procesos separados, con las CPUs
+    repartidas por allocate_cpus; si no, se ajustan una tras otra en este proceso usando
+    todo el presupuesto de CPUs en cada una.
+
+    Args:
+        models (dict): Familia -> estimador sin ajustar (ver search.get_models).
+        preprocessor (ColumnTransformer): Preprocesador sin ajustar.
+        X_train (pd.DataFrame): Características de entrenamiento.
+        y_train (pd.Series): Etiquetas de entrenamiento.
+        strategy (str): Estrategia de búsqueda (ver search.build_search).
+        cache_dir (str): Directorio de la caché de preprocesamiento (None para no usarla).
+        total_cpus (int): Presupuesto total de CPUs.
+        parallel (bool): Ajustar las familias en paralelo.
+
+    Returns:
+        dict: Familia -> FamilyResult, en el orden de `models`. Si una familia falla, su valor
+        es la excepción.
+    """
+    names = list(models)
+    if not parallel:
+        allocation = {name: CpuAllocation(total_cpus, total_cpus, 1) for name in names}
+        results = {}
+        for name in names:
+            try:
+                search, wall_time, cpu_time = _fit_family_measured(
+                    name, models[name], preprocessor, X_train, y_train, allocation[name],
+                    strategy, cache_dir)
+                results[name] = FamilyResult(search, allocation[name], wall_time, cpu_time)
+            except Exception as e:
+                results[name] = e
+        return results
+
+    allocation = allocate_cpus(names, total_cpus)
+    # 'spawn' evita heredar hilos del proceso principal en los procesos de cada familia
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=len(names), mp_context=context) as executor:
+        futures = {name: executor.submit(_fit_family_measured, name, models[name], preprocessor,
+                                         X_train, y_train, allocation[name], strategy, cache_dir)
+                   for name in names}
+        results = {}
+        for name in names:
+            try:
+                search, wall_time, cpu_time = futures[name].result()
+                results[name] = FamilyResult(search, allocation[name], wall_time, cpu_time)
+            except Exception as e:
+                results[name] = e
+    return results
+
+
+def format_report(results):
+    """Describe el tiempo de reloj y la utilización de CPU de cada familia.
+
+    La utilización es el tiempo de CPU dividido entre el tiempo de reloj por las CPUs asignadas.
+
+    Args:
+        results (dict): Resultado de fit_families.
+
+    Returns:
+        str: Una línea por familia.
+    """
+    lines = [f"{'modelo':<20}{'cpus':>5}{'cv':>4}{'hilos':>6}{'reloj (s)':>11}{'cpu (s)':>9}{'uso':>6}"]
+    for name, result in results.items():
+        if isinstance(result, Exception):
+            lines.append(f"{name:<20} error: {result}")
+            continue
+        cpus, outer, inner = result.allocation
+        lines.append(f"{name:<20}{cpus:>5}{outer:>4}{inner:>6}{result.wall_time:>11.1f}"
+                     f"{result.cpu_time:>9.1f}{cpu_utilization(result):>6.0%}")
+    return '\n'.join(lines)
+
+
+def cpu_utilization(result):
+    """Fracción de las CPUs asignadas que una familia usó durante su entrenamiento."""
+    return result.cpu_time / (result.wall_time * result.allocation.cpus)
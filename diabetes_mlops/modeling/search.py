@@ -0,0 +1,503 @@
+"""Modelos, espacios y estrategias de búsqueda y caché de preprocesamiento por pliegue para train.py.
+
+La estrategia de búsqueda se elige con Config.SEARCH_STRATEGY:
+- 'grid': búsqueda exhaustiva (GridSearchCV) sobre PARAM_GRIDS; XGBClassifier usa por
+  defecto el motor nativo de xgb_search.py (Config.XGB_SEARCH_ENGINE).
+- 'halving': successive halving (HalvingGridSearchCV) sobre PARAM_GRIDS; el recurso que se
+  incrementa entre iteraciones es el número de filas o, en los modelos de árboles, n_estimators
+  (Config.HALVING_RESOURCE).
+- 'random': búsqueda aleatoria sobre PARAM_DISTRIBUTIONS con un presupuesto de candidatos y
+  parada temprana cuando el mejor puntaje deja de mejorar (BudgetedRandomSearchCV).
+
+En la búsqueda de hiperparámetros cada candidato vuelve a ajustar el mismo preprocesador
+sobre los mismos pliegues. `CachedTransformer` memoiza en disco (joblib.Memory) el ajuste y
+las transformaciones del preprocesador, de modo que cada pliegue se preprocesa una sola vez
+y se reutiliza en todos los candidatos y en todas las familias de modelos, incluso entre
+los procesos de GridSearchCV(n_jobs=-1).
+
+Entre entrenamientos, `CVResultsStore` guarda en Config.CV_RESULTS_DIR los puntajes por
+pliegue de cada candidato, con una clave que incluye el hash de los datos, la configuración
+del preprocesador, el modelo, los hiperparámetros, los pliegues y Config.RANDOM_STATE. Las
+estrategias 'grid' y 'random' sólo ajustan los candidatos que no están en el almacén; al
+ampliar una grilla sólo se evalúan los puntos nuevos. 'halving' no usa el almacén, porque
+cada iteración evalúa los candidatos con un recurso distinto.
+"""
+from contextlib import contextmanager
+import json
+import os
+import shutil
+import tempfile
+
+import joblib
+import numpy as np
+from scipy.stats import loguniform, randint
+from sklearn.base import BaseEstimator, MetaEstimatorMixin, TransformerMixin, clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import (GridSearchCV, HalvingGridSearchCV, ParameterGrid,
+                                     ParameterSampler, check_cv, cross_val_score)
+from sklearn.pipeline import Pipeline
+from xgboost import XGBClassifier
+
+from diabetes_mlops.config import Config
+
+# Hiperparámetros a evaluar para cada modelo
+PARAM_GRIDS = {
+    'LogisticRegression': {
+        'classifier__C': [0.1, 1, 10, 100],
+        'classifier__solver': ['liblinear', 'lbfgs'],
+        'classifier__max_iter': [100, 200]
+    },
+    'RandomForest': {
+        'classifier__n_estimators': [50, 100, 200],
+        'classifier__max_depth': [10, 20, None],
+        'classifier__min_samples_split': [2, 5, 10]
+    },
+    'XGBClassifier': {
+        'classifier__n_estimators': [50, 100, 200],
+        'classifier__max_depth': [3, 6, 10],
+        'classifier__learning_rate': [0.01, 0.1, 0.2]
+    }
+}
+
+# Espacio de la búsqueda aleatoria: más amplio que PARAM_GRIDS con el mismo número de ajustes
+PARAM_DISTRIBUTIONS = {
+    'LogisticRegression': {
+        'classifier__C': loguniform(1e-2, 1e3),
+        'classifier__solver': ['liblinear', 'lbfgs'],
+        'classifier__max_iter': [100, 200, 500]
+    },
+    'RandomForest': {
+        'classifier__n_estimators': randint(50, 301),
+        'classifier__max_depth': [5, 10, 20, None],
+        'classifier__min_samples_split': randint(2, 11)
+    },
+    'XGBClassifier': {
+        'classifier__n_estimators': randint(50, 301),
+        'classifier__max_depth': randint(3, 11),
+        'classifier__learning_rate': loguniform(1e-2, 3e-1)
+    }
+}
+
+SEARCH_STRATEGIES = ['grid', 'halving', 'random']
+
+
+def get_models():
+    """Crea los modelos a evaluar, sin entrenar.
+
+    Returns:
+        dict: Nombre de la familia de modelos -> estimador.
+    """
+    return {
+        'LogisticRegression': LogisticRegression(class_weight='balanced'),
+        'RandomForest': RandomForestClassifier(class_weight='balanced', random_state=Config.RANDOM_STATE),
+        'XGBClassifier': XGBClassifier(scale_pos_weight=1, eval_metric='logloss')
+    }
+
+
+def _fit_transform(fit_key, transformer, X, y):
+    transformer = clone(transformer)
+    Xt = transformer.fit_transform(X, y)
+    return transformer, Xt
+
+
+def _transform(fit_key, data_key, X, fitted):
+    return fitted.transform(X)
+
+
+class CachedTransformer(TransformerMixin, BaseEstimator):
+    """
+    Envoltorio de un transformador que memoiza en disco su ajuste y sus transformaciones.
+
+    La clave del ajuste es el hash de (transformador sin ajustar, X, y); la de cada
+    transformación es el hash de (clave del ajuste, X). Dos candidatos con el mismo
+    preprocesador y el mismo pliegue comparten así el resultado.
+
+    Parameters:
+    transformer: Transformador a envolver (por ejemplo, el ColumnTransformer de create_pipeline).
+    location (str): Directorio de la caché de joblib.Memory (None desactiva la caché).
+    """
+
+    def __init__(self, transformer, location=None):
+        self.transformer = transformer
+        self.location = location
+
+    def _memory(self):
+        return joblib.Memory(self.location, verbose=0)
+
+    def fit(self, X, y=None):
+        self.fit_transform(X, y)
+        return self
+
+    def fit_transform(self, X, y=None):
+        memory = self._memory()
+        # La clave se calcula una sola vez y joblib.Memory sólo hashea la clave
+        self.fit_key_ = joblib.hash((self.transformer, X, y))
+        fit_transform = memory.cache(_fit_transform, ignore=['transformer', 'X', 'y'])
+        self.transformer_, Xt = fit_transform(self.fit_key_, self.transformer, X, y)
+        return Xt
+
+    def transform(self, X):
+        memory = self._memory()
+        transform = memory.cache(_transform, ignore=['X', 'fitted'])
+        return transform(self.fit_key_, joblib.hash(X), X, self.transformer_)
+
+
+def build_model_pipeline(preprocessor, model, cache_dir=None):
+    """Crea el pipeline ('preprocessor' + 'classifier') que se optimiza en la búsqueda.
+
+    Args:
+        preprocessor (ColumnTransformer): Preprocesador sin ajustar.
+        model: Clasificador sin ajustar.
+        cache_dir (str): Directorio de la caché de preprocesamiento (None para no usarla).
+
+    Returns:
+        Pipeline: El pipeline a optimizar.
+    """
+    if cache_dir is not None:
+        preprocessor = CachedTransformer(preprocessor, location=cache_dir)
+    return Pipeline([
+        ('preprocessor', preprocessor),
+        ('classifier', model)
+    ])
+
+
+def unwrap_pipeline(pipeline):
+    """Sustituye el preprocesador en caché de un pipeline entrenado por el transformador ajustado.
+
+    El modelo guardado y registrado en MLflow mantiene así la estructura habitual, sin
+    depender de la caché.
+
+    Args:
+        pipeline (Pipeline): Pipeline entrenado, con o sin CachedTransformer.
+
+    Returns:
+        Pipeline: El mismo pipeline con el preprocesador ajustado original.
+    """
+    preprocessor = pipeline.named_steps['preprocessor']
+    if isinstance(preprocessor, CachedTransformer):
+        pipeline.steps[0] = ('preprocessor', preprocessor.transformer_)
+    return pipeline
+
+
+@contextmanager
+def preprocessing_cache(enabled=Config.CACHE_PREPROCESSING, cache_dir=Config.PREPROCESSING_CACHE_DIR):
+    """Directorio de la caché de preprocesamiento durante un entrenamiento.
+
+    Args:
+        enabled (bool): Si es False se entrega None y no se usa caché.
+        cache_dir (str): Directorio persistente; si es None se usa un directorio temporal que se
+            elimina al terminar.
+
+    Yields:
+        str: Ruta del directorio de la caché, o None.
+    """
+    if not enabled:
+        yield None
+    elif cache_dir is not None:
+        yield cache_dir
+    else:
+        tmp_dir = tempfile.mkdtemp(prefix='preprocessing_cache_')
+        try:
+            yield tmp_dir
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+class CVResultsStore:
+    """
+    Almacén persistente de los puntajes por pliegue de cada candidato de la validación cruzada.
+
+    Cada candidato se guarda en un archivo JSON cuyo nombre es el hash de (contexto,
+    hiperparámetros); las escrituras son atómicas, por lo que varias familias pueden usar el
+    mismo directorio desde procesos distintos.
+
+    Parameters:
+    location (str): Directorio del almacén.
+    """
+
+    def __init__(self, location=Config.CV_RESULTS_DIR):
+        self.location = location
+
+    @staticmethod
+    def context(estimator, X, y, cv):
+        """
+        Clave de todo lo que determina los puntajes además de los hiperparámetros del candidato.
+
+        Parameters:
+        estimator (Pipeline): Pipeline a optimizar (ver build_model_pipeline).
+        X (pd.DataFrame): Características de entrenamiento.
+        y (pd.Series): Etiquetas de entrenamiento.
+        cv: Pliegues de la validación cruzada (ver check_cv).
+
+        Returns:
+        str: El hash del contexto.
+        """
+        preprocessor = estimator.named_steps['preprocessor']
+        if isinstance(preprocessor, CachedTransformer):
+            preprocessor = preprocessor.transformer
+        classifier = estimator.named_steps['classifier']
+        # n_jobs no cambia los puntajes
+        params = {key: value for key, value in classifier.get_params().items() if key != 'n_jobs'}
+        return joblib.hash((joblib.hash((X, y)), repr(preprocessor.get_params()),
+                            type(classifier).__name__, repr(sorted(params.items())), repr(cv),
+                            Config.RANDOM_STATE))
+
+    def _path(self, context, params):
+        return os.path.join(self.location, joblib.hash((context, repr(sorted(params.items())))) + '.json')
+
+    def get(self, context, params, field='scores'):
+        """Puntajes por pliegue (u otro campo guardado con put) de un candidato, o None si no se ha evaluado."""
+        try:
+            with open(self._path(context, params)) as f:
+                return json.load(f)[field]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, context, params, scores, **fields):
+        """Guarda los puntajes por pliegue de un candidato y campos adicionales serializables en JSON."""
+        os.makedirs(self.location, exist_ok=True)
+        path = self._path(context, params)
+        fd, tmp_path = tempfile.mkstemp(dir=self.location, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'params': repr(params), 'scores': [float(score) for score in scores], **fields}, f)
+        os.replace(tmp_path, path)
+
+
+def _search_results(params_list, scores):
+    # Mismo formato y misma elección del mejor candidato (el primero con el mejor promedio) que
+    # GridSearchCV
+    scores = np.asarray(scores)
+    mean_scores = scores.mean(axis=1)
+    results = {'params': params_list, 'mean_test_score': mean_scores, 'std_test_score': scores.std(axis=1)}
+    for split in range(scores.shape[1]):
+        results[f'split{split}_test_score'] = scores[:, split]
+    results['rank_test_score'] = np.searchsorted(np.sort(-mean_scores), -mean_scores) + 1
+    return results, int(np.argmax(mean_scores))
+
+
+class CachedGridSearchCV(MetaEstimatorMixin, BaseEstimator):
+    """
+    Búsqueda exhaustiva que sólo ajusta los candidatos que no están en un CVResultsStore.
+
+    Los candidatos pendientes se evalúan con GridSearchCV (mismos pliegues y mismos puntajes);
+    los resultados se combinan en el orden de la grilla, por lo que el mejor candidato es el
+    mismo que el de GridSearchCV sobre la grilla completa. Expone los mismos atributos que usa
+    train.py de GridSearchCV y `n_cached_candidates_`.
+
+    Parameters:
+    estimator: Estimador (pipeline) a optimizar.
+    param_grid (dict): Valores de cada hiperparámetro.
+    store (CVResultsStore): Almacén de los puntajes.
+    cv (int): Número de pliegues o generador de validación cruzada.
+    n_jobs (int): Procesos usados para evaluar los candidatos pendientes.
+    """
+
+    def __init__(self, estimator, param_grid, store, cv=Config.CV_FOLDS, n_jobs=None):
+        self.estimator = estimator
+        self.param_grid = param_grid
+        self.store = store
+        self.cv = cv
+        self.n_jobs = n_jobs
+
+    def fit(self, X, y):
+        cv = check_cv(self.cv, y, classifier=True)
+        self.n_splits_ = cv.get_n_splits(X, y)
+        context = self.store.context(self.estimator, X, y, cv)
+        params_list = list(ParameterGrid(self.param_grid))
+        scores = [self.store.get(context, params) for params in params_list]
+        missing = [i for i, fold_scores in enumerate(scores) if fold_scores is None]
+        if missing:
+            search = GridSearchCV(self.estimator, [{key: [value] for key, value in params_list[i].items()}
+                                                   for i in missing],
+                                  cv=cv, n_jobs=self.n_jobs, refit=False)
+            search.fit(X, y)
+            for position, i in enumerate(missing):
+                scores[i] = [search.cv_results_[f'split{split}_test_score'][position]
+                             for split in range(self.n_splits_)]
+                self.store.put(context, params_list[i], scores[i])
+        self.n_cached_candidates_ = len(params_list) - len(missing)
+        self.cv_results_, self.best_index_ = _search_results(params_list, scores)
+        self.best_params_ = params_list[self.best_index_]
+        self.best_score_ = float(self.cv_results_['mean_test_score'][self.best_index_])
+        self.best_estimator_ = clone(self.estimator).set_params(**self.best_params_).fit(X, y)
+        return self
+
+    def predict(self, X):
+        return self.best_estimator_.predict(X)
+
+    def score(self, X, y):
+        return self.best_estimator_.score(X, y)
+
+
+class BudgetedRandomSearchCV(MetaEstimatorMixin, BaseEstimator):
+    """
+    Búsqueda aleatoria de hiperparámetros con presupuesto y parada temprana.
+
+    Evalúa con validación cruzada como máximo `n_iter` candidatos muestreados de
+    `param_distributions` y se detiene antes si el mejor puntaje no mejora más de `tol`
+    durante `patience` candidatos consecutivos. Expone los mismos atributos que usa
+    train.py de GridSearchCV (best_estimator_, best_params_, best_score_ y cv_results_).
+
+    Parameters:
+    estimator: Estimador (pipeline) a optimizar.
+    param_distributions (dict): Listas de valores o distribuciones de scipy.stats por parámetro.
+    n_iter (int): Número máximo de candidatos evaluados.
+    patience (int): Candidatos consecutivos sin mejora antes de detenerse (None para no detenerse).
+    tol (float): Mejora mínima del puntaje para reiniciar la paciencia.
+    cv (int): Número de pliegues o generador de validación cruzada.
+    n_jobs (int): Procesos usados para evaluar los pliegues de cada candidato.
+    random_state (int): Semilla del muestreo de candidatos.
+    store (CVResultsStore): Almacén de puntajes de entrenamientos anteriores (None para no usarlo).
+    """
+
+    def __init__(self, estimator, param_distributions, n_iter=Config.RANDOM_SEARCH_BUDGET,
+                 patience=Config.RANDOM_SEARCH_PATIENCE, tol=Config.RANDOM_SEARCH_TOL,
+                 cv=Config.CV_FOLDS, n_jobs=None, random_state=Config.RANDOM_STATE, store=None):
+        self.estimator = estimator
+        self.param_distributions = param_distributions
+        self.n_iter = n_iter
+        self.patience = patience
+        self.tol = tol
+        self.cv = cv
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.store = store
+
+    def fit(self, X, y):
+        # Mismos pliegues para todos los candidatos
+        cv = check_cv(self.cv, y, classifier=True)
+        self.n_splits_ = cv.get_n_splits(X, y)
+        context = self.store.context(self.estimator, X, y, cv) if self.store is not None else None
+        self.n_cached_candidates_ = 0
+        params_list = []
+        scores = []
+        best_score = -np.inf
+        without_improvement = 0
+        for params in ParameterSampler(self.param_distributions, self.n_iter,
+                                       random_state=self.random_state):
+            fold_scores = self.store.get(context, params) if context is not None else None
+            if fold_scores is not None:
+                self.n_cached_candidates_ += 1
+            else:
+                candidate = clone(self.estimator).set_params(**params)
+                fold_scores = cross_val_score(candidate, X, y, cv=cv, n_jobs=self.n_jobs)
+                if context is not None:
+                    self.store.put(context, params, fold_scores)
+            fold_scores = np.asarray(fold_scores)
+            params_list.append(params)
+            scores.append(fold_scores)
+            score = fold_scores.mean()
+            if score > best_score + self.tol:
+                best_score = score
+                without_improvement = 0
+            else:
+                without_improvement += 1
+                if self.patience is not None and without_improvement >= self.patience:
+                    break
+
+        scores = np.asarray(scores)
+        mean_scores = scores.mean(axis=1)
+        self.cv_results_ = {'params': params_list, 'mean_test_score': mean_scores,
+                            'std_test_score': scores.std(axis=1)}
+        self.best_index_ = int(np.argmax(mean_scores))
+        self.best_params_ = params_list[self.best_index_]
+        self.best_score_ = float(mean_scores[self.best_index_])
+        self.stopped_early_ = len(params_list) < self.n_iter
+        self.best_estimator_ = clone(self.estimator).set_params(**self.best_params_).fit(X, y)
+        return self
+
+    def predict(self, X):
+        return self.best_estimator_.predict(X)
+
+    def score(self, X, y):
+        return self.best_estimator_.score(X, y)
+
+
+def build_search(model_name, model_pipeline, strategy=Config.SEARCH_STRATEGY, n_jobs=-1,
+                 halving_resource=Config.HALVING_RESOURCE, results_dir=Config.CV_RESULTS_DIR,
+                 xgb_engine=Config.XGB_SEARCH_ENGINE):
+    """Crea la búsqueda de hiperparámetros de una familia de modelos con la estrategia indicada.
+
+    Args:
+        model_name (str): Familia de modelos (clave de PARAM_GRIDS).
+        model_pipeline (Pipeline): Pipeline a optimizar (ver build_model_pipeline).
+        strategy (str): 'grid', 'halving' o 'random' (ver SEARCH_STRATEGIES).
+        n_jobs (int): Procesos de la validación cruzada.
+        halving_resource (str): Recurso de successive halving ('n_samples' o 'n_estimators').
+        results_dir (str): Directorio del CVResultsStore de 'grid' y 'random' (None para no usarlo).
+        xgb_engine (str): Motor de la búsqueda 'grid' de XGBClassifier ('native' o 'sklearn').
+
+    Returns:
+        GridSearchCV | CachedGridSearchCV | XGBNativeSearchCV | HalvingGridSearchCV |
+        BudgetedRandomSearchCV: La búsqueda sin ajustar.
+
+    Raises:
+        ValueError: Si la estrategia no existe.
+    """
+    store = CVResultsStore(results_dir) if results_dir is not None else None
+    if strategy == 'grid' and model_name == 'XGBClassifier' and xgb_engine == 'native':
+        from diabetes_mlops.modeling.xgb_search import XGBNativeSearchCV
+
+        return XGBNativeSearchCV(model_pipeline, PARAM_GRIDS[model_name], n_jobs=n_jobs, store=store)
+    if strategy == 'grid':
+        if store is not None:
+            return CachedGridSearchCV(model_pipeline, PARAM_GRIDS[model_name], store, n_jobs=n_jobs)
+        return GridSearchCV(model_pipeline, PARAM_GRIDS[model_name], cv=Config.CV_FOLDS, n_jobs=n_jobs)
+    if strategy == 'halving':
+        param_grid = dict(PARAM_GRIDS[model_name])
+        resource_kwargs = {'resource': 'n_samples'}
+        resource = 'classifier__n_estimators'
+        if halving_resource == 'n_estimators' and resource in param_grid:
+            # El número de árboles deja de ser un hiperparámetro y pasa a ser el recurso
+            n_estimators = param_grid.pop(resource)
+            resource_kwargs = {'resource': resource, 'min_resources': min(n_estimators),
+                               'max_resources': max(n_estimators)}
+        return HalvingGridSearchCV(model_pipeline, param_grid, factor=Config.HALVING_FACTOR,
+                                   cv=Config.CV_FOLDS, n_jobs=n_jobs,
+                                   random_state=Config.RANDOM_STATE, **resource_kwargs)
+    if strategy == 'random':
+        return BudgetedRandomSearchCV(model_pipeline, PARAM_DISTRIBUTIONS[model_name], n_jobs=n_jobs,
+                                      store=store)
+    raise ValueError(f"Estrategia de búsqueda desconocida: {strategy}. Opciones: {SEARCH_STRATEGIES}")
+
+
+def search_space(search):
+    """Espacio de hiperparámetros que explora realmente una búsqueda creada con build_search.
+
+    Args:
+        search: Búsqueda sin ajustar (ver build_search).
+
+    Returns:
+        dict: Hiperparámetro -> valores posibles: una lista, un range de enteros o una
+        distribución de scipy.stats (cuyos valores posibles son los de su soporte).
+    """
+    if hasattr(search, 'param_distributions'):
+        return dict(search.param_distributions)
+    space = dict(search.param_grid)
+    resource = getattr(search, 'resource', 'n_samples')
+    if resource != 'n_samples':
+        # Successive halving con n_estimators como recurso: toma valores entre los extremos
+        space[resource] = range(search.min_resources, search.max_resources + 1)
+    n_estimators = 'classifier__n_estimators'
+    if getattr(search, 'early_stopping_rounds', None) and n_estimators in space:
+        # Con parada temprana, n_estimators de la grilla es sólo el máximo de rondas
+        space[n_estimators] = range(1, max(space[n_estimators]) + 1)
+    return space
+
+
+def count_fits(search):
+    """Número de ajustes de validación cruzada realizados por una búsqueda ya ajustada.
+
+    Args:
+        search: Búsqueda ajustada (ver build_search).
+
+    Returns:
+        int: Candidatos evaluados por número de pliegues, sin contar el reajuste final ni los
+        candidatos tomados del CVResultsStore. XGBNativeSearchCV informa sus boosters entrenados.
+    """
+    if hasattr(search, 'n_fits_'):
+        return search.n_fits_
+    n_candidates = len(search.cv_results_['params']) - getattr(search, 'n_cached_candidates_', 0)
+    return n_candidates * search.n_splits_
@@ -1,13 +1,7 @@
-import mlflow
-import mlflow.sklearn
+import argparse
 import sys
 import os
-import joblib
-from sklearn.model_selection import train_test_split, GridSearchCV
-from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import RandomForestClassifier
-from xgboost import XGBClassifier
-from sklearn.pipeline import Pipeline
+from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, accuracy_score, f1_score
 
 # Asegurarse de que las rutas de los módulos sean correctas
@@ -15,16 +9,30 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
 from diabetes_mlops.config import Config
-from diabetes_mlops.dataset import load_data, preprocess_data
+from diabetes_mlops.dataset import load_processed_data, preprocess_data
 from diabetes_mlops.features import create_pipeline, test_feature_engineering_process
-
-def train_model():
+from diabetes_mlops.lookup import build_prediction_table
+from diabetes_mlops.model_loader import save_model
+from diabetes_mlops.profiling import add_profile_argument, profile_stage
+from diabetes_mlops.tracking import AsyncTracker
+from diabetes_mlops.modeling.scheduler import cpu_utilization, fit_families, format_report
+from diabetes_mlops.modeling.search import (build_model_pipeline, build_search, count_fits, get_models,
+                                            preprocessing_cache, search_space, unwrap_pipeline)
+from diabetes_mlops.modeling.warm_start import WarmStartFit, load_previous_models, warm_start_families
+
+def train_model(warm_start=Config.WARM_START):
     """Entrena y evalúa modelos de clasificación para la predicción de diabetes.
 
     Esta función carga los datos, los preprocesa, separa características y etiquetas,
     divide los datos en conjuntos de entrenamiento y prueba, crea un pipeline de preprocesamiento,
-    entrena varios modelos (Logistic Regression, Random Forest, XGBoost) utilizando Grid Search para la
-    optimización de hiperparámetros, y registra los resultados y modelos en MLflow.
+    entrena varios modelos (Logistic Regression, Random Forest, XGBoost) utilizando la estrategia de
+    búsqueda de Config.SEARCH_STRATEGY para la optimización de hiperparámetros, y registra los
+    resultados y modelos en MLflow.
+
+    Args:
+        warm_start (bool): Reentrenar de forma incremental a partir de los modelos anteriores
+            y usar la búsqueda sólo en las familias sin modelo anterior o cuyo f1 empeora
+            (ver modeling/warm_start.py).
 
     Raises:
         Exception: Si ocurre un error durante el proceso de carga, preprocesamiento, 
@@ -33,7 +41,7 @@ def train_model():
     try:
         # Cargar y preprocesar los datos
         print("Cargando y preprocesando los datos...")
-        data = load_data()
+        data = load_processed_data()
         data = preprocess_data(data)
 
         print(f"Dimensiones del dataset después del preprocesamiento: {data.shape}")
@@ -73,35 +81,16 @@ def train_model():
     else:
         print("Pruebas de FEP pasadas corréctamente")
 
-    # Modelos a evaluar
-    models = {
-        'LogisticRegression': LogisticRegression(class_weight='balanced'),
-        'RandomForest': RandomForestClassifier(class_weight='balanced', random_state=Config.RANDOM_STATE),
-        'XGBClassifier': XGBClassifier(scale_pos_weight=1, eval_metric='logloss')
-    }
-
-    # Hiperparámetros a evaluar para cada modelo
-    param_grids = {
-        'LogisticRegression': {
-            'classifier__C': [0.1, 1, 10, 100],
-            'classifier__solver': ['liblinear', 'lbfgs'],
-            'classifier__max_iter': [100, 200]
-        },
-        'RandomForest': {
-            'classifier__n_estimators': [50, 100, 200],
-            'classifier__max_depth': [10, 20, None],
-            'classifier__min_samples_split': [2, 5, 10]
-        },
-        'XGBClassifier': {
-            'classifier__n_estimators': [50, 100, 200],
-            'classifier__max_depth': [3, 6, 10],
-            'classifier__learning_rate': [0.01, 0.1, 0.2]
-        }
-    }
-
-    # Iniciar MLflow para el tracking de experimentos
-    mlflow.set_tracking_uri(Config.MLFLOW_URI)
-    mlflow.set_experiment("Diabetes Prediction")
+    # Modelos a evaluar (modeling/search.py)
+    models = get_models()
+
+    # Los modelos anteriores se cargan antes de crear el tracker: así mlflow se importa en este
+    # hilo y no a la vez que en el hilo del tracker (importación circular de mlflow.tracking)
+    previous_models = load_previous_models(list(models)) if warm_start else None
+
+    # Iniciar MLflow para el tracking de experimentos. Los runs se suben en segundo plano
+    # y se guardan en disco si el servidor no responde (ver tracking.py)
+    tracker = AsyncTracker(Config.MLFLOW_URI, Config.MLFLOW_EXPERIMENT)
 
     best_model = None
     best_score = 0
@@ -110,44 +99,68 @@ def train_model():
     # Entrenar y evaluar cada modelo
     for model_name, model in models.items():
         try:
-            print(f"Entrenando el modelo {model_name}...")
-            model_pipeline = Pipeline([
-                ('preprocessor', preprocessor),
-                ('classifier', model)
-            ])
-
-            # Búsqueda de hiperparámetros con GridSearch
-            grid_search = GridSearchCV(model_pipeline, param_grids[model_name], cv=Config.CV_FOLDS, n_jobs=-1)
-            
-            try:
-                # Pruebas de parámetros de modelo
-                test_model_params(param_grids[model_name], model_name)
-            except Exception as ae:
-                print("Error en las pruebas de parámetros de modelo: ", ae)
-            else:
-                print("Pruebas de parámteros de modelo CORRECTAS")
-
-            with mlflow.start_run(run_name=model_name):
-                # Entrenar el modelo
-                grid_search.fit(X_train, y_train)
+            # Pruebas de parámetros de modelo sobre el espacio que explora la estrategia configurada
+            search = build_search(model_name, build_model_pipeline(preprocessor, model), Config.SEARCH_STRATEGY)
+            test_model_params(search_space(search), model_name)
+        except Exception as ae:
+            print("Error en las pruebas de parámetros de modelo: ", ae)
+        else:
+            print("Pruebas de parámteros de modelo CORRECTAS")
+
+    # Las familias se entrenan a la vez repartiendo Config.TRAINING_CPUS (modeling/scheduler.py).
+    # El preprocesamiento de cada pliegue se ajusta una sola vez y se comparte entre
+    # todos los candidatos y familias de modelos
+    results = {}
+    pending = models
+    if warm_start:
+        print("Reentrenando de forma incremental a partir de los modelos anteriores...")
+        results, pending = warm_start_families(models, preprocessor, X_train, y_train,
+                                               previous_models=previous_models)
+    if pending:
+        print(f"Entrenando los modelos {', '.join(pending)}...")
+        with preprocessing_cache() as cache_dir:
+            results.update(fit_families(pending, preprocessor, X_train, y_train, Config.SEARCH_STRATEGY,
+                                        cache_dir))
+    results = {name: results[name] for name in models}
+    print(format_report(results))
+
+    # Los runs de MLflow se registran de forma secuencial, en el orden de los modelos
+    for model_name, result in results.items():
+        try:
+            if isinstance(result, Exception):
+                raise result
+            search = result.search
+
+            with tracker.start_run(model_name) as run:
+                best_estimator = unwrap_pipeline(search.best_estimator_)
 
                 # Evaluar el modelo en el conjunto de prueba
-                y_pred = grid_search.best_estimator_.predict(X_test)
+                y_pred = best_estimator.predict(X_test)
                 score = f1_score(y_test, y_pred)
 
                 # Loggear resultados y el modelo en MLflow
-                mlflow.log_params(grid_search.best_params_)
-                mlflow.log_metric("accuracy", accuracy_score(y_test, y_pred))
-                mlflow.log_metric("f1_score", score)
-                mlflow.sklearn.log_model(grid_search.best_estimator_, "model")
+                run.log_params(search.best_params_)
+                if isinstance(search, WarmStartFit):
+                    run.log_param("search_strategy", "warm_start")
+                    run.log_metric("warm_start_baseline_f1", search.baseline_score_)
+                    run.log_metric("warm_start_validation_f1", search.validation_score_)
+                else:
+                    run.log_param("search_strategy", Config.SEARCH_STRATEGY)
+                run.log_metric("search_fits", count_fits(search))
+                run.log_metric("cached_candidates", getattr(search, 'n_cached_candidates_', 0))
+                run.log_metric("train_wall_seconds", result.wall_time)
+                run.log_metric("train_cpu_utilization", cpu_utilization(result))
+                run.log_metric("accuracy", accuracy_score(y_test, y_pred))
+                run.log_metric("f1_score", score)
+                run.log_model(best_estimator, "model")
 
                 print(f"Modelo {model_name} entrenado con f1_score: {score}")
 
                 # Guardar el mejor modelo si tiene mejor rendimiento
                 if score > best_score:
-                    best_model = grid_search.best_estimator_
+                    best_model = best_estimator
                     best_score = score
-                    best_params = grid_search.best_params_
+                    best_params = search.best_params_
 
                 try:
                     # Pruebas de exactitud
@@ -160,12 +173,18 @@ def train_model():
             print(f"Error en el modelo {model_name}: {e}")
             continue
 
+
     # Guardar el mejor modelo entrenado con DVC
     if best_model:
         try:
-            # Cambiar la ruta para guardar el modelo en la carpeta 'models' en la raíz del proyecto
-            model_path = os.path.join("models", Config.MODEL_PATH)
-            joblib.dump(best_model, model_path)
+            # Misma ruta resuelta que leen la API, predict.py y el reentrenamiento incremental
+            model_path = Config.MODEL_PATH
+            # Escritura atómica para que la API recargue el modelo sin leer un archivo incompleto
+            # Opcionalmente se precalcula la tabla de predicciones antes de publicar el modelo
+            before_publish = None
+            if Config.BUILD_LOOKUP_TABLE:
+                before_publish = lambda version: build_prediction_table(best_model, version)
+            save_model(best_model, model_path, before_publish=before_publish)
             print(f"Mejor modelo guardado en {model_path} con f1_score: {best_score}")
             print(f"Mejores parámetros: {best_params}")
         except Exception as e:
@@ -173,6 +192,9 @@ def train_model():
     else:
         print("No se encontró un modelo con mejor rendimiento.")
 
+    # Esperar a que se suban los runs de MLflow (como máximo Config.TRACKING_FLUSH_TIMEOUT s)
+    tracker.close()
+
 
 def test_accuracy(y_test, y_pred):
     """
@@ -203,7 +225,8 @@ def test_model_params(params, model_name):
     Verifica que los parámetros utilizados en la validación cruzada estén habilitados para el modelo especificado.
 
     Parameters:
-    params (dict): Diccionario con los parámetros utilizados en la validación cruzada.
+    params (dict): Espacio de la búsqueda de hiperparámetros (ver search.search_space): listas,
+        range de enteros o distribuciones de scipy.stats por parámetro.
     model_name (str): Nombre del modelo al que corresponden los parámetros.
 
     Returns:
@@ -213,11 +236,23 @@ def test_model_params(params, model_name):
     AssertionError: Si algún parámetro utilizado en la validación cruzada no está habilitado en la configuración.
     """
     for param_name, param_value in Config.ENABLED_PARAMS[model_name].items():
+        values = params[param_name]
+        if hasattr(values, 'support'):
+            # Distribución de la búsqueda aleatoria: el valor debe estar en su soporte
+            low, high = values.support()
+            values = [param_value] if low <= param_value <= high else []
         try:
-            assert param_value in params[param_name],\
+            assert param_value in values,\
             "El parámetro {} para el modelo {} = {} no se contempla dentro de la CV".format(param_name, param_value, model_name)
         except AssertionError as ae:
             raise(ae)
 
 if __name__ == '__main__':
-    train_model()
+    parser = argparse.ArgumentParser(description="Entrena y registra los modelos de clasificación")
+    parser.add_argument('--warm-start', action='store_true', default=Config.WARM_START,
+                        help="Reentrenar a partir de los modelos anteriores (ver modeling/warm_start.py)")
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
+    with profile_stage('train', args.profile):
+        train_model(warm_start=args.warm_start)
@@ -0,0 +1,250 @@
+"""Reentrenamiento incremental (warm start) de las familias de modelos para train.py.
+
+Con Config.WARM_START (o train.py --warm-start) cada familia parte de su modelo anterior en
+lugar de repetir la búsqueda de hiperparámetros:
+- El modelo anterior de cada familia es el de su último run terminado en MLflow o, si MLflow
+  no está disponible, el modelo guardado en Config.MODEL_PATH (sólo para su familia).
+- Se reutiliza el preprocesador ya ajustado y los hiperparámetros del modelo anterior; sólo
+  se vuelve a ajustar el clasificador sobre los datos nuevos:
+  - XGBClassifier: continúa el boosting desde el booster anterior con
+    Config.WARM_START_EXTRA_ESTIMATORS rondas más, mientras no se supere
+    Config.WARM_START_MAX_ESTIMATORS (en ese caso, búsqueda completa).
+  - RandomForest: warm_start=True, conserva los árboles anteriores y agrega
+    Config.WARM_START_EXTRA_ESTIMATORS árboles ajustados con los datos nuevos. Al llegar a
+    Config.WARM_START_MAX_ESTIMATORS, los árboles nuevos reemplazan a los más antiguos.
+  - LogisticRegression: warm_start=True, parte de los coeficientes anteriores (el solver
+    liblinear no lo soporta y vuelve a ajustar desde cero, que en este modelo es barato).
+- La decisión se toma con una partición de validación del conjunto de entrenamiento
+  (Config.WARM_START_VALIDATION_SIZE), nunca con el conjunto de prueba: el modelo se
+  reentrena con el resto del entrenamiento y, si su f1 de validación cae más de
+  Config.WARM_START_F1_TOLERANCE respecto del modelo anterior evaluado en las mismas filas, o
+  si el modelo anterior no es compatible (otro preprocesamiento u otras columnas), la familia
+  vuelve a la búsqueda completa de scheduler.fit_families. Si se acepta, el modelo final se
+  reentrena desde el anterior con todo el conjunto de entrenamiento.
+
+Como la partición de validación se vuelve a muestrear con los datos nuevos, puede contener
+filas con las que se entrenó el modelo anterior: su f1 de referencia es optimista, por lo que
+la comparación tiende a preferir la búsqueda completa.
+"""
+import copy
+import os
+import tempfile
+import time
+
+import joblib
+from sklearn.base import clone
+from sklearn.metrics import f1_score
+from sklearn.model_selection import train_test_split
+from xgboost import XGBClassifier
+
+from diabetes_mlops.config import Config
+from diabetes_mlops.modeling.scheduler import CpuAllocation, FamilyResult
+from diabetes_mlops.modeling.search import PARAM_GRIDS, get_models
+
+
+def family_of(pipeline):
+    """Familia de modelos (clave de get_models) del clasificador de un pipeline, o None."""
+    for name, model in get_models().items():
+        if type(pipeline.named_steps['classifier']) is type(model):
+            return name
+    return None
+
+
+def load_mlflow_models(model_names, tracking_uri=Config.MLFLOW_URI, experiment_name=Config.MLFLOW_EXPERIMENT):
+    """Carga el modelo del último run terminado de cada familia en MLflow.
+
+    Args:
+        model_names (list): Familias de modelos (nombres de los runs de train.py).
+        tracking_uri (str): URI del servidor de MLflow.
+        experiment_name (str): Experimento de los runs.
+
+    Returns:
+        dict: Familia -> pipeline entrenado. Vacío si MLflow no está instalado o no responde.
+    """
+    try:
+        import mlflow.sklearn
+        from mlflow.tracking import MlflowClient
+
+        client = MlflowClient(tracking_uri)
+        experiment = client.get_experiment_by_name(experiment_name)
+    except Exception as e:
+        print(f"No se pudieron consultar los modelos anteriores en MLflow: {e}")
+        return {}
+    if experiment is None:
+        return {}
+
+    models = {}
+    for name in model_names:
+        try:
+            runs = client.search_runs([experiment.experiment_id],
+                                      filter_string=f"attributes.run_name = '{name}' "
+                                                    "and attributes.status = 'FINISHED'",
+                                      order_by=['attributes.start_time DESC'], max_results=1)
+            if not runs:
+                continue
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                model_dir = client.download_artifacts(runs[0].info.run_id, 'model', tmp_dir)
+                models[name] = mlflow.sklearn.load_model(model_dir)
+        except Exception as e:
+            print(f"No se pudo cargar el modelo anterior de {name} desde MLflow: {e}")
+    return models
+
+
+def load_previous_models(model_names, model_path=Config.MODEL_PATH, tracking_uri=Config.MLFLOW_URI,
+                         experiment_name=Config.MLFLOW_EXPERIMENT):
+    """Modelo anterior de cada familia: el de MLflow o, en su defecto, el modelo guardado.
+
+    Args:
+        model_names (list): Familias de modelos.
+        model_path (str): Ruta del modelo guardado por train.py.
+        tracking_uri (str): URI del servidor de MLflow.
+        experiment_name (str): Experimento de los runs.
+
+    Returns:
+        dict: Familia -> pipeline entrenado, sólo para las familias con un modelo anterior.
+    """
+    models = load_mlflow_models(model_names, tracking_uri, experiment_name)
+    if os.path.exists(model_path) and len(models) < len(model_names):
+        pipeline = joblib.load(model_path)
+        name = family_of(pipeline)
+        if name in model_names and name not in models:
+            models[name] = pipeline
+    return models
+
+
+def is_compatible(previous, preprocessor, X):
+    """Indica si el preprocesador ajustado de un pipeline anterior se puede reutilizar con `X`.
+
+    Args:
+        previous (Pipeline): Pipeline anterior ('preprocessor' + 'classifier').
+        preprocessor (ColumnTransformer): Preprocesador sin ajustar del entrenamiento actual.
+        X (pd.DataFrame): Características de entrenamiento actuales.
+
+    Returns:
+        bool: True si ambos preprocesadores tienen los mismos parámetros y las mismas columnas de entrada.
+    """
+    fitted = previous.named_steps['preprocessor']
+    same_params = repr(clone(fitted).get_params()) == repr(preprocessor.get_params())
+    return same_params and list(getattr(fitted, 'feature_names_in_', [])) == list(X.columns)
+
+
+class WarmStartFit:
+    """
+    Reentrenamiento incremental de un pipeline anterior sobre datos nuevos.
+
+    Expone los mismos atributos que usa train.py de las búsquedas de search.py
+    (best_estimator_, best_params_, cv_results_ y n_splits_), sin candidatos evaluados.
+
+    Parameters:
+    model_name (str): Familia de modelos (clave de PARAM_GRIDS).
+    previous (Pipeline): Pipeline anterior ya entrenado; no se modifica.
+    extra_estimators (dict): Árboles o rondas de boosting que se agregan por familia.
+    max_estimators (dict): Máximo de árboles o rondas de boosting por familia.
+    """
+
+    def __init__(self, model_name, previous, extra_estimators=Config.WARM_START_EXTRA_ESTIMATORS,
+                 max_estimators=Config.WARM_START_MAX_ESTIMATORS):
+        self.model_name = model_name
+        self.previous = previous
+        self.extra_estimators = extra_estimators
+        self.max_estimators = max_estimators
+
+    def fit(self, X, y):
+        pipeline = copy.deepcopy(self.previous)
+        classifier = pipeline.named_steps['classifier']
+        Xt = pipeline.named_steps['preprocessor'].transform(X)
+        extra = self.extra_estimators.get(self.model_name, 0)
+        limit = self.max_estimators.get(self.model_name)
+        if isinstance(classifier, XGBClassifier):
+            # Boosting continuado: `extra` rondas nuevas a partir de los árboles anteriores
+            rounds = classifier.get_booster().num_boosted_rounds()
+            if limit is not None and rounds + extra > limit:
+                # Las rondas dependen de las anteriores: no se pueden descartar las más antiguas
+                raise ValueError(f"{rounds} rondas más {extra} superan el máximo de {limit}")
+            booster = classifier.get_booster()
+            classifier = clone(classifier).set_params(n_estimators=extra)
+            classifier.fit(Xt, y, xgb_model=booster)
+            classifier.set_params(n_estimators=rounds + extra)
+            pipeline.steps[-1] = ('classifier', classifier)
+        elif limit is not None and 'n_estimators' in classifier.get_params() \
+                and classifier.n_estimators + extra > limit:
+            # Ventana de árboles: `extra` árboles nuevos reemplazan a los más antiguos. La semilla
+            # depende de los árboles vigentes para no repetir los de entrenamientos anteriores
+            seed = int(joblib.hash([tree.random_state for tree in classifier.estimators_])[:8], 16)
+            new = clone(classifier).set_params(n_estimators=min(extra, limit), random_state=seed).fit(Xt, y)
+            keep = limit - len(new.estimators_)
+            classifier.estimators_ = classifier.estimators_[len(classifier.estimators_) - keep:] + new.estimators_
+            classifier.set_params(n_estimators=limit)
+        else:
+            if 'n_estimators' in classifier.get_params():
+                classifier.set_params(n_estimators=classifier.n_estimators + extra)
+            classifier.set_params(warm_start=True).fit(Xt, y)
+            # El modelo guardado se vuelve a ajustar desde cero si alguien llama a fit
+            classifier.set_params(warm_start=False)
+
+        params = classifier.get_params()
+        self.best_estimator_ = pipeline
+        self.best_params_ = {key: params[key.split('__', 1)[1]] for key in PARAM_GRIDS[self.model_name]}
+        self.cv_results_ = {'params': []}
+        self.n_splits_ = 0
+        return self
+
+    def predict(self, X):
+        return self.best_estimator_.predict(X)
+
+
+def warm_start_families(models, preprocessor, X_train, y_train, tolerance=Config.WARM_START_F1_TOLERANCE,
+                        previous_models=None, validation_size=Config.WARM_START_VALIDATION_SIZE):
+    """Reentrena de forma incremental las familias con un modelo anterior compatible.
+
+    Args:
+        models (dict): Familia -> estimador sin ajustar (ver search.get_models).
+        preprocessor (ColumnTransformer): Preprocesador sin ajustar del entrenamiento actual.
+        X_train (pd.DataFrame): Características de entrenamiento.
+        y_train (pd.Series): Etiquetas de entrenamiento.
+        tolerance (float): Caída máxima del f1 de validación respecto del modelo anterior.
+        previous_models (dict): Familia -> pipeline anterior (por defecto, load_previous_models).
+        validation_size (float): Proporción de X_train con la que se decide entre el modelo
+            reentrenado y la búsqueda completa.
+
+    Returns:
+        tuple: (resultados, pendientes). `resultados` es un dict familia -> FamilyResult cuyo
+        `search` es un WarmStartFit con los atributos adicionales `baseline_score_` y
+        `validation_score_`; `pendientes` es el dict familia -> estimador de las familias que
+        requieren la búsqueda completa.
+    """
+    if previous_models is None:
+        previous_models = load_previous_models(list(models))
+    X_fit, X_val, y_fit, y_val = train_test_split(X_train, y_train, test_size=validation_size,
+                                                  random_state=Config.RANDOM_STATE, stratify=y_train)
+    results = {}
+    pending = {}
+    for name, model in models.items():
+        previous = previous_models.get(name)
+        if previous is None or not is_compatible(previous, preprocessor, X_train):
+            print(f"{name}: sin modelo anterior compatible, se usa la búsqueda completa")
+            pending[name] = model
+            continue
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            candidate = WarmStartFit(name, previous).fit(X_fit, y_fit)
+        except Exception as e:
+            print(f"{name}: error en el reentrenamiento incremental ({e}), se usa la búsqueda completa")
+            pending[name] = model
+            continue
+        baseline_score = f1_score(y_val, previous.predict(X_val))
+        validation_score = f1_score(y_val, candidate.predict(X_val))
+        if validation_score < baseline_score - tolerance:
+            print(f"{name}: el f1 de validación cayó de {baseline_score:.4f} a {validation_score:.4f}, "
+                  "se usa la búsqueda completa")
+            pending[name] = model
+            continue
+        # Modelo final: el mismo reentrenamiento con todo el conjunto de entrenamiento
+        search = WarmStartFit(name, previous).fit(X_train, y_train)
+        search.baseline_score_ = baseline_score
+        search.validation_score_ = validation_score
+        wall_time = time.perf_counter() - start
+        cpu_time = time.process_time() - cpu_start
+        results[name] = FamilyResult(search, CpuAllocation(1, 1, 1), wall_time, cpu_time)
+    return results, pending
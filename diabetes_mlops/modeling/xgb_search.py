@@ -0,0 +1,174 @@
+"""Búsqueda de hiperparámetros de XGBoost con la API nativa (xgboost.train).
+
+Con GridSearchCV, cada candidato y cada pliegue vuelven a preprocesar los datos, a construir
+la matriz de XGBoost y a entrenar los `n_estimators` árboles completos. XGBNativeSearchCV:
+- Preprocesa cada pliegue y construye sus matrices (QuantileDMatrix, con los cortes del
+  histograma calculados una sola vez) una vez por búsqueda, compartidas por todos los candidatos.
+- Entrena con tree_method='hist'.
+- Trata n_estimators como una dimensión con parada temprana: para cada combinación de los
+  demás hiperparámetros se entrena un solo booster por pliegue con el mayor n_estimators de la
+  grilla, que se detiene cuando la pérdida de validación no mejora en
+  Config.XGB_EARLY_STOPPING_ROUNDS rondas. Cada valor de n_estimators se evalúa con las
+  primeras min(n_estimators, mejor iteración + 1) rondas (iteration_range), es decir, con
+  n_estimators como límite superior de la parada temprana.
+- El modelo final es un Pipeline de scikit-learn ('preprocessor' + XGBClassifier) ajustado
+  sobre todos los datos con el número de rondas promedio de los pliegues del mejor candidato,
+  por lo que se guarda con joblib y se registra en MLflow igual que los de las demás búsquedas.
+
+El puntaje es la exactitud, el mismo de GridSearchCV con el scoring por defecto. Como la
+parada temprana usa el pliegue de validación, el puntaje de validación cruzada es algo
+optimista respecto del de GridSearchCV.
+"""
+import joblib
+from joblib import Parallel, delayed
+import numpy as np
+from sklearn.base import BaseEstimator, MetaEstimatorMixin, clone
+from sklearn.model_selection import ParameterGrid, check_cv
+import xgboost as xgb
+
+from diabetes_mlops.config import Config
+from diabetes_mlops.modeling.search import _search_results
+
+N_ESTIMATORS = 'classifier__n_estimators'
+
+
+def native_params(classifier):
+    """
+    Parámetros de xgboost.train equivalentes a los de un XGBClassifier, con tree_method='hist'.
+
+    Parameters:
+    classifier (XGBClassifier): Clasificador sin ajustar.
+
+    Returns:
+    dict: Parámetros nativos (sin n_estimators).
+    """
+    params = {key: value for key, value in classifier.get_xgb_params().items() if value is not None}
+    params['nthread'] = params.pop('n_jobs', None) or 1
+    if 'random_state' in params:
+        params['seed'] = params.pop('random_state')
+    params['tree_method'] = Config.XGB_TREE_METHOD
+    params.setdefault('eval_metric', 'logloss')
+    return params
+
+
+def _fold_matrices(preprocessor, X, y, train, test):
+    preprocessor = clone(preprocessor)
+    X_train = preprocessor.fit_transform(X.iloc[train], y.iloc[train])
+    X_test = preprocessor.transform(X.iloc[test])
+    dtrain = xgb.QuantileDMatrix(X_train, label=np.asarray(y.iloc[train], dtype=np.float32))
+    dtest = xgb.QuantileDMatrix(X_test, label=np.asarray(y.iloc[test], dtype=np.float32), ref=dtrain)
+    return dtrain, dtest, np.asarray(y.iloc[test])
+
+
+def _fit_fold(params, n_values, early_stopping_rounds, dtrain, dtest, y_test):
+    booster = xgb.train(params, dtrain, num_boost_round=max(n_values), evals=[(dtest, 'validation')],
+                        early_stopping_rounds=early_stopping_rounds, verbose_eval=False)
+    # Sin parada temprana, best_iteration no está definido
+    stop = booster.best_iteration + 1 if early_stopping_rounds else booster.num_boosted_rounds()
+    scores = []
+    rounds = []
+    for n in n_values:
+        n_rounds = min(n, stop)
+        # Misma regla de decisión que XGBClassifier.predict en clasificación binaria
+        y_pred = booster.predict(dtest, iteration_range=(0, n_rounds)) > 0.5
+        scores.append(float(np.mean(y_pred == y_test)))
+        rounds.append(n_rounds)
+    return scores, rounds
+
+
+class XGBNativeSearchCV(MetaEstimatorMixin, BaseEstimator):
+    """
+    Búsqueda exhaustiva de XGBoost con matrices compartidas por pliegue y parada temprana.
+
+    Expone los mismos atributos que usa train.py de GridSearchCV, además de `n_fits_`
+    (boosters entrenados) y `n_cached_candidates_`. A diferencia de GridSearchCV, `best_params_`
+    contiene el n_estimators del modelo final (`best_n_estimators_`), no el de la grilla.
+
+    Parameters:
+    estimator (Pipeline): Pipeline ('preprocessor' + XGBClassifier) a optimizar.
+    param_grid (dict): Valores de cada hiperparámetro (con el prefijo 'classifier__').
+    cv (int): Número de pliegues o generador de validación cruzada.
+    n_jobs (int): Hilos que entrenan boosters a la vez; cada uno usa los n_jobs del XGBClassifier.
+    early_stopping_rounds (int): Rondas sin mejora de la pérdida de validación antes de detenerse
+        (None para entrenar siempre el mayor n_estimators).
+    store (CVResultsStore): Almacén de puntajes de entrenamientos anteriores (None para no usarlo).
+    """
+
+    def __init__(self, estimator, param_grid, cv=Config.CV_FOLDS, n_jobs=None,
+                 early_stopping_rounds=Config.XGB_EARLY_STOPPING_ROUNDS, store=None):
+        self.estimator = estimator
+        self.param_grid = param_grid
+        self.cv = cv
+        self.n_jobs = n_jobs
+        self.early_stopping_rounds = early_stopping_rounds
+        self.store = store
+
+    def _context(self, X, y, cv):
+        # Los puntajes con parada temprana difieren de los de GridSearchCV
+        return joblib.hash((self.store.context(self.estimator, X, y, cv), 'xgb_native',
+                            Config.XGB_TREE_METHOD, self.early_stopping_rounds))
+
+    def fit(self, X, y):
+        cv = check_cv(self.cv, y, classifier=True)
+        folds = list(cv.split(X, y))
+        self.n_splits_ = len(folds)
+        classifier = self.estimator.named_steps['classifier']
+        params_list = list(ParameterGrid(self.param_grid))
+        context = self._context(X, y, cv) if self.store is not None else None
+
+        # Candidatos agrupados por los hiperparámetros distintos de n_estimators, en el orden de la grilla
+        groups = {}
+        for i, params in enumerate(params_list):
+            key = tuple(sorted((name, value) for name, value in params.items() if name != N_ESTIMATORS))
+            groups.setdefault(key, []).append(i)
+
+        scores = [None] * len(params_list)
+        rounds = [None] * len(params_list)
+        if context is not None:
+            for i, params in enumerate(params_list):
+                scores[i] = self.store.get(context, params)
+                rounds[i] = self.store.get(context, params, 'rounds')
+        pending = [(key, indices) for key, indices in groups.items()
+                   if any(scores[i] is None or rounds[i] is None for i in indices)]
+        self.n_cached_candidates_ = len(params_list) - sum(len(indices) for _, indices in pending)
+        self.n_fits_ = len(pending) * self.n_splits_
+
+        if pending:
+            default_n = classifier.n_estimators or 100
+            matrices = [_fold_matrices(self.estimator.named_steps['preprocessor'], X, y, train, test)
+                        for train, test in folds]
+            tasks = []
+            for key, indices in pending:
+                params = native_params(clone(classifier).set_params(
+                    **{name.split('__', 1)[1]: value for name, value in key}))
+                n_values = [params_list[i].get(N_ESTIMATORS, default_n) for i in indices]
+                tasks += [(params, n_values, fold) for fold in matrices]
+            # Hilos explícitos: las QuantileDMatrix no se pueden serializar, y `prefer` no
+            # basta cuando el planificador fija backend='loky' con parallel_config
+            results = Parallel(n_jobs=self.n_jobs, backend='threading')(
+                delayed(_fit_fold)(params, n_values, self.early_stopping_rounds, *fold)
+                for params, n_values, fold in tasks)
+            for group, (key, indices) in enumerate(pending):
+                group_results = results[group * self.n_splits_:(group + 1) * self.n_splits_]
+                for position, i in enumerate(indices):
+                    scores[i] = [fold_scores[position] for fold_scores, _ in group_results]
+                    rounds[i] = [fold_rounds[position] for _, fold_rounds in group_results]
+                    if context is not None:
+                        self.store.put(context, params_list[i], scores[i], rounds=rounds[i])
+
+        self.cv_results_, self.best_index_ = _search_results(params_list, scores)
+        self.cv_results_['mean_rounds'] = np.array([np.mean(r) for r in rounds])
+        self.best_score_ = float(self.cv_results_['mean_test_score'][self.best_index_])
+        # Modelo final con el número de rondas de la parada temprana; best_params_ describe ese
+        # modelo (el n_estimators de la grilla queda en cv_results_['params'][best_index_])
+        self.best_n_estimators_ = max(int(round(self.cv_results_['mean_rounds'][self.best_index_])), 1)
+        self.best_params_ = dict(params_list[self.best_index_], **{N_ESTIMATORS: self.best_n_estimators_})
+        self.best_estimator_ = clone(self.estimator).set_params(
+            classifier__tree_method=Config.XGB_TREE_METHOD, **self.best_params_).fit(X, y)
+        return self
+
+    def predict(self, X):
+        return self.best_estimator_.predict(X)
+
+    def score(self, X, y):
+        return self.best_estimator_.score(X, y)
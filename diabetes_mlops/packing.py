@@ -0,0 +1,147 @@
+"""Representación compacta de registros con características binarias.
+
+Todas las características de Config.CATEGORICAL_FEATURES tienen exactamente dos opciones
+en Config.SCHEMA, por lo que un registro completo se reduce a la edad (uint8) más una
+máscara de 15 bits (uint16): el bit i vale 1 cuando la característica i toma la segunda
+opción del esquema ('Yes' para los síntomas, 'Female' para Gender).
+"""
+import numpy as np
+import pandas as pd
+
+from config import Config
+
+PACKED_FEATURES = list(Config.CATEGORICAL_FEATURES)
+"""
+Características empaquetadas en la máscara, en el orden de sus bits.
+"""
+
+MASK_COLUMN = 'mask'
+
+PACKED_DTYPE = np.dtype([('Age', np.uint8), (MASK_COLUMN, np.uint16), ('class', np.bool_)])
+"""
+Tipo estructurado de un registro empaquetado (4 bytes), usado también para guardarlo en .npy.
+"""
+
+
+def _check_schema():
+    for column in PACKED_FEATURES:
+        options = Config.SCHEMA[column][Config.OPTIONS]
+        if len(options) != 2:
+            raise ValueError(f"La columna {column} no es binaria: {options}")
+    if len(PACKED_FEATURES) > 16:
+        raise ValueError("La máscara uint16 admite como máximo 16 características binarias")
+    age_range = Config.SCHEMA['Age'][Config.RANGE]
+    if age_range[Config.MIN] < 0 or age_range[Config.MAX] > np.iinfo(np.uint8).max:
+        raise ValueError("El rango de Age no cabe en uint8")
+
+
+_check_schema()
+
+
+def pack_columns(data):
+    """
+    Empaqueta las columnas de entrada sin lanzar errores, marcando los registros no representables.
+
+    Parameters:
+    data (dict o pd.DataFrame): Columnas de Config.NUMERIC_FEATURES y Config.CATEGORICAL_FEATURES.
+
+    Returns:
+    tuple: (age, mask, valid) con la edad (int64), la máscara (uint16) y un arreglo bool que
+    indica qué registros tienen una edad entre 0 y 255 y valores dentro de las opciones del esquema.
+    """
+    age = np.asarray(data['Age'], dtype=np.int64)
+    valid = (age >= 0) & (age <= np.iinfo(np.uint8).max)
+    mask = np.zeros(len(age), dtype=np.uint16)
+    for bit, column in enumerate(PACKED_FEATURES):
+        off_value, on_value = Config.SCHEMA[column][Config.OPTIONS]
+        values = data[column]
+        if not isinstance(values, (pd.Series, np.ndarray)):
+            values = np.asarray(values, dtype=object)
+        on = np.asarray(values == on_value, dtype=bool)
+        valid &= on | np.asarray(values == off_value, dtype=bool)
+        mask |= on.astype(np.uint16) << np.uint16(bit)
+    return age, mask, valid
+
+
+def pack_records(data):
+    """
+    Empaqueta un DataFrame con la estructura original en columnas 'Age' (uint8) y 'mask' (uint16).
+
+    Parameters:
+    data (pd.DataFrame): Registros con las columnas de Config.NUMERIC_FEATURES y
+        Config.CATEGORICAL_FEATURES y, opcionalmente, 'class' (texto o bool).
+
+    Returns:
+    pd.DataFrame: Columnas 'Age', 'mask' y, si existe en la entrada, 'class' (bool).
+
+    Raises:
+    ValueError: Si alguna columna contiene valores fuera de las opciones del esquema o Age
+        está fuera del rango de uint8.
+    """
+    age, mask, valid = pack_columns(data)
+    if not valid.all():
+        row = int(np.flatnonzero(~valid)[0])
+        raise ValueError(f"El registro {row} no se puede empaquetar: Age fuera de uint8 o "
+                         "valores fuera de las opciones de Config.SCHEMA")
+    packed = pd.DataFrame({'Age': age.astype(np.uint8), MASK_COLUMN: mask}, index=data.index)
+    if 'class' in data.columns:
+        labels = data['class']
+        packed['class'] = labels.to_numpy(dtype=bool) if labels.dtype == bool \
+            else np.asarray(labels == 'Positive')
+    return packed
+
+
+def unpack_records(packed):
+    """
+    Reconstruye la estructura original a partir de registros empaquetados.
+
+    Parameters:
+    packed (pd.DataFrame o np.ndarray estructurado): Columnas 'Age', 'mask' y opcionalmente 'class'.
+
+    Returns:
+    pd.DataFrame: Age (int64), las características categóricas con sus valores de texto
+    y, si existe, 'class' (bool).
+    """
+    mask = np.asarray(packed[MASK_COLUMN])
+    data = {'Age': np.asarray(packed['Age']).astype(np.int64)}
+    for bit, column in enumerate(PACKED_FEATURES):
+        options = np.array(Config.SCHEMA[column][Config.OPTIONS], dtype=object)
+        data[column] = options[(mask >> bit) & 1]
+    names = packed.dtype.names if isinstance(packed, np.ndarray) else packed.columns
+    if 'class' in names:
+        data['class'] = np.asarray(packed['class']).astype(bool)
+    index = packed.index if isinstance(packed, pd.DataFrame) else None
+    return pd.DataFrame(data, index=index)
+
+
+def to_structured(packed):
+    """
+    Convierte registros empaquetados a un arreglo estructurado de PACKED_DTYPE.
+
+    Parameters:
+    packed (pd.DataFrame): Resultado de pack_records.
+
+    Returns:
+    np.ndarray: Arreglo de PACKED_DTYPE ('class' es False si no existe en la entrada).
+    """
+    records = np.zeros(len(packed), dtype=PACKED_DTYPE)
+    for name in PACKED_DTYPE.names:
+        if name in packed.columns:
+            records[name] = packed[name].to_numpy()
+    return records
+
+
+def record_keys(packed):
+    """
+    Calcula una clave entera única por combinación de características (edad y máscara).
+
+    Permite detectar registros duplicados o agruparlos sin comparar columnas de texto.
+
+    Parameters:
+    packed (pd.DataFrame o np.ndarray estructurado): Registros empaquetados.
+
+    Returns:
+    np.ndarray: Claves uint32 (Age << 16 | mask).
+    """
+    age = np.asarray(packed['Age']).astype(np.uint32)
+    return (age << np.uint32(16)) | np.asarray(packed[MASK_COLUMN]).astype(np.uint32)
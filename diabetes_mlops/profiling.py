@@ -0,0 +1,201 @@
+"""Perfilado opcional de CPU y memoria de las etapas del pipeline de DVC.
+
+Cada etapa (dataset.py, modeling/train.py y modeling/predict.py) se ejecuta dentro de
+profile_stage, que con el perfilado activado (variable de entorno PROFILE_STAGES o
+--profile) mide la etapa con cProfile y/o tracemalloc y escribe en Config.PROFILE_DIR:
+- <etapa>.prof: estadísticas de cProfile (pstats, por ejemplo para snakeviz).
+- <etapa>.txt: funciones con más tiempo acumulado y propio, y líneas con más memoria asignada.
+- <etapa>.json: tiempo total, CPU, pico de memoria y los mismos puntos calientes.
+
+Si MLflow está instalado, el tiempo, la CPU y la memoria se registran además como métricas
+de un run 'profile_<etapa>' (tracking.AsyncTracker), para comparar el costo de cada etapa
+entre ejecuciones.
+
+cProfile sólo mide el hilo principal: el trabajo de los procesos de joblib o del pool de
+predict.py --stream aparece como espera; la CPU de los procesos hijos que ya terminaron se
+reporta aparte (cpu_children_seconds).
+tracemalloc encarece cada asignación, por lo que en el modo 'all' los tiempos de cProfile
+están inflados; para tiempos fieles se usa el modo 'cpu'.
+
+Uso:
+    PROFILE_STAGES=cpu dvc repro
+    python diabetes_mlops/modeling/train.py --profile memory
+"""
+from contextlib import contextmanager
+import cProfile
+import importlib.util
+import io
+import json
+import os
+import pstats
+import resource
+import time
+import tracemalloc
+
+from config import Config
+
+MODES = ('cpu', 'memory', 'all')
+
+
+def resolve_mode(value):
+    """
+    Interpreta el modo de perfilado de PROFILE_STAGES o de --profile.
+
+    Parameters:
+    value (str): 'cpu', 'memory', 'all', '1' (equivale a 'all'), '0' o vacío.
+
+    Returns:
+    str: 'cpu', 'memory' o 'all', o None si el perfilado está desactivado.
+
+    Raises:
+    ValueError: Si el valor no es un modo conocido.
+    """
+    value = (value or '').strip().lower()
+    if value in ('', '0'):
+        return None
+    if value == '1':
+        return 'all'
+    if value not in MODES:
+        raise ValueError(f"Modo de perfilado desconocido: {value!r} (se esperaba uno de {MODES})")
+    return value
+
+
+def add_profile_argument(parser):
+    """Agrega --profile [cpu|memory|all] a un parser de argparse (por defecto, Config.PROFILE_STAGES)."""
+    parser.add_argument('--profile', nargs='?', const='all', default=Config.PROFILE_STAGES,
+                        metavar='{cpu,memory,all}',
+                        help="Perfilar la etapa con cProfile y/o tracemalloc (reportes en Config.PROFILE_DIR)")
+
+
+def _max_rss_mb(who):
+    # ru_maxrss está en KB en Linux
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+def _cpu_hotspots(stats, key, top):
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][key], reverse=True)[:top]
+    return [{'function': pstats.func_std_string(func), 'calls': calls, 'tottime': tottime, 'cumtime': cumtime}
+            for func, (_, calls, tottime, cumtime, _) in rows]
+
+
+def write_profile(stage, result, profiler=None, snapshot=None, profile_dir=Config.PROFILE_DIR,
+                  top=Config.PROFILE_TOP):
+    """
+    Escribe los reportes de perfilado de una etapa.
+
+    Parameters:
+    stage (str): Nombre de la etapa.
+    result (dict): Tiempos y memoria medidos (ver profile_stage); se completa con los puntos calientes.
+    profiler (cProfile.Profile): Perfil de CPU, si se midió.
+    snapshot (tracemalloc.Snapshot): Memoria asignada al final de la etapa, si se midió.
+    profile_dir (str): Directorio de los reportes.
+    top (int): Número de funciones y líneas de cada lista.
+
+    Returns:
+    str: Ruta del reporte JSON.
+    """
+    os.makedirs(profile_dir, exist_ok=True)
+    base = os.path.join(profile_dir, stage)
+    lines = [f"Etapa: {stage} (modo {result['mode']})",
+             f"Tiempo total: {result['wall_seconds']:.2f} s; CPU: {result['cpu_seconds']:.2f} s "
+             f"(procesos hijos: {result['cpu_children_seconds']:.2f} s)",
+             f"RSS máximo: {result['max_rss_mb']:.1f} MB (procesos hijos: {result['max_rss_children_mb']:.1f} MB)"]
+    if 'peak_traced_mb' in result:
+        lines.append(f"Pico de memoria de Python (tracemalloc): {result['peak_traced_mb']:.1f} MB")
+
+    if profiler is not None:
+        profiler.dump_stats(base + '.prof')
+        stats = pstats.Stats(profiler)
+        result['cumulative'] = _cpu_hotspots(stats, 3, top)
+        result['tottime'] = _cpu_hotspots(stats, 2, top)
+        for title, sort_key in (('tiempo acumulado', 'cumulative'), ('tiempo propio', 'tottime')):
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats(sort_key).print_stats(top)
+            lines += ['', f"Funciones con más {title}:", stream.getvalue().strip()]
+
+    if snapshot is not None:
+        allocations = snapshot.statistics('lineno')[:top]
+        result['allocations'] = [{'line': str(stat.traceback), 'size_mb': stat.size / 2 ** 20,
+                                  'count': stat.count} for stat in allocations]
+        lines += ['', "Líneas con más memoria asignada al final de la etapa:"]
+        lines += [f"{stat.size / 2 ** 20:>10.2f} MB {stat.count:>10} bloques  {stat.traceback}"
+                  for stat in allocations]
+
+    with open(base + '.txt', 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    with open(base + '.json', 'w') as f:
+        json.dump(result, f, indent=2)
+    return os.path.normpath(base + '.json')
+
+
+def log_profile(stage, result, report_path):
+    """Registra el tiempo, la CPU y la memoria de una etapa como métricas de un run de MLflow."""
+    from tracking import AsyncTracker
+
+    tracker = AsyncTracker(Config.MLFLOW_URI, Config.MLFLOW_EXPERIMENT)
+    with tracker.start_run(f'profile_{stage}') as run:
+        run.log_params({'stage': stage, 'mode': result['mode'], 'report': report_path})
+        run.log_metrics({key: value for key, value in result.items()
+                         if key.endswith(('_seconds', '_mb'))})
+    tracker.close()
+
+
+@contextmanager
+def profile_stage(stage, mode=Config.PROFILE_STAGES, profile_dir=Config.PROFILE_DIR, track=True):
+    """
+    Perfila el bloque de una etapa si el perfilado está activado; si no, no hace nada.
+
+    Los reportes se escriben aunque la etapa termine con una excepción o con sys.exit.
+
+    Parameters:
+    stage (str): Nombre de la etapa (el de dvc.yaml).
+    mode (str): Modo de perfilado (ver resolve_mode).
+    profile_dir (str): Directorio de los reportes.
+    track (bool): Registrar las métricas en MLflow si está instalado.
+
+    Yields:
+    None
+    """
+    mode = resolve_mode(mode)
+    if mode is None:
+        yield
+        return
+
+    profiler = cProfile.Profile() if mode in ('cpu', 'all') else None
+    trace_memory = mode in ('memory', 'all') and not tracemalloc.is_tracing()
+    if trace_memory:
+        tracemalloc.start()
+    start_times = os.times()
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        wall = time.perf_counter() - start
+        times = os.times()
+        result = {
+            'stage': stage,
+            'mode': mode,
+            'wall_seconds': wall,
+            'cpu_seconds': (times.user - start_times.user) + (times.system - start_times.system),
+            'cpu_children_seconds': (times.children_user - start_times.children_user)
+                                    + (times.children_system - start_times.children_system),
+            'max_rss_mb': _max_rss_mb(resource.RUSAGE_SELF),
+            'max_rss_children_mb': _max_rss_mb(resource.RUSAGE_CHILDREN),
+        }
+        snapshot = None
+        if trace_memory:
+            result['peak_traced_mb'] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+        report_path = write_profile(stage, result, profiler, snapshot, profile_dir)
+        print(f"Perfil de la etapa {stage} guardado en {report_path} "
+              f"({wall:.2f} s, RSS máximo {result['max_rss_mb']:.0f} MB)")
+        if track and importlib.util.find_spec('mlflow') is not None:
+            try:
+                log_profile(stage, result, report_path)
+            except Exception as e:
+                print(f"No se pudo registrar el perfil en MLflow: {e}")
@@ -0,0 +1,158 @@
+"""Servidor de la API con varios workers que comparten el modelo cargado (pre-fork).
+
+El proceso principal carga y calienta el modelo una sola vez (main.load_model), congela
+los objetos existentes para el recolector de basura (gc.freeze) y crea los workers de
+uvicorn con os.fork sobre un mismo socket. Los workers heredan el modelo y comparten sus
+páginas de memoria (copy-on-write) en lugar de cargar cada uno su propia copia como
+`uvicorn --workers`. Con gc.freeze el recolector no recorre los objetos heredados y no
+escribe en sus páginas, que siguen compartidas.
+
+El proceso principal reenvía SIGTERM/SIGINT a los workers y crea uno nuevo si alguno
+termina de forma inesperada. Si el archivo del modelo cambia, cada worker carga la versión
+nueva por su cuenta (esa versión ya no se comparte); para volver a compartirla basta con
+reiniciar el servidor. Sólo funciona en sistemas POSIX.
+
+Uso:
+    python diabetes_mlops/serve.py --workers 4 --port 8000
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import threading
+import time
+
+from threadpoolctl import threadpool_limits
+
+from config import Config
+
+RESPAWN_DELAY = 1.0
+PARENT_CHECK_INTERVAL = 1.0
+
+
+def bind_socket(host, port, backlog=2048):
+    """
+    Crea el socket de escucha que comparten todos los workers.
+
+    Parameters:
+    host (str): Dirección de escucha.
+    port (int): Puerto.
+    backlog (int): Conexiones pendientes máximas.
+
+    Returns:
+    socket.socket: El socket, heredable por los procesos hijos.
+    """
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _watch_parent(server, parent_pid):
+    # Si el proceso principal muere sin detener a los workers, éstos terminan por su cuenta
+    while not server.should_exit:
+        if os.getppid() != parent_pid:
+            server.should_exit = True
+        time.sleep(PARENT_CHECK_INTERVAL)
+
+
+def run_worker(app, sock, threads, parent_pid):
+    """Ejecuta uvicorn en un worker recién creado y termina el proceso al detenerse."""
+    import uvicorn
+
+    gc.enable()
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    status = 0
+    try:
+        server = uvicorn.Server(uvicorn.Config(app, log_level='warning'))
+        threading.Thread(target=_watch_parent, args=(server, parent_pid), daemon=True).start()
+        with threadpool_limits(limits=threads):
+            server.run(sockets=[sock])
+    except BaseException as e:
+        print(f"Worker {os.getpid()} terminó con error: {e}")
+        status = 1
+    finally:
+        # Sin os._exit el worker ejecutaría el resto del código del proceso principal
+        os._exit(status)
+
+
+def serve(workers=Config.SERVING_WORKERS, host='0.0.0.0', port=8000, threads=Config.SERVING_WORKER_THREADS):
+    """
+    Carga el modelo, crea `workers` procesos de uvicorn y los supervisa hasta recibir SIGTERM/SIGINT.
+
+    Parameters:
+    workers (int): Número de workers.
+    host (str): Dirección de escucha.
+    port (int): Puerto.
+    threads (int): Hilos de BLAS/OpenMP por worker. El modelo también se calienta con ese
+        límite: un proceso que ya creó hilos de OpenMP no puede usarlos tras un fork.
+
+    Returns:
+    int: Código de salida (1 si el modelo no se pudo cargar).
+    """
+    # Sin recolecciones entre la carga y el fork: gc.freeze congela todos los objetos creados
+    gc.disable()
+    import main
+
+    with threadpool_limits(limits=threads):
+        main.load_model()
+    if not main.ready.is_set():
+        return 1
+    sock = bind_socket(host, port)
+    gc.collect()
+    gc.freeze()
+
+    children = set()
+    stopping = False
+    parent_pid = os.getpid()
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            run_worker(main.app, sock, threads, parent_pid)
+        children.add(pid)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        spawn()
+    print(f"{workers} worker(s) escuchando en {host}:{port} (proceso principal {os.getpid()})")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            print(f"El worker {pid} terminó (estado {status}); se crea uno nuevo")
+            time.sleep(RESPAWN_DELAY)
+            if not stopping:
+                spawn()
+    sock.close()
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Sirve la API con workers pre-fork que comparten el modelo')
+    parser.add_argument('--workers', type=int, default=Config.SERVING_WORKERS)
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--threads', type=int, default=Config.SERVING_WORKER_THREADS)
+    args = parser.parse_args()
+
+    raise SystemExit(serve(args.workers, args.host, args.port, args.threads))
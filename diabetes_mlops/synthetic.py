@@ -0,0 +1,260 @@
+"""Generador de datos sintéticos a partir de Config.SCHEMA para pruebas de escala.
+
+Genera registros con la misma estructura que data/raw (Age entera, opciones de texto y
+'class' 'Positive'/'Negative') por bloques, de modo que la memoria usada no depende del
+número total de filas. Los modos de muestreo son:
+- 'schema': valores uniformes dentro del rango de Age y de las opciones de cada columna.
+- 'marginal': cada columna se muestrea de forma independiente con la distribución
+  empírica de los datos reales.
+- 'joint': se remuestrean filas completas de los datos reales (conserva la distribución
+  conjunta y la relación con 'class'), con ruido opcional en Age.
+
+Con la misma semilla y el mismo tamaño de bloque la salida es idéntica.
+
+Uso:
+    python diabetes_mlops/synthetic.py --rows 10000000 --mode joint --output data/interim/synthetic_10M.parquet
+
+Un CSV sintético puede usarse como entrada de todo el pipeline con la variable de entorno
+DATA_PATH (por ejemplo, DATA_PATH=data/interim/synthetic_joint_1000000.csv python diabetes_mlops/dataset.py).
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+
+SYNTHETIC_MODES = ['schema', 'marginal', 'joint']
+COLUMNS = Config.NUMERIC_FEATURES + Config.CATEGORICAL_FEATURES + Config.RESULT_FEATURE
+
+
+def _reference_codes(reference):
+    # Códigos enteros de cada columna: Age menos la edad mínima y el índice de la opción
+    codes = {}
+    for column in COLUMNS:
+        node = Config.SCHEMA[column]
+        values = reference[column]
+        if Config.RANGE in node:
+            codes[column] = values.to_numpy(dtype=np.int64) - node[Config.RANGE][Config.MIN]
+        else:
+            options = node[Config.OPTIONS]
+            if values.dtype == bool:
+                # 'class' preprocesada: True es 'Positive'
+                values = values.map({True: 'Positive', False: 'Negative'})
+            codes[column] = pd.Categorical(values, categories=options).codes.astype(np.int64)
+            if (codes[column] < 0).any():
+                raise ValueError(f"La columna {column} de los datos de referencia tiene valores "
+                                 "fuera de las opciones de Config.SCHEMA")
+    return codes
+
+
+class SyntheticGenerator:
+    """
+    Generador determinista de bloques de registros sintéticos.
+
+    Parameters:
+    mode (str): 'schema', 'marginal' o 'joint' (ver SYNTHETIC_MODES).
+    seed (int): Semilla; cada bloque usa un generador derivado de (seed, número de bloque).
+    reference (pd.DataFrame): Datos reales para los modos 'marginal' y 'joint' (por defecto,
+        los datos crudos de Config.DATA_PATH).
+    age_noise (int): En el modo 'joint', desplazamiento máximo aleatorio de Age (recortado al
+        rango del esquema).
+
+    Raises:
+    ValueError: Si el modo no existe o los datos de referencia no cumplen el esquema.
+    """
+
+    def __init__(self, mode='joint', seed=Config.RANDOM_STATE, reference=None, age_noise=0):
+        if mode not in SYNTHETIC_MODES:
+            raise ValueError(f"Modo desconocido: {mode}. Opciones: {SYNTHETIC_MODES}")
+        self.mode = mode
+        self.seed = seed
+        self.age_noise = age_noise
+        self.sizes = {}
+        for column in COLUMNS:
+            node = Config.SCHEMA[column]
+            if Config.RANGE in node:
+                self.sizes[column] = node[Config.RANGE][Config.MAX] - node[Config.RANGE][Config.MIN] + 1
+            else:
+                self.sizes[column] = len(node[Config.OPTIONS])
+        self.codes = None
+        self.marginals = None
+        if mode != 'schema':
+            if reference is None:
+                reference = pd.read_csv(Config.DATA_PATH)
+            self.codes = _reference_codes(reference)
+            self.n_reference = len(reference)
+            self.marginals = {column: np.bincount(codes, minlength=self.sizes[column]) / len(codes)
+                              for column, codes in self.codes.items()}
+
+    def chunk_codes(self, n_rows, chunk_index):
+        """
+        Genera los códigos enteros de un bloque (Age - edad mínima e índice de cada opción).
+
+        Parameters:
+        n_rows (int): Número de filas del bloque.
+        chunk_index (int): Número de bloque, que junto con la semilla determina su contenido.
+
+        Returns:
+        dict: Columna -> np.ndarray de códigos.
+        """
+        rng = np.random.default_rng([self.seed, chunk_index])
+        if self.mode == 'joint':
+            rows = rng.integers(0, self.n_reference, size=n_rows)
+            codes = {column: values[rows] for column, values in self.codes.items()}
+            if self.age_noise:
+                age = codes['Age'] + rng.integers(-self.age_noise, self.age_noise + 1, size=n_rows)
+                codes['Age'] = np.clip(age, 0, self.sizes['Age'] - 1)
+            return codes
+        codes = {}
+        for column in COLUMNS:
+            if self.mode == 'schema':
+                codes[column] = rng.integers(0, self.sizes[column], size=n_rows)
+            else:
+                codes[column] = rng.choice(self.sizes[column], size=n_rows, p=self.marginals[column])
+        return codes
+
+    def chunk(self, n_rows, chunk_index, start=0):
+        """
+        Genera un bloque de registros con la estructura de los datos crudos.
+
+        Parameters:
+        n_rows (int): Número de filas del bloque.
+        chunk_index (int): Número de bloque.
+        start (int): Índice de la primera fila (para que el índice sea continuo entre bloques).
+
+        Returns:
+        pd.DataFrame: Registros con las columnas de Config.SCHEMA.
+        """
+        codes = self.chunk_codes(n_rows, chunk_index)
+        data = {}
+        for column in COLUMNS:
+            node = Config.SCHEMA[column]
+            if Config.RANGE in node:
+                data[column] = codes[column] + node[Config.RANGE][Config.MIN]
+            else:
+                options = np.array(node[Config.OPTIONS], dtype=object)
+                data[column] = options[codes[column]]
+        return pd.DataFrame(data, index=pd.RangeIndex(start, start + n_rows))
+
+    def iter_chunks(self, n_rows, chunksize=Config.SYNTHETIC_CHUNKSIZE):
+        """
+        Genera `n_rows` registros en bloques de como máximo `chunksize` filas.
+
+        Parameters:
+        n_rows (int): Número total de filas.
+        chunksize (int): Número de filas por bloque.
+
+        Yields:
+        pd.DataFrame: Bloques consecutivos (ver chunk).
+        """
+        for chunk_index, start in enumerate(range(0, n_rows, chunksize)):
+            yield self.chunk(min(chunksize, n_rows - start), chunk_index, start)
+
+
+def write_synthetic(path, n_rows, mode='joint', seed=Config.RANDOM_STATE,
+                    chunksize=Config.SYNTHETIC_CHUNKSIZE, reference=None, age_noise=0):
+    """
+    Escribe registros sintéticos por bloques, con memoria acotada a un bloque.
+
+    El formato se determina por la extensión:
+    - '.csv': la estructura de los datos crudos (entrada de dataset.py).
+    - '.parquet': el formato procesado con tipos compactos (ver dataset.to_processed_dtypes).
+    - '.npy': el formato procesado empaquetado (ver packing.py).
+
+    Parameters:
+    path (str): Ruta de destino.
+    n_rows (int): Número total de filas.
+    mode (str): Modo de muestreo (ver SyntheticGenerator).
+    seed (int): Semilla.
+    chunksize (int): Número de filas por bloque.
+    reference (pd.DataFrame): Datos reales para los modos 'marginal' y 'joint'.
+    age_noise (int): Ruido máximo de Age en el modo 'joint'.
+
+    Returns:
+    str: La ruta escrita.
+    """
+    from dataset import to_processed_dtypes
+    from packing import PACKED_DTYPE, pack_records, to_structured
+
+    generator = SyntheticGenerator(mode, seed, reference, age_noise)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + '.tmp'
+    if path.endswith('.parquet'):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for chunk in generator.iter_chunks(n_rows, chunksize):
+                table = pa.Table.from_pandas(to_processed_dtypes(chunk), preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+    elif path.endswith('.npy'):
+        # El tamaño total se conoce de antemano: se escribe sobre un memmap del archivo .npy
+        records = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=PACKED_DTYPE, shape=(n_rows,))
+        for chunk in generator.iter_chunks(n_rows, chunksize):
+            records[chunk.index[0]:chunk.index[-1] + 1] = to_structured(pack_records(chunk))
+        records.flush()
+        del records
+    else:
+        with open(tmp_path, 'w', newline='') as f:
+            for chunk_index, chunk in enumerate(generator.iter_chunks(n_rows, chunksize)):
+                chunk.to_csv(f, index=False, header=chunk_index == 0)
+    os.replace(tmp_path, path)
+    print(f"{n_rows} registros sintéticos ({mode}) guardados en {path}")
+    return path
+
+
+def test_synthetic_data(data):
+    """
+    Verifica que los registros sintéticos cumplan Config.SCHEMA (tipos, rangos y opciones).
+
+    Parameters:
+    data (pd.DataFrame o iterable de pd.DataFrame): Registros sintéticos con la estructura cruda.
+
+    Returns:
+    None
+
+    Raises:
+    AssertionError: Si algún registro no cumple el esquema.
+    """
+    from validation import validate_data
+
+    report = validate_data(data)
+    try:
+        assert report.ok, "Los datos sintéticos no cumplen el esquema:\n" + report.summary()
+    except AssertionError as ae:
+        raise(ae)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Genera datos sintéticos a partir de Config.SCHEMA')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--mode', choices=SYNTHETIC_MODES, default='joint')
+    parser.add_argument('--seed', type=int, default=Config.RANDOM_STATE)
+    parser.add_argument('--chunksize', type=int, default=Config.SYNTHETIC_CHUNKSIZE)
+    parser.add_argument('--age-noise', type=int, default=0)
+    parser.add_argument('--output', default=None,
+                        help='Ruta .csv, .parquet o .npy (por defecto, un CSV en Config.SYNTHETIC_DATA_DIR)')
+    args = parser.parse_args()
+
+    output = args.output or os.path.join(Config.SYNTHETIC_DATA_DIR,
+                                         f'synthetic_{args.mode}_{args.rows}.csv')
+    write_synthetic(output, args.rows, args.mode, args.seed, args.chunksize, age_noise=args.age_noise)
+
+    # Los bloques son deterministas (semilla e índice de bloque): se validan los mismos registros
+    # escritos, con la estructura cruda, en cualquiera de los formatos de salida
+    try:
+        test_synthetic_data(SyntheticGenerator(args.mode, args.seed, age_noise=args.age_noise)
+                            .iter_chunks(args.rows, args.chunksize))
+    except AssertionError as e:
+        print(f"Error en las pruebas de datos sintéticos: {e}")
+        sys.exit(1)
+    print("Pruebas de datos sintéticos CORRECTAS")
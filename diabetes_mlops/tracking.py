@@ -0,0 +1,319 @@
+"""Registro de experimentos en MLflow sin bloquear el entrenamiento.
+
+Cada run se escribe primero en un directorio local (Config.TRACKING_SPOOL_DIR) con sus
+parámetros, métricas y modelos serializados. Un hilo en segundo plano sube los runs
+pendientes al servidor de Config.MLFLOW_URI con llamadas por lotes (log_batch) y borra la
+copia local al terminar. Si el servidor no responde, los runs quedan en el directorio y se
+reenvían al iniciar el siguiente entrenamiento o con:
+
+    python diabetes_mlops/tracking.py --replay [--uri file:///ruta/mlruns]
+"""
+import argparse
+from contextlib import contextmanager
+import json
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+import joblib
+
+from config import Config
+
+# Reintentos y tiempo de espera del cliente HTTP de MLflow en este proceso: con el servidor
+# caído los runs se guardan en el directorio local en lugar de reintentar durante minutos
+os.environ.setdefault('MLFLOW_HTTP_REQUEST_MAX_RETRIES', str(Config.TRACKING_HTTP_RETRIES))
+os.environ.setdefault('MLFLOW_HTTP_REQUEST_TIMEOUT', str(Config.TRACKING_HTTP_TIMEOUT))
+
+RUN_FILE = 'run.json'
+MODELS_DIR = 'models'
+MAX_PARAMS_PER_BATCH = 100
+MAX_METRICS_PER_BATCH = 1000
+
+
+class RunRecord:
+    """
+    Parámetros, métricas y modelos de un run, acumulados en memoria.
+
+    Parameters:
+    run_name (str): Nombre del run en MLflow.
+    """
+
+    def __init__(self, run_name):
+        self.run_name = run_name
+        self.params = {}
+        self.metrics = []
+        self.models = {}
+        self.start_time = int(time.time() * 1000)
+
+    def log_param(self, key, value):
+        self.params[key] = str(value)
+
+    def log_params(self, params):
+        for key, value in params.items():
+            self.log_param(key, value)
+
+    def log_metric(self, key, value, step=0):
+        self.metrics.append({'key': key, 'value': float(value),
+                             'timestamp': int(time.time() * 1000), 'step': step})
+
+    def log_metrics(self, metrics, step=0):
+        for key, value in metrics.items():
+            self.log_metric(key, value, step)
+
+    def log_model(self, model, artifact_path):
+        """Registra un modelo de scikit-learn, que se sube como artefacto con el formato de mlflow.sklearn."""
+        self.models[artifact_path] = model
+
+
+def spool_run(record, spool_dir=Config.TRACKING_SPOOL_DIR):
+    """
+    Escribe un run en el directorio local de runs pendientes.
+
+    El run se escribe en un directorio temporal que se renombra al terminar, por lo que
+    nunca se sube un run a medio escribir.
+
+    Parameters:
+    record (RunRecord): Run a guardar.
+    spool_dir (str): Directorio de runs pendientes.
+
+    Returns:
+    str: Ruta del directorio del run.
+    """
+    os.makedirs(spool_dir, exist_ok=True)
+    # El nombre empieza con la hora para reenviar los runs en el orden en que se registraron
+    name = f"{time.time_ns()}_{uuid.uuid4().hex[:8]}"
+    tmp_dir = os.path.join(spool_dir, '.tmp_' + name)
+    os.makedirs(os.path.join(tmp_dir, MODELS_DIR))
+    for artifact_path, model in record.models.items():
+        joblib.dump(model, os.path.join(tmp_dir, MODELS_DIR, artifact_path + '.pkl'))
+    run = {'run_name': record.run_name, 'start_time': record.start_time,
+           'end_time': int(time.time() * 1000), 'params': record.params,
+           'metrics': record.metrics, 'models': sorted(record.models), 'run_id': None}
+    with open(os.path.join(tmp_dir, RUN_FILE), 'w') as f:
+        json.dump(run, f, indent=2)
+    entry = os.path.join(spool_dir, name)
+    os.replace(tmp_dir, entry)
+    return entry
+
+
+def pending_runs(spool_dir=Config.TRACKING_SPOOL_DIR):
+    """
+    Lista los runs pendientes de subir, del más antiguo al más reciente.
+
+    Parameters:
+    spool_dir (str): Directorio de runs pendientes.
+
+    Returns:
+    list: Rutas de los directorios de los runs.
+    """
+    if not os.path.isdir(spool_dir):
+        return []
+    return [os.path.join(spool_dir, name) for name in sorted(os.listdir(spool_dir))
+            if not name.startswith('.') and os.path.exists(os.path.join(spool_dir, name, RUN_FILE))]
+
+
+def get_experiment_id(client, experiment_name):
+    experiment = client.get_experiment_by_name(experiment_name)
+    if experiment is not None:
+        return experiment.experiment_id
+    return client.create_experiment(experiment_name)
+
+
+def upload_run(client, experiment_id, entry):
+    """
+    Sube un run pendiente a MLflow y elimina su copia local.
+
+    El id del run se guarda en el directorio local en cuanto se crea, de modo que si la
+    subida se interrumpe, el reenvío completa el mismo run en lugar de crear otro.
+
+    Parameters:
+    client (MlflowClient): Cliente del servidor de seguimiento.
+    experiment_id (str): Experimento en el que se crea el run.
+    entry (str): Directorio del run pendiente (ver spool_run).
+
+    Returns:
+    str: El id del run en MLflow.
+    """
+    import mlflow.sklearn
+    from mlflow.entities import Metric, Param
+
+    run_file = os.path.join(entry, RUN_FILE)
+    with open(run_file) as f:
+        run = json.load(f)
+    if run['run_id'] is None:
+        run['run_id'] = client.create_run(experiment_id, start_time=run['start_time'],
+                                          run_name=run['run_name']).info.run_id
+        with open(run_file + '.tmp', 'w') as f:
+            json.dump(run, f, indent=2)
+        os.replace(run_file + '.tmp', run_file)
+    run_id = run['run_id']
+
+    params = [Param(key, value) for key, value in run['params'].items()]
+    for start in range(0, len(params), MAX_PARAMS_PER_BATCH):
+        client.log_batch(run_id, params=params[start:start + MAX_PARAMS_PER_BATCH])
+    metrics = [Metric(m['key'], m['value'], m['timestamp'], m['step']) for m in run['metrics']]
+    for start in range(0, len(metrics), MAX_METRICS_PER_BATCH):
+        client.log_batch(run_id, metrics=metrics[start:start + MAX_METRICS_PER_BATCH])
+    for artifact_path in run['models']:
+        model = joblib.load(os.path.join(entry, MODELS_DIR, artifact_path + '.pkl'))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            model_dir = os.path.join(tmp_dir, artifact_path)
+            mlflow.sklearn.save_model(
+                model, model_dir, serialization_format=mlflow.sklearn.SERIALIZATION_FORMAT_CLOUDPICKLE)
+            client.log_artifacts(run_id, model_dir, artifact_path)
+    client.set_terminated(run_id, 'FINISHED', end_time=run['end_time'])
+    shutil.rmtree(entry, ignore_errors=True)
+    return run_id
+
+
+def replay_spool(tracking_uri=Config.MLFLOW_URI, experiment_name=Config.MLFLOW_EXPERIMENT,
+                 spool_dir=Config.TRACKING_SPOOL_DIR):
+    """
+    Sube de forma síncrona todos los runs pendientes.
+
+    Se detiene en el primer error y deja en el directorio los runs que no se subieron.
+
+    Parameters:
+    tracking_uri (str): URI del servidor de seguimiento.
+    experiment_name (str): Nombre del experimento.
+    spool_dir (str): Directorio de runs pendientes.
+
+    Returns:
+    list: Ids de los runs subidos.
+    """
+    from mlflow.tracking import MlflowClient
+
+    entries = pending_runs(spool_dir)
+    if not entries:
+        return []
+    client = MlflowClient(tracking_uri)
+    experiment_id = get_experiment_id(client, experiment_name)
+    return [upload_run(client, experiment_id, entry) for entry in entries]
+
+
+class AsyncTracker:
+    """
+    Registro de runs de MLflow en segundo plano con respaldo en disco.
+
+    `start_run` sólo escribe el run en el directorio local; un hilo lo sube al servidor
+    después. Al crearse, el hilo también reenvía los runs pendientes de ejecuciones anteriores.
+    Tras el primer error de conexión deja de intentar subir runs hasta el siguiente
+    entrenamiento, para no acumular tiempos de espera.
+
+    Parameters:
+    tracking_uri (str): URI del servidor de seguimiento (también acepta file:///...).
+    experiment_name (str): Nombre del experimento.
+    spool_dir (str): Directorio de runs pendientes.
+    """
+
+    def __init__(self, tracking_uri=Config.MLFLOW_URI, experiment_name=Config.MLFLOW_EXPERIMENT,
+                 spool_dir=Config.TRACKING_SPOOL_DIR):
+        self.tracking_uri = tracking_uri
+        self.experiment_name = experiment_name
+        self.spool_dir = spool_dir
+        self.uploaded = []
+        self._offline = False
+        self._queue = queue.Queue()
+        for entry in pending_runs(spool_dir):
+            self._queue.put(entry)
+        self._thread = threading.Thread(target=self._run, name='mlflow-tracker', daemon=True)
+        self._thread.start()
+
+    @contextmanager
+    def start_run(self, run_name):
+        """
+        Acumula un run y lo encola para subirlo al salir del bloque sin errores.
+
+        Parameters:
+        run_name (str): Nombre del run.
+
+        Yields:
+        RunRecord: El run en el que se registran parámetros, métricas y modelos.
+        """
+        record = RunRecord(run_name)
+        yield record
+        self._queue.put(spool_run(record, self.spool_dir))
+
+    def close(self, timeout=Config.TRACKING_FLUSH_TIMEOUT):
+        """
+        Espera como máximo `timeout` segundos a que se suban los runs encolados.
+
+        Los runs que no se alcanzan a subir quedan en el directorio local para reenviarlos.
+
+        Parameters:
+        timeout (float): Segundos máximos de espera.
+
+        Returns:
+        int: Número de runs que quedan pendientes en el directorio local.
+        """
+        self._queue.put(None)
+        self._thread.join(timeout)
+        pending = len(pending_runs(self.spool_dir))
+        if pending:
+            print(f"{pending} run(s) de MLflow pendientes en {self.spool_dir}; "
+                  "se reenviarán en el próximo entrenamiento o con tracking.py --replay")
+        return pending
+
+    def _run(self):
+        client = None
+        experiment_id = None
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                break
+            if self._offline or not os.path.exists(entry):
+                continue
+            try:
+                if client is None:
+                    from mlflow.tracking import MlflowClient
+
+                    client = MlflowClient(self.tracking_uri)
+                    experiment_id = get_experiment_id(client, self.experiment_name)
+                self.uploaded.append(upload_run(client, experiment_id, entry))
+            except Exception as e:
+                self._offline = True
+                print(f"No se pudo registrar el run en MLflow ({self.tracking_uri}), "
+                      f"queda pendiente en {entry}: {e}")
+
+
+def test_uploaded_run(client, run_id, record):
+    """
+    Verifica que un run subido a MLflow contenga los parámetros, métricas y modelos registrados.
+
+    Parameters:
+    client (MlflowClient): Cliente del servidor de seguimiento.
+    run_id (str): Id del run subido.
+    record (RunRecord): Run registrado localmente.
+
+    Returns:
+    None
+
+    Raises:
+    AssertionError: Si el run no contiene lo registrado.
+    """
+    try:
+        run = client.get_run(run_id)
+        assert run.info.run_name == record.run_name, "El nombre del run no coincide"
+        assert run.data.params == record.params, "Los parámetros del run no coinciden"
+        expected = {m['key']: m['value'] for m in record.metrics}
+        assert run.data.metrics == expected, "Las métricas del run no coinciden"
+        artifacts = {a.path for a in client.list_artifacts(run_id)}
+        assert set(record.models) <= artifacts, "Faltan modelos en los artefactos del run"
+    except AssertionError as ae:
+        raise(ae)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Reenvía a MLflow los runs pendientes')
+    parser.add_argument('--replay', action='store_true')
+    parser.add_argument('--uri', default=Config.MLFLOW_URI)
+    parser.add_argument('--spool-dir', default=Config.TRACKING_SPOOL_DIR)
+    args = parser.parse_args()
+
+    if args.replay:
+        run_ids = replay_spool(args.uri, spool_dir=args.spool_dir)
+        print(f"{len(run_ids)} run(s) reenviados a {args.uri}")
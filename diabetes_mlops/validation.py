@@ -0,0 +1,273 @@
+"""Validación vectorizada de datos contra Config.SCHEMA.
+
+A diferencia de dataset.test_data_types y dataset.test_data_content, que se detienen en el
+primer error, la validación revisa en una sola pasada el tipo, el rango y las opciones
+permitidas de todas las columnas y devuelve un reporte con el número de violaciones y
+algunos índices de ejemplo por columna. Puede ejecutarse por bloques sobre datos leídos
+en streaming, acumulando el resultado en el mismo reporte.
+
+Uso:
+    python diabetes_mlops/validation.py [ruta] --chunksize 1000000 --output reports/validation.json
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+
+
+class ValidationReport:
+    """
+    Reporte acumulado de violaciones del esquema.
+
+    Para cada columna del esquema registra el tipo de dato observado, si es compatible con
+    el esperado, el número de valores fuera de rango o de las opciones permitidas (los
+    valores faltantes cuentan como violaciones) y hasta `max_samples` índices de fila de ejemplo.
+
+    Parameters:
+    schema (dict): Esquema de validación (por defecto, Config.SCHEMA).
+    max_samples (int): Número máximo de índices de ejemplo guardados por columna.
+    """
+
+    def __init__(self, schema=Config.SCHEMA, max_samples=Config.VALIDATION_MAX_SAMPLES):
+        self.schema = schema
+        self.max_samples = max_samples
+        self.n_rows = 0
+        self.n_chunks = 0
+        self.missing_columns = set()
+        self.unexpected_columns = set()
+        self.columns = {column: {'dtype': None, 'dtype_ok': True, 'violations': 0, 'samples': []}
+                        for column in schema}
+
+    @property
+    def ok(self):
+        """True si no se encontró ninguna violación."""
+        return self.n_errors == 0
+
+    @property
+    def n_errors(self):
+        """Número total de problemas: columnas faltantes, tipos incompatibles y valores inválidos."""
+        return len(self.missing_columns) + sum(
+            (not result['dtype_ok']) + result['violations'] for result in self.columns.values())
+
+    def to_dict(self):
+        """
+        Convierte el reporte a un diccionario serializable en JSON.
+
+        Returns:
+        dict: Filas y bloques revisados, columnas faltantes e inesperadas y el detalle por columna.
+        """
+        return {
+            'ok': self.ok,
+            'rows': self.n_rows,
+            'chunks': self.n_chunks,
+            'missing_columns': sorted(self.missing_columns),
+            'unexpected_columns': sorted(self.unexpected_columns),
+            'columns': {column: dict(result) for column, result in self.columns.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data, schema=Config.SCHEMA, max_samples=Config.VALIDATION_MAX_SAMPLES):
+        """
+        Reconstruye un reporte guardado con to_dict para seguir acumulando bloques.
+
+        Parameters:
+        data (dict): Resultado de to_dict.
+        schema (dict): Esquema de validación.
+        max_samples (int): Número máximo de índices de ejemplo guardados por columna.
+
+        Returns:
+        ValidationReport: El reporte, independiente de `data`.
+        """
+        report = cls(schema, max_samples)
+        report.n_rows = data['rows']
+        report.n_chunks = data['chunks']
+        report.missing_columns = set(data['missing_columns'])
+        report.unexpected_columns = set(data['unexpected_columns'])
+        for column, result in data['columns'].items():
+            report.columns[column] = dict(result, samples=list(result['samples']))
+        return report
+
+    def summary(self):
+        """
+        Describe el reporte en texto, una línea por columna con problemas.
+
+        Returns:
+        str: El resumen del reporte.
+        """
+        lines = [f"Validación de {self.n_rows} registros en {self.n_chunks} bloque(s): "
+                 + ('CORRECTA' if self.ok else f'{self.n_errors} problema(s)')]
+        for column in sorted(self.missing_columns):
+            lines.append(f"  {column}: columna faltante")
+        for column, result in self.columns.items():
+            if not result['dtype_ok']:
+                lines.append(f"  {column}: tipo {result['dtype']} incompatible con "
+                             f"{self.schema[column][Config.DTYPE]}")
+            if result['violations']:
+                lines.append(f"  {column}: {result['violations']} valor(es) inválido(s), "
+                             f"por ejemplo en las filas {result['samples']}")
+        if self.unexpected_columns:
+            lines.append(f"  Columnas fuera del esquema: {sorted(self.unexpected_columns)}")
+        return '\n'.join(lines)
+
+
+def _is_option_dtype(dtype):
+    return (pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype)
+            or isinstance(dtype, pd.CategoricalDtype))
+
+
+def _range_violations(series, node):
+    if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+        values = series.to_numpy()
+    else:
+        values = pd.to_numeric(series, errors='coerce').to_numpy()
+    node = node[Config.RANGE]
+    with np.errstate(invalid='ignore'):
+        invalid = (values < node[Config.MIN]) | (values > node[Config.MAX])
+    if values.dtype.kind == 'f':
+        invalid |= np.isnan(values)
+    return invalid
+
+
+def _option_violations(series, options):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Se validan las categorías una sola vez y se indexan con los códigos de cada fila
+        valid_categories = series.cat.categories.isin(options)
+        codes = series.cat.codes.to_numpy()
+        return (codes < 0) | ~valid_categories[codes]
+    return ~series.isin(options).to_numpy()
+
+
+def validate_chunk(data, report=None):
+    """
+    Valida un bloque de datos contra el esquema y acumula el resultado en el reporte.
+
+    Cada columna se recorre una sola vez con operaciones vectorizadas. Los índices de ejemplo
+    son las etiquetas del índice de `data`, por lo que los bloques leídos con
+    `pd.read_csv(chunksize=...)` reportan la posición de la fila en el archivo completo.
+
+    Parameters:
+    data (pd.DataFrame): Bloque de datos a validar.
+    report (ValidationReport): Reporte en el que se acumula el resultado (por defecto, uno nuevo).
+
+    Returns:
+    ValidationReport: El reporte actualizado.
+    """
+    if report is None:
+        report = ValidationReport()
+    report.n_rows += len(data)
+    report.n_chunks += 1
+    report.missing_columns |= set(report.schema) - set(data.columns)
+    report.unexpected_columns |= set(data.columns) - set(report.schema)
+    for column, node in report.schema.items():
+        if column not in data.columns:
+            continue
+        series = data[column]
+        result = report.columns[column]
+        result['dtype'] = str(series.dtype)
+        if Config.RANGE in node:
+            if node[Config.DTYPE] == Config.INT_DTYPE:
+                result['dtype_ok'] &= pd.api.types.is_integer_dtype(series.dtype)
+            else:
+                result['dtype_ok'] &= pd.api.types.is_numeric_dtype(series.dtype)
+            invalid = _range_violations(series, node)
+        else:
+            result['dtype_ok'] &= _is_option_dtype(series.dtype)
+            invalid = _option_violations(series, node[Config.OPTIONS])
+        count = int(np.count_nonzero(invalid))
+        if count:
+            result['violations'] += count
+            missing_samples = report.max_samples - len(result['samples'])
+            if missing_samples > 0:
+                rows = np.flatnonzero(invalid)[:missing_samples]
+                result['samples'].extend(data.index[rows].tolist())
+    return report
+
+
+def validate_data(data, chunksize=None):
+    """
+    Valida un DataFrame completo o una secuencia de bloques contra el esquema.
+
+    Parameters:
+    data (pd.DataFrame o iterable de pd.DataFrame): Datos a validar.
+    chunksize (int): Si `data` es un DataFrame, número de filas por bloque (por defecto, todo
+        el DataFrame en un solo bloque).
+
+    Returns:
+    ValidationReport: El reporte de violaciones.
+    """
+    report = ValidationReport()
+    if isinstance(data, pd.DataFrame):
+        if chunksize is None:
+            return validate_chunk(data, report)
+        chunks = (data.iloc[start:start + chunksize] for start in range(0, len(data), chunksize))
+    else:
+        chunks = data
+    for chunk in chunks:
+        validate_chunk(chunk, report)
+    return report
+
+
+def validate_file(path=Config.DATA_PATH, chunksize=Config.VALIDATION_CHUNKSIZE):
+    """
+    Valida un archivo CSV o Parquet leyéndolo por bloques, con memoria acotada.
+
+    Parameters:
+    path (str): Ruta del archivo o, para Parquet, del directorio de partes; el formato se
+        determina por la extensión.
+    chunksize (int): Número de filas por bloque.
+
+    Returns:
+    ValidationReport: El reporte de violaciones.
+    """
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        from dataset import parquet_files
+
+        def chunks():
+            start = 0
+            for part in parquet_files(path):
+                for batch in pq.ParquetFile(part).iter_batches(batch_size=chunksize):
+                    chunk = batch.to_pandas()
+                    chunk.index += start
+                    start += len(chunk)
+                    yield chunk
+        return validate_data(chunks())
+    # Las columnas con opciones se leen como categorías: sólo se validan los valores distintos
+    dtypes = {column: 'category' for column, node in Config.SCHEMA.items() if Config.OPTIONS in node}
+    return validate_data(pd.read_csv(path, dtype=dtypes, chunksize=chunksize))
+
+
+def save_report(report, path=Config.VALIDATION_REPORT_PATH):
+    """
+    Guarda el reporte de validación en JSON.
+
+    Parameters:
+    report (ValidationReport): Reporte a guardar.
+    path (str): Ruta de destino.
+
+    Returns:
+    None
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(report.to_dict(), f, indent=2)
+    print(f"Reporte de validación guardado en {path}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Valida un archivo de datos contra Config.SCHEMA')
+    parser.add_argument('path', nargs='?', default=Config.DATA_PATH)
+    parser.add_argument('--chunksize', type=int, default=Config.VALIDATION_CHUNKSIZE)
+    parser.add_argument('--output', default=Config.VALIDATION_REPORT_PATH)
+    args = parser.parse_args()
+
+    report = validate_file(args.path, args.chunksize)
+    print(report.summary())
+    save_report(report, args.output)
+    if not report.ok:
+        sys.exit(1)